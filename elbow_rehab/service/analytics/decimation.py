@@ -0,0 +1,117 @@
+"""Shape-preserving downsampling of angle time series for charts.
+
+Both methods return sorted row indices, so a frame can be decimated with
+``df.iloc[indices]`` and every returned sample is a real measurement. The
+first and last samples and the global minimum and maximum of every series are
+always kept, so range-of-motion read off a decimated chart stays exact.
+"""
+
+from __future__ import annotations
+
+from typing import Literal, Sequence
+
+import numpy as np
+import pandas as pd
+
+DecimationMethod = Literal["lttb", "minmax"]
+
+ANGLE_COLUMNS = ("flexion_deg", "pronation_deg")
+
+
+def _bucket_starts(start: int, stop: int, buckets: int) -> np.ndarray:
+    return np.unique(np.linspace(start, stop, buckets + 1).astype(np.int64)[:-1])
+
+
+def minmax_indices(y: np.ndarray, buckets: int) -> np.ndarray:
+    """Indices of the minimum and maximum of `y` in each of `buckets` equal buckets."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    starts = _bucket_starts(0, n, max(1, min(buckets, n)))
+    sizes = np.diff(np.append(starts, n))
+    bucket_ids = np.repeat(np.arange(len(starts)), sizes)
+
+    selected = []
+    for values, reduce in (
+        (np.where(np.isnan(y), np.inf, y), np.minimum),
+        (np.where(np.isnan(y), -np.inf, y), np.maximum),
+    ):
+        extreme = np.repeat(reduce.reduceat(values, starts), sizes)
+        hits = np.flatnonzero(values == extreme)
+        # first hit per bucket
+        _, first = np.unique(bucket_ids[hits], return_index=True)
+        selected.append(hits[first])
+    return np.unique(np.concatenate(selected))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of `threshold` visually representative points.
+
+    The selection is sequential across buckets (each pick depends on the
+    previous one); the triangle areas within a bucket are computed at once.
+    NaN samples are never picked as interior points.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n, dtype=np.int64)
+
+    starts = np.append(_bucket_starts(1, n - 1, threshold - 2), n - 1)
+    y_filled = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+
+    indices = np.empty(len(starts) + 1, dtype=np.int64)
+    indices[0] = 0
+    previous = 0
+    for bucket in range(len(starts) - 1):
+        lo, hi = starts[bucket], starts[bucket + 1]
+        next_hi = starts[bucket + 2] if bucket + 2 < len(starts) else n
+        # the third vertex is the average of the next bucket
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y_filled[hi:next_hi].mean()
+        px, py = x[previous], y_filled[previous]
+        areas = np.abs(
+            (px - avg_x) * (y_filled[lo:hi] - py) - (px - x[lo:hi]) * (avg_y - py)
+        )
+        areas[np.isnan(y[lo:hi])] = -1.0
+        previous = lo + int(np.argmax(areas))
+        indices[bucket + 1] = previous
+    indices[-1] = n - 1
+    return indices
+
+
+def decimate_frame(
+    df: pd.DataFrame,
+    max_points: int,
+    method: DecimationMethod = "lttb",
+    columns: Sequence[str] = ANGLE_COLUMNS,
+    x_column: str = "esp32_ms_A",
+) -> pd.DataFrame:
+    """Keep at most `max_points` rows of `df` that preserve the shape of `columns`.
+
+    Each series gets an equal share of the budget; the union of the selected
+    rows is returned in their original order.
+    """
+    n = len(df)
+    columns = [col for col in columns if col in df.columns]
+    if n <= max_points or not columns:
+        return df
+
+    # first, last and the global extrema of every series are always kept
+    per_series = max(3, (max_points - 2 - 2 * len(columns)) // len(columns))
+    x = df[x_column].to_numpy(dtype=float) if x_column in df.columns else np.arange(n, dtype=float)
+
+    selected = [np.array([0, n - 1], dtype=np.int64)]
+    for col in columns:
+        y = df[col].to_numpy(dtype=float)
+        if method == "minmax":
+            selected.append(minmax_indices(y, per_series // 2))
+        elif method == "lttb":
+            selected.append(lttb_indices(x, y, per_series))
+        else:
+            raise ValueError(f"Unknown decimation method: {method}")
+        if np.isfinite(y).any():
+            selected.append(np.array([np.nanargmin(y), np.nanargmax(y)], dtype=np.int64))
+
+    return df.iloc[np.unique(np.concatenate(selected))]
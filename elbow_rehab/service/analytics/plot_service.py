@@ -0,0 +1,191 @@
+"""On-demand session figures, rendered in worker processes and cached.
+
+Angle requests never draw anything; figures are produced only when
+``GET /plots/{kind}`` asks for them. Session data is decimated before it is
+shipped to a worker (a chart cannot show more points than it has pixels), the
+matplotlib work runs in a process pool so it neither blocks the event loop nor
+contends for the GIL, and the encoded image is cached by session fingerprint.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Hashable, Literal
+
+import pandas as pd
+
+from elbow_rehab.service.analytics.decimation import decimate_frame
+from elbow_rehab.service.angle_calculation.calibration import get_gyro_biases
+from elbow_rehab.service.angle_calculation.settings import (
+    ACCEL_COLS_A,
+    ACCEL_COLS_B,
+    GYRO_COLS_A,
+    GYRO_COLS_B,
+)
+
+PLOT_WORKERS = int(os.getenv("PLOT_WORKERS", "2"))
+PLOT_MAX_POINTS = int(os.getenv("PLOT_MAX_POINTS", "4000"))
+PLOT_CACHE_MAX_BYTES = int(os.getenv("PLOT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+PlotKind = Literal["angles", "imu", "gyro_calibration"]
+PlotFormat = Literal["png", "svg"]
+
+PLOT_MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Series each figure draws; decimation keeps their shape and extrema.
+PLOT_COLUMNS = {
+    "angles": ("flexion_deg", "pronation_deg"),
+    "imu": tuple(ACCEL_COLS_A + ACCEL_COLS_B + GYRO_COLS_A + GYRO_COLS_B),
+    "gyro_calibration": tuple(GYRO_COLS_A + GYRO_COLS_B),
+}
+
+
+def prepare_plot_frame(df: pd.DataFrame, kind: PlotKind, max_points: int) -> pd.DataFrame:
+    """Only the plotted columns of `df`, decimated to about `max_points` rows.
+
+    Runs in the parent so only the small frame is pickled to the worker.
+    Row labels stay the sample positions, so the x axis is unchanged.
+    """
+    columns = list(PLOT_COLUMNS[kind])
+    df = df.reset_index(drop=True)
+    return decimate_frame(df[columns], max_points, method="minmax", columns=columns)
+
+
+def render_plot(df: pd.DataFrame, kind: PlotKind, fmt: PlotFormat = "png", biases=None) -> bytes:
+    """Draw `kind` for `df` and return the encoded image; runs in a worker process.
+
+    `gyro_calibration` takes the raw readings plus the gyro `biases` computed
+    from the full session.
+    """
+    from elbow_rehab.service.analytics.raw_data_plots import (
+        angles_figure,
+        gyro_calibration_figure,
+        imu_readings_figure,
+    )
+
+    if kind == "angles":
+        fig = angles_figure(df)
+    elif kind == "imu":
+        fig = imu_readings_figure(df)
+    elif kind == "gyro_calibration":
+        calibrated = df.copy()
+        for col, bias in (biases or {}).items():
+            calibrated[col] = df[col] - bias
+        fig = gyro_calibration_figure(df, calibrated)
+    else:
+        raise ValueError(f"Unknown plot kind: {kind}")
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class PlotCache:
+    """LRU of encoded figures bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = PLOT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> bytes | None:
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+            return image
+
+    def put(self, key: Hashable, image: bytes) -> None:
+        if len(image) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = image
+            self._bytes += len(image)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+
+class PlotService:
+    """Renders figures in an executor, deduplicating concurrent identical requests."""
+
+    def __init__(
+        self,
+        executor_factory: Callable[[], Executor] | None = None,
+        cache: PlotCache | None = None,
+    ):
+        self._executor_factory = executor_factory or (
+            # spawn: forking a process that holds client threads is unsafe
+            lambda: ProcessPoolExecutor(
+                max_workers=PLOT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        )
+        self._executor: Executor | None = None
+        self.cache = cache or PlotCache()
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._executor_factory()
+        return self._executor
+
+    async def get_plot(
+        self,
+        key: Hashable,
+        load_frame: Callable[[], pd.DataFrame],
+        kind: PlotKind,
+        fmt: PlotFormat = "png",
+        max_points: int = PLOT_MAX_POINTS,
+    ) -> bytes:
+        """Cached image for `key`, rendering it from `load_frame()` on a miss.
+
+        `key` must identify the session's data (e.g. its fingerprint) as well
+        as `kind`, `fmt` and `max_points`. `load_frame` runs in a thread and
+        returns processed angles, or the raw readings for `gyro_calibration`.
+        """
+        image = self.cache.get(key)
+        if image is not None:
+            return image
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        loop = asyncio.get_running_loop()
+        pending = self._in_flight[key] = loop.create_future()
+        try:
+            frame = await asyncio.to_thread(load_frame)
+            biases = get_gyro_biases(frame) if kind == "gyro_calibration" else None
+            frame = prepare_plot_frame(frame, kind, max_points)
+            image = await loop.run_in_executor(
+                self.executor, render_plot, frame, kind, fmt, biases
+            )
+        except asyncio.CancelledError:
+            pending.cancel()
+            raise
+        except Exception as e:
+            pending.set_exception(e)
+            # retrieved here so a failure nobody else awaited is not logged
+            pending.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+        self.cache.put(key, image)
+        pending.set_result(image)
+        return image
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -1,12 +1,14 @@
 import numpy as np
 import datetime as dt
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from pathlib import Path
 
-GYRO_COLS_A = ["gx_A", "gy_A", "gz_A"]
-GYRO_COLS_B = ["gx_B", "gy_B", "gz_B"]
-ACCEL_COLS_A = ["ax_A", "ay_A", "az_A"]
-ACCEL_COLS_B = ["ax_B", "ay_B", "az_B"]
+from elbow_rehab.service.angle_calculation.settings import (
+    ACCEL_COLS_A,
+    ACCEL_COLS_B,
+    GYRO_COLS_A,
+    GYRO_COLS_B,
+)
 
 def get_file_path(df):
     session_time = df["session_time_iso"].iloc[0]
@@ -15,8 +17,9 @@ def get_file_path(df):
     return output_dir
 
 
-def plot_imu_readings(df, title_prefix="IMU"):
-    fig, axes = plt.subplots(2, 2, figsize=(16, 10), sharex=True)
+def imu_readings_figure(df, title_prefix="IMU") -> Figure:
+    fig = Figure(figsize=(16, 10))
+    axes = fig.subplots(2, 2, sharex=True)
     axes = axes.ravel()
 
     # Accelerometer – Sensor A
@@ -50,15 +53,18 @@ def plot_imu_readings(df, title_prefix="IMU"):
     axes[2].set_xlabel("Time")
     axes[3].set_xlabel("Time")
 
-    plt.tight_layout()
-    plt.suptitle("IMU reading over Time", fontsize=16)
-    plt.savefig(f"{get_file_path(df)}/raw_imu_readings.png")
-    plt.close(fig)
+    fig.tight_layout()
+    fig.suptitle("IMU reading over Time", fontsize=16)
+    return fig
 
 
+def plot_imu_readings(df, title_prefix="IMU"):
+    imu_readings_figure(df, title_prefix).savefig(f"{get_file_path(df)}/raw_imu_readings.png")
 
-def plot_gyro_calibration(df_before, df_after):
-    fig, axes = plt.subplots(3, 2, figsize=(14, 10), sharex=True, constrained_layout=True)
+
+def gyro_calibration_figure(df_before, df_after) -> Figure:
+    fig = Figure(figsize=(14, 10), constrained_layout=True)
+    axes = fig.subplots(3, 2, sharex=True)
     axes = axes.ravel()
 
     for i, col in enumerate(GYRO_COLS_A):
@@ -78,13 +84,19 @@ def plot_gyro_calibration(df_before, df_after):
         ax.set_ylabel("Gyro (rad/s)")
 
     axes[-1].set_xlabel("Timestamp")
-    plt.suptitle("Gyroscope Calibration Comparison (Raw vs Bias-Corrected)", fontsize=16)
-    plt.savefig(f"{get_file_path(df_after)}/gyro_calibration.png")
-    plt.close(fig)
-    
+    fig.suptitle("Gyroscope Calibration Comparison (Raw vs Bias-Corrected)", fontsize=16)
+    return fig
 
-def plot_angles(df):
-    fig, axes = plt.subplots(2, 1, figsize=(12, 6), sharex=True)
+
+def plot_gyro_calibration(df_before, df_after):
+    gyro_calibration_figure(df_before, df_after).savefig(
+        f"{get_file_path(df_after)}/gyro_calibration.png"
+    )
+
+
+def angles_figure(df) -> Figure:
+    fig = Figure(figsize=(12, 6))
+    axes = fig.subplots(2, 1, sharex=True)
 
     axes[0].plot(df.index, df["flexion_deg"], label="Flexion / Extension")
     axes[0].set_title("Flexion / Extension")
@@ -98,7 +110,10 @@ def plot_angles(df):
     axes[1].legend()
 
     fig.suptitle("Elbow Angles Over Time", fontsize=16)
-    plt.tight_layout()
-    plt.savefig(f"{get_file_path(df)}/angles.png")
-    plt.close(fig)
+    fig.tight_layout()
+    return fig
+
+
+def plot_angles(df):
+    angles_figure(df).savefig(f"{get_file_path(df)}/angles.png")
 
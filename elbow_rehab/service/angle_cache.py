@@ -0,0 +1,164 @@
+"""Cache of processed session angles keyed by a cheap session fingerprint.
+
+A finished session's angles only change when new readings arrive, so the
+key combines the session id with its row count and latest ``esp32_ms_A``
+plus the processing configuration. Results live in an in-memory LRU bounded
+by bytes, with an optional pickle tier on local disk.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from elbow_rehab.service.logger import get_logger
+
+logger = get_logger()
+
+ANGLE_CACHE_MAX_BYTES = int(os.getenv("ANGLE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+ANGLE_CACHE_DIR = os.getenv("ANGLE_CACHE_DIR")
+ANGLE_CACHE_MAX_DISK_BYTES = int(
+    os.getenv("ANGLE_CACHE_MAX_DISK_BYTES", str(2 * 1024 * 1024 * 1024))
+)
+
+
+@dataclass(frozen=True)
+class SessionFingerprint:
+    session_id: str
+    row_count: int
+    max_esp32_ms_A: int | None
+
+
+@dataclass(frozen=True)
+class AngleCacheKey:
+    fingerprint: SessionFingerprint
+    estimator_type: str
+    sample_rate: float
+    filter_type: str
+    resample: bool = False
+
+    def digest(self) -> str:
+        return hashlib.sha256(repr(self).encode()).hexdigest()
+
+
+class AngleResultCache:
+    """Two-tier (memory LRU + optional disk) cache of processed DataFrames.
+
+    Cached frames are shared between callers and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = ANGLE_CACHE_MAX_BYTES,
+        disk_dir: str | os.PathLike | None = ANGLE_CACHE_DIR,
+        max_disk_bytes: int = ANGLE_CACHE_MAX_DISK_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries: OrderedDict[AngleCacheKey, tuple[pd.DataFrame, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: AngleCacheKey) -> pd.DataFrame | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        df = self._read_disk(key)
+        with self._lock:
+            if df is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._put_memory(key, df)
+        return df
+
+    def put(self, key: AngleCacheKey, df: pd.DataFrame) -> None:
+        with self._lock:
+            self._put_memory(key, df)
+        self._write_disk(key, df)
+
+    def invalidate(self, session_id: str) -> None:
+        """Drop every in-memory entry for `session_id`."""
+        with self._lock:
+            for key in [k for k in self._entries if k.fingerprint.session_id == session_id]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _put_memory(self, key: AngleCacheKey, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (df, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def _disk_path(self, key: AngleCacheKey) -> Path:
+        return self.disk_dir / f"{key.digest()}.pkl"
+
+    def _read_disk(self, key: AngleCacheKey) -> pd.DataFrame | None:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            df = pd.read_pickle(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable angle cache file {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)
+        return df
+
+    def _write_disk(self, key: AngleCacheKey, df: pd.DataFrame) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        tmp = path.with_suffix(".tmp")
+        df.to_pickle(tmp)
+        os.replace(tmp, path)
+        self._trim_disk()
+
+    def _trim_disk(self) -> None:
+        files = sorted(self.disk_dir.glob("*.pkl"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for path in files:
+            if total <= self.max_disk_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
@@ -0,0 +1,169 @@
+"""Align the A and B sensor clocks and resample both onto one uniform timeline.
+
+Each uploaded row carries the latest sample of both boards with their own
+millisecond clocks (``esp32_ms_A``/``esp32_ms_B``), which are seconds apart
+and drift relative to each other. Rows are sent faster than the sensors
+update, so the same sample shows up in consecutive rows, and retried uploads
+repeat whole frames. `resample_streams` drops repeated frames, fits
+``esp32_ms_B ~ offset + drift * esp32_ms_A`` on the row pairs (rejecting
+glitched timestamps), and interpolates each sensor's distinct samples onto a
+grid of ``1000 / sample_rate`` ms on clock A, so filters get the dt they
+assume. Grid points inside a dropout (consecutive samples of a sensor more
+than `MAX_INTERPOLATION_GAP_MS` apart) are left out rather than filled with
+a straight line.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from elbow_rehab.service.angle_calculation.settings import (
+    ACCEL_COLS_A,
+    ACCEL_COLS_B,
+    DEFAULT_SAMPLE_RATE_HZ,
+    GYRO_COLS_A,
+    GYRO_COLS_B,
+)
+
+SENSOR_COLS_A = ACCEL_COLS_A + GYRO_COLS_A
+SENSOR_COLS_B = ACCEL_COLS_B + GYRO_COLS_B
+FRAME_COLUMNS = ["esp32_ms_A", "esp32_ms_B"] + SENSOR_COLS_A + SENSOR_COLS_B
+
+# Row pairs further than this from the fitted clock line are glitches
+MAX_CLOCK_RESIDUAL_MS = 250.0
+# Loose first pass, before drift is known
+_INITIAL_CLOCK_TOLERANCE_MS = 2000.0
+# The fitted drift is the relative rate of the two boards' millisecond
+# counters, not crystal error (tens of ppm): the counters run off clocks
+# that disagree by up to a few percent (0.9923, ~7700 ppm, on the sample
+# session). Fits further from 1 than this are glitches lining up, not clocks.
+_MAX_DRIFT_DEVIATION = 0.05
+# Distinct samples are normally <= ~60 ms apart; longer spans are dropouts
+MAX_INTERPOLATION_GAP_MS = 100.0
+
+
+@dataclass(frozen=True)
+class ClockAlignment:
+    """``esp32_ms_B = offset_ms + drift * esp32_ms_A`` for the row pairs that fit."""
+
+    offset_ms: float
+    drift: float
+    inliers: int
+    outliers: int
+
+    def a_to_b(self, ms_a):
+        return self.offset_ms + self.drift * np.asarray(ms_a, dtype=float)
+
+    def b_to_a(self, ms_b):
+        return (np.asarray(ms_b, dtype=float) - self.offset_ms) / self.drift
+
+
+def drop_duplicate_frames(df: pd.DataFrame) -> pd.DataFrame:
+    """`df` without rows repeating an earlier row's clocks and sensor values."""
+    return df[~df.duplicated(subset=FRAME_COLUMNS)]
+
+
+def _fit_clock_line(ms_a, ms_b, mask):
+    if np.ptp(ms_a[mask]) < 1.0:
+        return float(np.median(ms_b[mask] - ms_a[mask])), 1.0
+    drift, offset = np.polyfit(ms_a[mask], ms_b[mask], 1)
+    if abs(drift - 1.0) > _MAX_DRIFT_DEVIATION:
+        return float(np.median(ms_b[mask] - ms_a[mask])), 1.0
+    return float(offset), float(drift)
+
+
+def estimate_clock_alignment(
+    ms_a, ms_b, max_residual_ms: float = MAX_CLOCK_RESIDUAL_MS
+) -> ClockAlignment:
+    """Robust offset/drift of clock B against clock A from paired timestamps.
+
+    Raises ValueError if fewer than two row pairs agree on a clock line.
+    """
+    ms_a = np.asarray(ms_a, dtype=float)
+    ms_b = np.asarray(ms_b, dtype=float)
+    finite = np.isfinite(ms_a) & np.isfinite(ms_b)
+    if finite.sum() < 2:
+        raise ValueError("Need at least two timestamp pairs to align clocks")
+
+    difference = ms_b - ms_a
+    mask = finite & (
+        np.abs(difference - np.median(difference[finite])) <= _INITIAL_CLOCK_TOLERANCE_MS
+    )
+    for _ in range(2):
+        if mask.sum() < 2:
+            raise ValueError("Too few consistent timestamp pairs to align clocks")
+        offset, drift = _fit_clock_line(ms_a, ms_b, mask)
+        mask = finite & (np.abs(ms_b - (offset + drift * ms_a)) <= max_residual_ms)
+
+    return ClockAlignment(offset, drift, int(mask.sum()), int(len(ms_a) - mask.sum()))
+
+
+def _distinct_samples(times: np.ndarray, block: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """First sample per timestamp, in time order."""
+    times, first = np.unique(times, return_index=True)
+    return times, block[first]
+
+
+def _in_gap(times: np.ndarray, grid: np.ndarray, max_gap_ms: float) -> np.ndarray:
+    """Grid points strictly between two samples more than `max_gap_ms` apart."""
+    right = np.clip(np.searchsorted(times, grid, side="right"), 1, len(times) - 1)
+    left_time, right_time = times[right - 1], times[right]
+    return (right_time - left_time > max_gap_ms) & (grid > left_time) & (grid < right_time)
+
+
+def resample_streams(
+    df: pd.DataFrame,
+    sample_rate: float = DEFAULT_SAMPLE_RATE_HZ,
+    max_residual_ms: float = MAX_CLOCK_RESIDUAL_MS,
+    max_gap_ms: float = MAX_INTERPOLATION_GAP_MS,
+) -> tuple[pd.DataFrame, ClockAlignment | None]:
+    """Both sensors interpolated onto a uniform ``1000 / sample_rate`` ms grid.
+
+    The grid covers the span where both sensors have samples, on clock A,
+    minus the points inside either sensor's dropouts, so the output jumps
+    over a gap instead of inventing samples for it.
+    ``esp32_ms_B`` holds the matching clock-B time. Columns other than the
+    clocks and sensors keep the session's first value. Returns the frame and
+    the clock fit, or the de-duplicated frame and None when the clocks cannot
+    be aligned (e.g. too few samples).
+    """
+    df = drop_duplicate_frames(df)
+    ms_a = df["esp32_ms_A"].to_numpy(dtype=float)
+    ms_b = df["esp32_ms_B"].to_numpy(dtype=float)
+    try:
+        alignment = estimate_clock_alignment(ms_a, ms_b, max_residual_ms)
+    except ValueError:
+        return df, None
+
+    valid_b = np.abs(ms_b - alignment.a_to_b(ms_a)) <= max_residual_ms
+    valid_a = np.isfinite(ms_a)
+    times_a, block_a = _distinct_samples(
+        ms_a[valid_a], df[SENSOR_COLS_A].to_numpy(dtype=float)[valid_a]
+    )
+    times_b, block_b = _distinct_samples(
+        alignment.b_to_a(ms_b[valid_b]), df[SENSOR_COLS_B].to_numpy(dtype=float)[valid_b]
+    )
+
+    start, stop = max(times_a[0], times_b[0]), min(times_a[-1], times_b[-1])
+    if stop < start:
+        return df, None
+    step_ms = 1000.0 / sample_rate
+    grid = start + step_ms * np.arange(int((stop - start) // step_ms) + 1)
+    grid = grid[~(_in_gap(times_a, grid, max_gap_ms) | _in_gap(times_b, grid, max_gap_ms))]
+
+    columns = {
+        "esp32_ms_A": np.rint(grid).astype(np.int64),
+        "esp32_ms_B": np.rint(alignment.a_to_b(grid)).astype(np.int64),
+    }
+    for times, block, cols in ((times_a, block_a, SENSOR_COLS_A), (times_b, block_b, SENSOR_COLS_B)):
+        for i, col in enumerate(cols):
+            columns[col] = np.interp(grid, times, block[:, i])
+
+    resampled = pd.DataFrame(columns)
+    for col in df.columns:
+        if col not in columns:
+            resampled[col] = df[col].iloc[0]
+    return resampled[list(df.columns)], alignment
@@ -2,16 +2,31 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 from elbow_rehab.service.angle_calculation.filters.madgwick import MadgwickFilter
+from elbow_rehab.service.angle_calculation.filters.EKF import ExtendedKalmanFilter
+from elbow_rehab.service.angle_calculation.filters.filter_bank import MadgwickFilterBank
+from elbow_rehab.service.angle_calculation.filters.base_filter import (
+    quaternions_to_rotation_matrices,
+)
 from elbow_rehab.service.angle_calculation.estimator import (
     AlignmentFreeElbowEstimator,
     SimpleElbowEstimator,
 )
-from elbow_rehab.service.angle_calculation.settings import DEFAULT_SAMPLE_RATE_HZ, DEFAULT_ESTIMATOR
+from elbow_rehab.service.angle_calculation.settings import (
+    DEFAULT_SAMPLE_RATE_HZ,
+    DEFAULT_ESTIMATOR,
+    DEFAULT_FILTER,
+    ACCEL_COLS_A,
+    ACCEL_COLS_B,
+    GYRO_COLS_A,
+    GYRO_COLS_B,
+)
 from elbow_rehab.service.angle_calculation.calibration import calibrate_gyro
-from elbow_rehab.service.analytics.raw_data_plots import get_file_path, plot_angles
+from elbow_rehab.service.angle_calculation.alignment import resample_streams
 
 
-def get_filter(sample_rate) -> MadgwickFilter:
+def get_filter(sample_rate, filter_type=DEFAULT_FILTER) -> MadgwickFilter | ExtendedKalmanFilter:
+    if filter_type == "ekf":
+        return ExtendedKalmanFilter(frequency=sample_rate)
     filter = MadgwickFilter(frequency=sample_rate)
     return filter
 
@@ -33,21 +48,25 @@ def normalize_ps(angle_deg: float) -> float:
     return (angle_deg + 180) % 360 - 180
 
 
-def process_session_angles(
-    session_df: pd.DataFrame,
+def sensor_block(df: pd.DataFrame, cols) -> np.ndarray:
+    """Pull three sensor columns out once as a contiguous (N, 3) float array."""
+    return np.ascontiguousarray(df[cols].to_numpy(dtype=np.float64))
+
+
+def calculate_angles_rowwise(
+    calibrated_session_df: pd.DataFrame,
     estimator_type=DEFAULT_ESTIMATOR,
     sample_rate=DEFAULT_SAMPLE_RATE_HZ,
+    filter_type=DEFAULT_FILTER,
 ):
-    filter_a = get_filter(sample_rate)
-    filter_b = get_filter(sample_rate)
+    """Reference per-row implementation; returns (flexions, pronations)."""
+    filter_a = get_filter(sample_rate, filter_type)
+    filter_b = get_filter(sample_rate, filter_type)
     estimator = get_estimator(estimator_type, sample_rate)
 
     flexions = []
     pronations = []
 
-    # Calibrate Gyroscope
-    calibrated_session_df = calibrate_gyro(session_df)
-
     # Iterate through rows (must be sorted by timestamp)
     # Assuming session_df is sorted by esp32_ms_A or a similar index
     for _, row in calibrated_session_df.iterrows():
@@ -67,11 +86,134 @@ def process_session_angles(
         flexions.append(normalize_fe(flex))
         pronations.append(normalize_ps(pron))
 
-    calibrated_session_df["flexion_deg"] = flexions
-    calibrated_session_df["pronation_deg"] = pronations
-    path = f"{get_file_path(calibrated_session_df)}/angles_by_session.csv"
-    calibrated_session_df.to_csv(path, index=False)
-    
-    plot_angles(calibrated_session_df)
+    return np.array(flexions, dtype=float), np.array(pronations, dtype=float)
+
+
+def calculate_angles_columnar(
+    calibrated_session_df: pd.DataFrame,
+    estimator_type=DEFAULT_ESTIMATOR,
+    sample_rate=DEFAULT_SAMPLE_RATE_HZ,
+    filter_type=DEFAULT_FILTER,
+):
+    """Whole-session implementation; returns (flexions, pronations).
+
+    Only the recursive filters (and the alignment-free estimator) step sample
+    by sample; every other stage runs once over the full (N, ...) arrays.
+    """
+    acc_a = sensor_block(calibrated_session_df, ACCEL_COLS_A)
+    gyro_a = sensor_block(calibrated_session_df, GYRO_COLS_A)
+    acc_b = sensor_block(calibrated_session_df, ACCEL_COLS_B)
+    gyro_b = sensor_block(calibrated_session_df, GYRO_COLS_B)
+
+    quats_a = get_filter(sample_rate, filter_type).run(acc_a, gyro_a)
+    quats_b = get_filter(sample_rate, filter_type).run(acc_b, gyro_b)
+
+    return estimate_angles(
+        quats_a, gyro_a, quats_b, gyro_b, estimator_type, sample_rate
+    )
+
+
+def estimate_angles(
+    quats_a,
+    gyro_a,
+    quats_b,
+    gyro_b,
+    estimator_type=DEFAULT_ESTIMATOR,
+    sample_rate=DEFAULT_SAMPLE_RATE_HZ,
+    estimator=None,
+):
+    """Run the estimator over (N, 4) filter outputs; returns normalized (flexions, pronations).
+
+    Pass `estimator` to continue from an existing (e.g. checkpointed) instance.
+    """
+    if estimator is None:
+        estimator = get_estimator(estimator_type, sample_rate)
+    if isinstance(estimator, SimpleElbowEstimator):
+        flexions, pronations = estimator.angles_from_quaternions(quats_a, quats_b)
+    else:
+        R_A = quaternions_to_rotation_matrices(quats_a)
+        R_B = quaternions_to_rotation_matrices(quats_b)
+        flexions = np.empty(len(R_A), dtype=float)
+        pronations = np.empty(len(R_A), dtype=float)
+        for idx in range(len(R_A)):
+            flexions[idx], pronations[idx] = estimator.update_angles(
+                R_A[idx], gyro_a[idx], R_B[idx], gyro_b[idx]
+            )
 
-    return calibrated_session_df
+    return normalize_fe(flexions), normalize_ps(pronations)
+
+
+def calculate_sessions_angles_bank(
+    calibrated_session_dfs: list[pd.DataFrame],
+    estimator_type=DEFAULT_ESTIMATOR,
+    sample_rate=DEFAULT_SAMPLE_RATE_HZ,
+):
+    """Filter K sessions together in one 2K-wide Madgwick bank.
+
+    Sensors A and B of session k are streams 2k and 2k + 1. Returns one
+    (flexions, pronations) pair per session. The bank pays off from roughly
+    ten streams up; a single session is faster through `run()` per sensor.
+    """
+    acc_streams, gyro_streams = [], []
+    for df in calibrated_session_dfs:
+        acc_streams += [sensor_block(df, ACCEL_COLS_A), sensor_block(df, ACCEL_COLS_B)]
+        gyro_streams += [sensor_block(df, GYRO_COLS_A), sensor_block(df, GYRO_COLS_B)]
+
+    bank = MadgwickFilterBank(sample_rate, streams=len(acc_streams))
+    quats = bank.run(acc_streams, gyro_streams)
+
+    return [
+        estimate_angles(
+            quats[2 * k],
+            gyro_streams[2 * k],
+            quats[2 * k + 1],
+            gyro_streams[2 * k + 1],
+            estimator_type,
+            sample_rate,
+        )
+        for k in range(len(calibrated_session_dfs))
+    ]
+
+
+def process_session_angles(
+    session_df: pd.DataFrame,
+    estimator_type=DEFAULT_ESTIMATOR,
+    sample_rate=DEFAULT_SAMPLE_RATE_HZ,
+    columnar=True,
+    filter_type=DEFAULT_FILTER,
+    resample=False,
+):
+    if resample:
+        # Align the A/B clocks and put both sensors on a uniform sample_rate grid
+        session_df, _ = resample_streams(session_df, sample_rate)
+
+    # Calibrate Gyroscope
+    calibrated_session_df = calibrate_gyro(session_df)
+
+    calculate = calculate_angles_columnar if columnar else calculate_angles_rowwise
+    flexions, pronations = calculate(
+        calibrated_session_df, estimator_type, sample_rate, filter_type
+    )
+
+    return attach_angles(calibrated_session_df, flexions, pronations)
+
+
+def process_sessions_angles(
+    session_dfs: list[pd.DataFrame],
+    estimator_type=DEFAULT_ESTIMATOR,
+    sample_rate=DEFAULT_SAMPLE_RATE_HZ,
+):
+    """Batch variant of `process_session_angles` advancing all sessions in lockstep."""
+    calibrated_session_dfs = [calibrate_gyro(df) for df in session_dfs]
+    angles = calculate_sessions_angles_bank(
+        calibrated_session_dfs, estimator_type, sample_rate
+    )
+    return [
+        attach_angles(df, flexions, pronations)
+        for df, (flexions, pronations) in zip(calibrated_session_dfs, angles)
+    ]
+
+
+def attach_angles(calibrated_session_df, flexions, pronations):
+    # Figures are rendered on demand by analytics.plot_service
+    return calibrated_session_df.assign(flexion_deg=flexions, pronation_deg=pronations)
@@ -1,44 +1,138 @@
-"""Zero-pose calibration helpers."""
+"""Zero-pose calibration helpers.
+
+The gyro bias is the mean gyro reading over the stillest `window` samples
+among the first `search_frames` of a session. Stillness is scored with O(N)
+rolling variances (cumulative sums) of the gyro and accelerometer magnitudes
+of both sensors, so a patient moving during the first seconds no longer
+skews the bias.
+"""
 
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass
-from .settings import DEFAULT_CALIBRATION_DURATION_FRAMES
-from elbow_rehab.service.analytics.raw_data_plots import plot_imu_readings, plot_gyro_calibration
-
-
-def get_gyro_bias(df, gyro_cols, stationary_window):
-    if not isinstance(stationary_window, int):
-        print("Incorrect stationary_window provided using default") 
-        stationary_window = DEFAULT_CALIBRATION_DURATION_FRAMES
-    calib_data = df.iloc[:stationary_window][gyro_cols]
-
-    bias = calib_data.mean()
-    return bias
+import warnings
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .settings import (
+    ACCEL_COLS_A,
+    ACCEL_COLS_B,
+    DEFAULT_CALIBRATION_DURATION_FRAMES,
+    DEFAULT_CALIBRATION_SEARCH_FRAMES,
+    GYRO_COLS_A,
+    GYRO_COLS_B,
+)
+
+
+@dataclass(frozen=True)
+class GyroCalibration:
+    """Per-column gyro biases and the rows [start, stop) they were measured on."""
+
+    biases: dict[str, float] = field(hash=False)
+    start: int
+    stop: int
+
+
+def _window_sums(x: np.ndarray, window: int) -> np.ndarray:
+    """Sums over every `window` consecutive rows of `x`."""
+    sums = np.cumsum(x, axis=0)
+    sums = np.concatenate([np.zeros((1,) + x.shape[1:]), sums])
+    return sums[window:] - sums[:-window]
+
+
+def stationary_scores(gyro_a, gyro_b, acc_a, acc_b, window: int) -> np.ndarray:
+    """Motion score of the window starting at each row (lower is stiller).
+
+    The rolling variances of the four magnitudes are each scaled by their
+    median, so gyro (rad/s) and accelerometer (m/s^2) weigh alike. Windows
+    that contain NaN samples score +inf.
+    """
+    magnitudes = np.column_stack(
+        [np.linalg.norm(block, axis=1) for block in (gyro_a, gyro_b, acc_a, acc_b)]
+    )
+    invalid = _window_sums(np.isnan(magnitudes).any(axis=1).astype(float), window) > 0
+    # centring keeps E[x^2] - E[x]^2 accurate
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        magnitudes = np.nan_to_num(magnitudes - np.nanmean(magnitudes, axis=0))
+
+    mean = _window_sums(magnitudes, window) / window
+    variance = np.maximum(_window_sums(magnitudes**2, window) / window - mean**2, 0.0)
+    scale = np.median(variance, axis=0)
+    scores = (variance / np.where(scale > 0, scale, 1.0)).sum(axis=1)
+    scores[invalid] = np.inf
+    return scores
+
+
+def calibrate_gyro_blocks(
+    gyro_a: np.ndarray,
+    gyro_b: np.ndarray,
+    acc_a: np.ndarray,
+    acc_b: np.ndarray,
+    window: int = DEFAULT_CALIBRATION_DURATION_FRAMES,
+    search_frames: int | None = DEFAULT_CALIBRATION_SEARCH_FRAMES,
+) -> GyroCalibration:
+    """Gyro biases from the stillest window of (N, 3) sensor blocks.
+
+    Only the first `search_frames` rows are searched (None searches them all);
+    shorter inputs are averaged whole.
+    """
+    n = len(gyro_a) if search_frames is None else min(len(gyro_a), search_frames)
+    start, stop = 0, n
+    if n > window:
+        scores = stationary_scores(gyro_a[:n], gyro_b[:n], acc_a[:n], acc_b[:n], window)
+        start = int(np.argmin(scores)) if np.isfinite(scores).any() else 0
+        stop = start + window
+
+    biases = {}
+    for block, cols in ((gyro_a, GYRO_COLS_A), (gyro_b, GYRO_COLS_B)):
+        with warnings.catch_warnings():
+            # an all-NaN column gives a NaN bias, like pandas' mean()
+            warnings.simplefilter("ignore", RuntimeWarning)
+            bias = np.nanmean(block[start:stop], axis=0)
+        biases.update({col: float(value) for col, value in zip(cols, bias)})
+    return GyroCalibration(biases, start, stop)
+
+
+def find_gyro_calibration(
+    df,
+    window=DEFAULT_CALIBRATION_DURATION_FRAMES,
+    search_frames=DEFAULT_CALIBRATION_SEARCH_FRAMES,
+) -> GyroCalibration:
+    """`calibrate_gyro_blocks` over the sensor columns of `df` (nothing else is copied)."""
+    if not isinstance(window, int) or window < 1:
+        raise ValueError(f"Calibration window must be a positive int, got {window!r}")
+    blocks = [
+        df[cols].to_numpy(dtype=np.float64)
+        for cols in (GYRO_COLS_A, GYRO_COLS_B, ACCEL_COLS_A, ACCEL_COLS_B)
+    ]
+    return calibrate_gyro_blocks(*blocks, window=window, search_frames=search_frames)
+
+
+def get_gyro_biases(
+    df,
+    window=DEFAULT_CALIBRATION_DURATION_FRAMES,
+    search_frames=DEFAULT_CALIBRATION_SEARCH_FRAMES,
+) -> dict[str, float]:
+    """Per-column gyro bias of both sensors, as stored in angle checkpoints."""
+    return find_gyro_calibration(df, window, search_frames).biases
+
+
+def subtract_gyro_biases(block: np.ndarray, gyro_cols, biases: dict[str, float]) -> np.ndarray:
+    """Remove the biases of `gyro_cols` from an (N, 3) gyro block in place."""
+    block -= np.array([biases[col] for col in gyro_cols])
+    return block
+
+
+def apply_gyro_biases(df, biases: dict[str, float]):
+    """`df` with `get_gyro_biases()` output subtracted (a new frame)."""
+    return df.assign(**{col: df[col] - bias for col, bias in biases.items()})
 
 
 def calibrate_gyro(df, window=DEFAULT_CALIBRATION_DURATION_FRAMES):
-    gyro_cols_A = ["gx_A", "gy_A", "gz_A"]
-    gyro_cols_B = ["gx_B", "gy_B", "gz_B"]
-    accel_cols_A = ["ax_A", "ay_A", "az_A"]
-    accel_cols_B = ["ax_B", "ay_B", "az_B"]
-
-    calibrated_df = df.copy()
-
-    # Calibrate sensor A
-    bias_df = get_gyro_bias(df, gyro_cols_A, window)
-    for col in gyro_cols_A:
-        calibrated_df[col] = df[col] - bias_df[col]
-
-    # Calibrate sensor B
-    bias_df = get_gyro_bias(df, gyro_cols_B, window)
-    for col in gyro_cols_B:
-        calibrated_df[col] = df[col] - bias_df[col]
-
-    plot_imu_readings(calibrated_df)
-    plot_gyro_calibration(df, calibrated_df)
-    return calibrated_df
+    # Figures are rendered on demand by analytics.plot_service
+    return apply_gyro_biases(df, get_gyro_biases(df, window))
 
 # @dataclass
 # class CalibrationResult:
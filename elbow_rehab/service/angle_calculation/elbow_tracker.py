@@ -1,39 +1,146 @@
-"""Coordinate two IMU sensors and log elbow joint angles."""
+"""Coordinate two live IMU sensors into elbow joint angles."""
 
 from __future__ import annotations
 
-import csv
-import datetime as dt
-from pathlib import Path
-from typing import Callable, Dict
+from collections import deque
+from dataclasses import dataclass
+from typing import Literal, Optional, Sequence
+
 import numpy as np
 
-from elbow_rehab.service.angle_calculation.estimator import AlignmentFreeElbowEstimator
-from imu import IMUSensor, SensorSnapshot
+from elbow_rehab.service.angle_calculation.calculations import (
+    get_estimator,
+    normalize_fe,
+    normalize_ps,
+)
+from elbow_rehab.service.angle_calculation.calibration import calibrate_gyro_blocks
+from elbow_rehab.service.angle_calculation.imu import IMUSensor
+from elbow_rehab.service.angle_calculation.settings import (
+    DEFAULT_CALIBRATION_DURATION_FRAMES,
+    DEFAULT_ESTIMATOR,
+    GYRO_COLS_A,
+    GYRO_COLS_B,
+)
+
+SensorLabel = Literal["A", "B"]
+
+
+@dataclass(frozen=True)
+class LiveAngles:
+    timestamp_ms: int  # sensor A clock
+    flexion_deg: float
+    pronation_deg: float
 
 
 class ElbowTracker:
-    """Manage sensor updates"""
+    """Turn interleaved A/B samples into FE/PS angles, one per A/B pair.
+
+    The first `calibration_frames` samples of each sensor are held back
+    while the patient keeps still; once both sensors have them, the gyro
+    bias is measured on them and the held samples are replayed through the
+    filters, so no sample is filtered without the bias removed. While one
+    sensor is missing, only the latest `calibration_frames` samples of the
+    other are kept, so a silent board cannot grow the buffer.
+    """
 
     def __init__(
         self,
         imuA: IMUSensor,
         imuB: IMUSensor,
         sample_rate_hz: float,
+        estimator_type: str = DEFAULT_ESTIMATOR,
+        calibration_frames: int = DEFAULT_CALIBRATION_DURATION_FRAMES,
     ) -> None:
         self.imuA = imuA
-        self.imuA = imuB
-        self.estimator = AlignmentFreeElbowEstimator(sample_rate_hz=sample_rate_hz)
+        self.imuB = imuB
+        self.sensors = {"A": imuA, "B": imuB}
+        self.estimator = get_estimator(estimator_type, sample_rate_hz)
+        self.calibration_frames = calibration_frames
 
-    def update(self) -> None:
+        # (sensor, t, acc, gyr) per sensor, oldest dropped first
+        self._held: Optional[dict[str, deque]] = {
+            label: deque(maxlen=max(1, calibration_frames)) for label in self.sensors
+        }
+        self._fresh = {"A": False, "B": False}
+        # A/B pairs turned into angles so far, including replayed ones
+        self.pairs = 0
+
+    @property
+    def calibrating(self) -> bool:
+        return self._held is not None
+
+    @property
+    def calibration_progress(self) -> float:
+        if self._held is None:
+            return 1.0
+        return min(len(held) for held in self._held.values()) / max(1, self.calibration_frames)
+
+    def add_sample(
+        self,
+        sensor: SensorLabel,
+        timestamp_ms: int,
+        acc_m_s2: Sequence[float],
+        gyr_rad_s: Sequence[float],
+    ) -> Optional[LiveAngles]:
+        """Feed one sample; returns the angles when it completes an A/B pair."""
+        if sensor not in self.sensors:
+            raise ValueError(f"Unknown sensor: {sensor}")
+        if self._held is None:
+            return self._step(sensor, timestamp_ms, acc_m_s2, gyr_rad_s)
+
+        self._held[sensor].append((sensor, timestamp_ms, acc_m_s2, gyr_rad_s))
+        if min(len(held) for held in self._held.values()) < self.calibration_frames:
+            return None
+        return self._finish_calibration()
+
+    def _finish_calibration(self) -> Optional[LiveAngles]:
+        held, self._held = self._held, None
+        blocks = {}
+        for label, samples in held.items():
+            blocks[f"acc_{label}"] = np.array([s[2] for s in samples], dtype=float)
+            blocks[f"gyro_{label}"] = np.array([s[3] for s in samples], dtype=float)
+        calibration = calibrate_gyro_blocks(
+            blocks["gyro_A"],
+            blocks["gyro_B"],
+            blocks["acc_A"],
+            blocks["acc_B"],
+            window=self.calibration_frames,
+            search_frames=None,
+        )
+        self.imuA.gyro_bias = np.array([calibration.biases[col] for col in GYRO_COLS_A])
+        self.imuB.gyro_bias = np.array([calibration.biases[col] for col in GYRO_COLS_B])
+
+        # both sensors hold the same number of samples: replay them as pairs
+        latest = None
+        for sample_a, sample_b in zip(held["A"], held["B"]):
+            self._step(*sample_a)
+            latest = self._step(*sample_b) or latest
+        return latest
+
+    def _step(self, sensor, timestamp_ms, acc_m_s2, gyr_rad_s) -> Optional[LiveAngles]:
+        self.sensors[sensor].update(timestamp_ms, acc_m_s2, gyr_rad_s)
+        self._fresh[sensor] = True
+        if not (self._fresh["A"] and self._fresh["B"]):
+            return None
+        self._fresh = {"A": False, "B": False}
+        self.pairs += 1
+        return self.update()
+
+    def update(self) -> Optional[LiveAngles]:
+        """Angles from the latest orientation of both sensors, if both have one."""
         sensor_a = self.sensors["A"]
         sensor_b = self.sensors["B"]
+        if not (sensor_a.is_ready and sensor_b.is_ready):
+            return None
 
-        fe_deg, ps_deg = self.estimator.update(
+        fe_deg, ps_deg = self.estimator.update_angles(
             sensor_a.latest_rotation,
             sensor_a.latest_gyro_rad,
             sensor_b.latest_rotation,
             sensor_b.latest_gyro_rad,
         )
-
-        print(f"FE {fe_deg:7.2f}°, PS {ps_deg:7.2f}°")
+        return LiveAngles(
+            timestamp_ms=sensor_a.latest_snapshot.timestamp_ms,
+            flexion_deg=float(normalize_fe(fe_deg)),
+            pronation_deg=float(normalize_ps(ps_deg)),
+        )
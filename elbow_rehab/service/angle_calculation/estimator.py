@@ -3,11 +3,20 @@
 from __future__ import annotations
 import numpy as np
 from scipy.spatial.transform import Rotation as R
+from elbow_rehab.service.angle_calculation.filters.base_filter import relative_quaternions
+from elbow_rehab.service.angle_calculation.smoothing import rolling_median
 
 class SimpleElbowEstimator:
     def __init__(self, sample_rate_hz: float = 100.0):
         pass
 
+    def get_state(self) -> dict:
+        """The simple estimator is stateless; kept for a uniform checkpoint API."""
+        return {}
+
+    def set_state(self, state: dict) -> None:
+        pass
+
     def rpy_to_matrix(self, roll, pitch, yaw):
         """Convert roll, pitch, yaw to a 3×3 rotation matrix."""
         return R.from_euler("xyz", [roll, pitch, yaw], degrees=True).as_matrix()
@@ -22,12 +31,7 @@ class SimpleElbowEstimator:
 
 
     def median_smooth(self, series, window=10):
-        smoothed = []
-        for idx in range(len(series)):
-            start = max(0, idx - window + 1)
-            window_values = series[start : idx + 1]
-            smoothed.append(float(np.median(np.sort(window_values))))
-        return np.array(smoothed, dtype=float)
+        return rolling_median(series, window)
 
 
     def orthonormalize(self, Rm):
@@ -58,6 +62,25 @@ class SimpleElbowEstimator:
         pronation = np.degrees(np.arctan2(R_rel[1, 0], R_rel[0, 0]))
         return flexion, pronation
 
+    def angles_from_quaternions(self, quats_A: np.ndarray, quats_B: np.ndarray):
+        """
+        Vectorised `update_angles` straight from (N, 4) `[w, x, y, z]` histories.
+        Only the matrix entries the angles need are formed from the relative
+        quaternion; the common |q|² scale cancels inside arctan2.
+        """
+        q_rel = relative_quaternions(quats_A, quats_B)
+        w, x, y, z = q_rel[:, 0], q_rel[:, 1], q_rel[:, 2], q_rel[:, 3]
+        flexion = np.degrees(np.arctan2(2 * (y * z + x * w), -x * x - y * y + z * z + w * w))
+        pronation = np.degrees(np.arctan2(2 * (x * y + z * w), x * x - y * y - z * z + w * w))
+        return flexion, pronation
+
+    def update_angles_batch(self, R_A: np.ndarray, R_B: np.ndarray):
+        """Vectorised `update_angles` over (N, 3, 3) orientation stacks."""
+        R_rel = np.matmul(np.swapaxes(R_A, -1, -2), R_B)
+        flexion = np.degrees(np.arctan2(R_rel[:, 2, 1], R_rel[:, 2, 2]))
+        pronation = np.degrees(np.arctan2(R_rel[:, 1, 0], R_rel[:, 0, 0]))
+        return flexion, pronation
+
 
 # Alignment-free, self-calibrating elbow FE/PS angles (Müller et al., 2016)
 # - Real-time axis estimation via gradient descent on the windowed cost
@@ -164,6 +187,36 @@ class AlignmentFreeElbowEstimator:
         self.beta0 = 0.0
         self.has_zero = False
 
+    # --------------- Checkpointing ---------------
+
+    def get_state(self) -> dict:
+        """JSON-serialisable snapshot of the adaptive state (axes, cost, zero pose)."""
+        return {
+            "theta_a": float(self.theta_a),
+            "rho_a": float(self.rho_a),
+            "theta_b": float(self.theta_b),
+            "rho_b": float(self.rho_b),
+            "err_window": [float(e) for e in self.err_window],
+            "cost_lp": float(self.cost_lp),
+            "converged": bool(self.converged),
+            "alpha0": float(self.alpha0),
+            "beta0": float(self.beta0),
+            "has_zero": bool(self.has_zero),
+        }
+
+    def set_state(self, state: dict) -> None:
+        """Resume from a `get_state()` snapshot."""
+        self.theta_a = state["theta_a"]
+        self.rho_a = state["rho_a"]
+        self.theta_b = state["theta_b"]
+        self.rho_b = state["rho_b"]
+        self.err_window = list(state["err_window"])
+        self.cost_lp = state["cost_lp"]
+        self.converged = state["converged"]
+        self.alpha0 = state["alpha0"]
+        self.beta0 = state["beta0"]
+        self.has_zero = state["has_zero"]
+
     # --------------- Helpers to compute quantities at one timestep ---------------
 
     def current_axes(self) -> tuple[np.ndarray, np.ndarray]:
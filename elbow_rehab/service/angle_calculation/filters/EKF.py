@@ -2,76 +2,67 @@
 
 from __future__ import annotations
 
+import math
+
 import numpy as np
 from numpy.typing import ArrayLike, NDArray
-from scipy.spatial.transform import Rotation
 
-from filters.base_filter import BaseFilter
+from .base_filter import BaseFilter
 
 _FLOAT_EPS: float = 1e-9
-_GRAVITY_BODY_Z: NDArray[np.float64] = np.array([0.0, 0.0, 1.0], dtype=np.float64)
-
-
-def _skew(vector: NDArray[np.float64]) -> NDArray[np.float64]:
-    """Return the skew-symmetric matrix associated with `vector × x`."""
-
-    x, y, z = vector
-    return np.array(
-        [
-            [0.0, -z, y],
-            [z, 0.0, -x],
-            [-y, x, 0.0],
-        ],
-        dtype=np.float64,
-    )
 
 
-def _quat_multiply(
-    q_left: NDArray[np.float64], q_right: NDArray[np.float64]
-) -> NDArray[np.float64]:
+def _quat_multiply(q_left, q_right) -> tuple[float, float, float, float]:
     """Hamilton product of two `[w, x, y, z]` quaternions."""
 
     w1, x1, y1, z1 = q_left
     w2, x2, y2, z2 = q_right
-    return np.array(
-        [
-            w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
-            w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
-            w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
-            w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
-        ],
-        dtype=np.float64,
+    return (
+        w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+        w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+        w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+        w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
     )
 
 
-def _small_angle_quaternion(delta_theta: NDArray[np.float64]) -> NDArray[np.float64]:
+def _small_angle_quaternion(delta_theta) -> tuple[float, float, float, float]:
     """Map a small rotation vector to a unit quaternion."""
 
-    angle = np.linalg.norm(delta_theta)
+    dx, dy, dz = delta_theta
+    angle = math.sqrt(dx * dx + dy * dy + dz * dz)
     if angle < _FLOAT_EPS:
-        return np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float64)
-    axis = delta_theta / angle
+        return (1.0, 0.0, 0.0, 0.0)
     half = 0.5 * angle
-    return np.array(
-        [np.cos(half), *(np.sin(half) * axis)],
-        dtype=np.float64,
-    )
+    scale = math.sin(half) / angle
+    return (math.cos(half), dx * scale, dy * scale, dz * scale)
 
 
-def _normalize_quaternion(quaternion: NDArray[np.float64]) -> NDArray[np.float64]:
+def _normalize_quaternion(quaternion) -> tuple[float, float, float, float]:
     """Ensure a quaternion remains on the unit sphere."""
 
-    norm = np.linalg.norm(quaternion)
+    w, x, y, z = quaternion
+    norm = math.sqrt(w * w + x * x + y * y + z * z)
     if norm < _FLOAT_EPS:
-        return np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float64)
-    return quaternion / norm
+        return (1.0, 0.0, 0.0, 0.0)
+    return (w / norm, x / norm, y / norm, z / norm)
 
 
-def _wxyz_to_xyzw(quaternion: NDArray[np.float64]) -> NDArray[np.float64]:
-    """Convert `[w, x, y, z]` to SciPy's `[x, y, z, w]` ordering."""
+def _invert_symmetric_3x3(m) -> list[list[float]]:
+    """Closed-form inverse of a symmetric positive-definite 3x3 matrix."""
 
-    w, x, y, z = quaternion
-    return np.array([x, y, z, w], dtype=np.float64)
+    (a, b, c), (_, d, e), (_, _, f) = m
+    c00 = d * f - e * e
+    c01 = c * e - b * f
+    c02 = b * e - c * d
+    c11 = a * f - c * c
+    c12 = b * c - a * e
+    c22 = a * d - b * b
+    det = a * c00 + b * c01 + c * c02
+    return [
+        [c00 / det, c01 / det, c02 / det],
+        [c01 / det, c11 / det, c12 / det],
+        [c02 / det, c12 / det, c22 / det],
+    ]
 
 
 class ExtendedKalmanFilter(BaseFilter):
@@ -96,8 +87,36 @@ class ExtendedKalmanFilter(BaseFilter):
         self.acc_noise = float(acc_noise)
 
         self._set_initial_covariance(initial_covariance)
+        self._precompute()
         self.reset()
 
+    def _precompute(self) -> None:
+        """Build the matrices that only depend on `dt` and the noise terms.
+
+        The per-sample steps then only fill the omega-dependent block of the
+        transition and the measurement Jacobian inside these buffers.
+        """
+
+        dt = self.dt
+        identity3 = np.eye(3, dtype=np.float64)
+
+        self._process_noise = np.zeros((6, 6), dtype=np.float64)
+        self._process_noise[0:3, 0:3] = (self.gyro_noise**2) * dt * identity3
+        self._process_noise[3:6, 3:6] = (self.bias_rw**2) * dt * identity3
+        self._accel_var = self.acc_noise**2
+        self._accel_cov = self._accel_var * identity3
+
+        # Transition I + F dt; only the top-left block depends on omega.
+        self._transition = np.eye(6, dtype=np.float64)
+        self._transition[0:3, 3:6] = -identity3 * dt
+        self._transition_t = self._transition.T
+
+        # Measurement Jacobian H = [-[g]x, 0]; only the first block is non-zero.
+        self._h = np.zeros((3, 3), dtype=np.float64)
+        self._ph_t = np.empty((6, 3), dtype=np.float64)
+        self._innovation_cov = np.empty((3, 3), dtype=np.float64)
+        self._scratch = np.empty((6, 6), dtype=np.float64)
+
     def _set_initial_covariance(self, covariance: NDArray[np.float64] | None) -> None:
         if covariance is None:
             self._covariance_template = np.eye(6, dtype=np.float64) * 0.01
@@ -119,7 +138,7 @@ class ExtendedKalmanFilter(BaseFilter):
             quat = np.asarray(quaternion, dtype=np.float64).reshape(-1)
             if quat.size != 4:
                 raise ValueError("Quaternion must have four components.")
-            self.quaternion = _normalize_quaternion(quat)
+            self.quaternion = np.array(_normalize_quaternion(quat), dtype=np.float64)
 
         if bias is None:
             self._bias = np.zeros(3, dtype=np.float64)
@@ -139,76 +158,138 @@ class ExtendedKalmanFilter(BaseFilter):
         if acc.size != 3 or gyro.size != 3:
             raise ValueError("Expected 3-element accelerometer and gyroscope vectors.")
 
-        self._predict(gyro, self.dt)
-        self._update_with_acc(acc)
-        self.normalize_quaternion()
+        quaternion, bias = self._step(
+            tuple(self.quaternion.tolist()), self._bias.tolist(), acc.tolist(), gyro.tolist()
+        )
+        self.quaternion = np.array(quaternion, dtype=np.float64)
+        self._bias = np.array(bias, dtype=np.float64)
         return self.quaternion
 
-    def _predict(self, gyro_rad_s: NDArray[np.float64], dt: float) -> None:
-        omega = gyro_rad_s - self._bias
-        w, x, y, z = self.quaternion
-        wx, wy, wz = omega
-        q_dot = 0.5 * np.array(
-            [
-                -x * wx - y * wy - z * wz,
-                w * wx + y * wz - z * wy,
-                w * wy - x * wz + z * wx,
-                w * wz + x * wy - y * wx,
-            ],
-            dtype=np.float64,
-        )
-        self.quaternion = _normalize_quaternion(self.quaternion + q_dot * dt)
-
-        f_matrix = np.zeros((6, 6), dtype=np.float64)
-        f_matrix[0:3, 0:3] = -_skew(omega)
-        f_matrix[0:3, 3:6] = -np.eye(3, dtype=np.float64)
-
-        transition = np.eye(6, dtype=np.float64) + f_matrix * dt
-        gyro_noise = (self.gyro_noise**2) * dt * np.eye(3, dtype=np.float64)
-        bias_noise = (self.bias_rw**2) * dt * np.eye(3, dtype=np.float64)
-        process_noise = np.block(
-            [
-                [gyro_noise, np.zeros((3, 3), dtype=np.float64)],
-                [np.zeros((3, 3), dtype=np.float64), bias_noise],
-            ]
+    def run(
+        self, acc_data: ArrayLike, gyro_data: ArrayLike, *, return_bias: bool = False
+    ) -> NDArray[np.float64] | tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """Filter a whole (N, 3) session.
+
+        Returns the (N, 4) quaternion history, or `(quaternions, biases)` with
+        the (N, 3) gyroscope bias history when `return_bias` is set.
+        """
+
+        acc = np.asarray(acc_data, dtype=np.float64).reshape(-1, 3)
+        gyro = np.asarray(gyro_data, dtype=np.float64).reshape(-1, 3)
+        if acc.shape != gyro.shape:
+            raise ValueError("acc and gyro must have the same number of samples.")
+
+        quaternion = tuple(self.quaternion.tolist())
+        bias = self._bias.tolist()
+        quaternion_history = []
+        bias_history = []
+        for acc_row, gyro_row in zip(acc.tolist(), gyro.tolist()):
+            quaternion, bias = self._step(quaternion, bias, acc_row, gyro_row)
+            quaternion_history.append(quaternion)
+            bias_history.append(bias)
+
+        self.quaternion = np.array(quaternion, dtype=np.float64)
+        self._bias = np.array(bias, dtype=np.float64)
+        quaternions = np.array(quaternion_history, dtype=np.float64).reshape(-1, 4)
+        biases = np.array(bias_history, dtype=np.float64).reshape(-1, 3)
+        if return_bias:
+            return quaternions, biases
+        return quaternions
+
+    def _step(self, quaternion, bias, acc, gyro):
+        # Quaternion and bias are stepped on floats; only the 6x6 covariance
+        # algebra goes through numpy, inside the buffers from `_precompute`.
+        quaternion = self._predict(quaternion, bias, gyro)
+        quaternion, bias = self._update_with_acc(quaternion, bias, acc)
+
+        # BaseFilter.normalize_quaternion()
+        w, x, y, z = quaternion
+        norm = math.sqrt(w * w + x * x + y * y + z * z)
+        if norm == 0.0:
+            return (1.0, 0.0, 0.0, 0.0), bias
+        return (w / norm, x / norm, y / norm, z / norm), bias
+
+    def _predict(self, quaternion, bias, gyro_rad_s):
+        dt = self.dt
+        wx, wy, wz = gyro_rad_s[0] - bias[0], gyro_rad_s[1] - bias[1], gyro_rad_s[2] - bias[2]
+        w, x, y, z = quaternion
+
+        quaternion = _normalize_quaternion(
+            (
+                w + 0.5 * (-x * wx - y * wy - z * wz) * dt,
+                x + 0.5 * (w * wx + y * wz - z * wy) * dt,
+                y + 0.5 * (w * wy - x * wz + z * wx) * dt,
+                z + 0.5 * (w * wz + x * wy - y * wx) * dt,
+            )
         )
-        self._covariance = transition @ self._covariance @ transition.T + process_noise
 
-    def _update_with_acc(self, acc: NDArray[np.float64]) -> None:
-        norm = np.linalg.norm(acc)
+        # Top-left block of I + F dt with F[0:3, 0:3] = -[omega]x
+        transition = self._transition
+        transition[0, 1] = wz * dt
+        transition[0, 2] = -wy * dt
+        transition[1, 0] = -wz * dt
+        transition[1, 2] = wx * dt
+        transition[2, 0] = wy * dt
+        transition[2, 1] = -wx * dt
+
+        np.matmul(transition, self._covariance, out=self._scratch)
+        np.matmul(self._scratch, self._transition_t, out=self._covariance)
+        self._covariance += self._process_noise
+        return quaternion
+
+    def _update_with_acc(self, quaternion, bias, acc):
+        ax, ay, az = acc
+        norm = math.sqrt(ax * ax + ay * ay + az * az)
         if norm < _FLOAT_EPS:
-            return
-
-        measurement = acc / norm
-        rotation_body_to_world = Rotation.from_quat(
-            _wxyz_to_xyzw(self.quaternion)
-        ).as_matrix()
-        predicted = rotation_body_to_world.T @ _GRAVITY_BODY_Z
-        innovation = measurement - predicted
-
-        measurement_matrix = np.zeros((3, 6), dtype=np.float64)
-        measurement_matrix[:, 0:3] = -_skew(predicted)
-
-        accel_cov = (self.acc_noise**2) * np.eye(3, dtype=np.float64)
-
-        ph_t = self._covariance @ measurement_matrix.T
-        innovation_cov = measurement_matrix @ ph_t + accel_cov
-        kalman_gain = np.linalg.solve(innovation_cov.T, ph_t.T).T
-
-        correction = kalman_gain @ innovation
-        delta_theta = correction[0:3]
-        delta_bias = correction[3:6]
+            return quaternion, bias
+
+        # Gravity in the body frame: third row of the body-to-world matrix.
+        w, x, y, z = quaternion
+        px = 2.0 * (x * z - y * w)
+        py = 2.0 * (y * z + x * w)
+        pz = -x * x - y * y + z * z + w * w
+        innovation = np.array(
+            [ax / norm - px, ay / norm - py, az / norm - pz], dtype=np.float64
+        )
 
-        self.quaternion = _normalize_quaternion(
-            _quat_multiply(self.quaternion, _small_angle_quaternion(delta_theta))
+        # H = [-[predicted]x, 0]
+        h = self._h
+        h[0, 1], h[0, 2] = pz, -py
+        h[1, 0], h[1, 2] = -pz, px
+        h[2, 0], h[2, 1] = py, -px
+
+        covariance = self._covariance
+        ph_t = np.matmul(covariance[:, 0:3], h.T, out=self._ph_t)
+        innovation_cov = np.matmul(h, ph_t[0:3], out=self._innovation_cov)
+        innovation_cov += self._accel_cov
+        kalman_gain = ph_t @ np.array(
+            _invert_symmetric_3x3(innovation_cov.tolist()), dtype=np.float64
         )
-        self._bias = self._bias + delta_bias
 
-        identity = np.eye(6, dtype=np.float64)
-        temp = identity - kalman_gain @ measurement_matrix
-        self._covariance = (
-            temp @ self._covariance @ temp.T + kalman_gain @ accel_cov @ kalman_gain.T
+        c0, c1, c2, c3, c4, c5 = (kalman_gain @ innovation).tolist()
+        quaternion = _normalize_quaternion(
+            _quat_multiply(quaternion, _small_angle_quaternion((c0, c1, c2)))
         )
+        bias = [bias[0] + c3, bias[1] + c4, bias[2] + c5]
+
+        # With the optimal gain the Joseph form reduces to P - K (P H^T)^T.
+        np.matmul(kalman_gain, ph_t.T, out=self._scratch)
+        covariance -= self._scratch
+        return quaternion, bias
+
+    def get_state(self) -> dict:
+        """Orientation, bias estimate and covariance as plain lists."""
+
+        return {
+            "quaternion": self.quaternion.tolist(),
+            "bias": self._bias.tolist(),
+            "covariance": self._covariance.tolist(),
+        }
+
+    def set_state(self, state: dict) -> None:
+        self.quaternion = np.asarray(state["quaternion"], dtype=np.float64).reshape(4)
+        self._bias = np.asarray(state["bias"], dtype=np.float64).reshape(3)
+        self._covariance = np.asarray(state["covariance"], dtype=np.float64).reshape(6, 6)
 
     def get_bias(self) -> NDArray[np.float64]:
         """Return the current gyroscope bias estimate."""
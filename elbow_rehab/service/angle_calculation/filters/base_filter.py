@@ -9,6 +9,69 @@ def _wxyz_to_xyzw(quaternion: np.ndarray) -> np.ndarray:
     return np.array([x, y, z, w], dtype=float)
 
 
+def quaternions_to_rotation_matrices(quaternions: np.ndarray) -> np.ndarray:
+    """Convert an (N, 4) `[w, x, y, z]` history to (N, 3, 3) rotation matrices.
+
+    Vectorised equivalent of calling `rotation_matrix()` once per sample: the
+    quaternions are normalised and expanded with the same formula SciPy uses.
+    """
+
+    q = np.asarray(quaternions, dtype=float).reshape(-1, 4)
+    q = q / np.linalg.norm(q, axis=1, keepdims=True)
+    w, x, y, z = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+
+    x2, y2, z2, w2 = x * x, y * y, z * z, w * w
+    xy, zw, xz, yw, yz, xw = x * y, z * w, x * z, y * w, y * z, x * w
+
+    matrices = np.empty((q.shape[0], 3, 3), dtype=float)
+    matrices[:, 0, 0] = x2 - y2 - z2 + w2
+    matrices[:, 1, 0] = 2 * (xy + zw)
+    matrices[:, 2, 0] = 2 * (xz - yw)
+    matrices[:, 0, 1] = 2 * (xy - zw)
+    matrices[:, 1, 1] = -x2 + y2 - z2 + w2
+    matrices[:, 2, 1] = 2 * (yz + xw)
+    matrices[:, 0, 2] = 2 * (xz + yw)
+    matrices[:, 1, 2] = 2 * (yz - xw)
+    matrices[:, 2, 2] = -x2 - y2 + z2 + w2
+    return matrices
+
+
+def relative_quaternions(quats_a: np.ndarray, quats_b: np.ndarray) -> np.ndarray:
+    """Return `conj(q_A) ⊗ q_B` row by row for two (N, 4) `[w, x, y, z]` histories.
+
+    The result is the orientation of B expressed in A, i.e. the quaternion
+    of `R_A.T @ R_B`.
+    """
+
+    qa = np.asarray(quats_a, dtype=float).reshape(-1, 4)
+    qb = np.asarray(quats_b, dtype=float).reshape(-1, 4)
+    if qa.shape != qb.shape:
+        raise ValueError("Quaternion histories must have the same length.")
+
+    w1, x1, y1, z1 = qa[:, 0], -qa[:, 1], -qa[:, 2], -qa[:, 3]
+    w2, x2, y2, z2 = qb[:, 0], qb[:, 1], qb[:, 2], qb[:, 3]
+
+    relative = np.empty_like(qa)
+    relative[:, 0] = w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2
+    relative[:, 1] = w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2
+    relative[:, 2] = w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2
+    relative[:, 3] = w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2
+    return relative
+
+
+def relative_rotation_matrices(quats_a: np.ndarray, quats_b: np.ndarray) -> np.ndarray:
+    """Return the (N, 3, 3) stack of `R_A.T @ R_B` from two quaternion histories."""
+
+    return quaternions_to_rotation_matrices(relative_quaternions(quats_a, quats_b))
+
+
+def quaternions_to_euler(quaternions: np.ndarray, degrees: bool = True) -> np.ndarray:
+    """Vectorised `euler_angles()`: (N, 4) `[w, x, y, z]` to (N, 3) roll, pitch, yaw."""
+
+    q = np.asarray(quaternions, dtype=float).reshape(-1, 4)
+    return Rotation.from_quat(q[:, [1, 2, 3, 0]]).as_euler("xyz", degrees=degrees)
+
+
 class BaseFilter:
     """Shared quaternion helpers for the lightweight filter wrappers."""
 
@@ -22,10 +85,38 @@ class BaseFilter:
             return
         self.quaternion = self.quaternion / norm
 
+    def run(self, acc_data, gyro_data) -> np.ndarray:
+        """Filter a whole session and return the (N, 4) quaternion history.
+
+        `acc_data` and `gyro_data` are (N, 3) arrays. Subclasses with a faster
+        whole-session kernel override this; the result must match calling
+        `update()` once per row.
+        """
+
+        acc = np.asarray(acc_data, dtype=float).reshape(-1, 3)
+        gyro = np.asarray(gyro_data, dtype=float).reshape(-1, 3)
+        if acc.shape != gyro.shape:
+            raise ValueError("acc and gyro must have the same number of samples.")
+
+        history = np.empty((acc.shape[0], 4), dtype=float)
+        for idx in range(acc.shape[0]):
+            history[idx] = self.update(acc[idx], gyro[idx])
+        return history
+
+    def get_state(self) -> dict:
+        """JSON-serialisable snapshot of the recursive state; see `set_state`."""
+
+        return {"quaternion": [float(v) for v in self.quaternion]}
+
+    def set_state(self, state: dict) -> None:
+        """Resume from a `get_state()` snapshot."""
+
+        self.quaternion = np.asarray(state["quaternion"], dtype=float).reshape(4)
+
     def rotation_matrix(self) -> np.ndarray:
         """Return the orientation as a 3×3 rotation matrix."""
 
-        return Rotation.from_quat(_wxyz_to_xyzw(self.quaternion)).as_matrix()
+        return quaternions_to_rotation_matrices(self.quaternion)[0]
 
     def euler_angles(self, degrees: bool = True) -> np.ndarray:
         """Return roll, pitch, yaw from the current orientation."""
@@ -0,0 +1,165 @@
+"""Madgwick filter bank advancing K independent IMU streams in lockstep."""
+
+from __future__ import annotations
+
+import numpy as np
+from ahrs.filters import Madgwick
+
+from .base_filter import (
+    BaseFilter,
+    quaternions_to_euler,
+    quaternions_to_rotation_matrices,
+)
+
+# Time steps whose inputs `run` prepares at once; bounds the padded buffers
+# (and the (steps, K, 4, 4) omega tensor) regardless of session length
+RUN_CHUNK_STEPS = 1024
+
+_IDENTITY = np.array([1.0, 0.0, 0.0, 0.0])
+_GRAVITY = np.array([0.0, 0.0, 1.0])
+
+# 0.5 * q ⊗ [0, g] == Ω(g) @ q, with Ω gathered from [0, gx, gy, gz].
+_OMEGA_INDEX = np.array([[0, 1, 2, 3], [1, 0, 3, 2], [2, 3, 0, 1], [3, 2, 1, 0]])
+_OMEGA_SIGN = 0.5 * np.array(
+    [[0, -1, -1, -1], [1, 0, 1, -1], [1, -1, 0, 1], [1, 1, -1, 0]], dtype=float
+)
+
+# Madgwick Jacobian (eq. 26) is linear in q: J[r, c] = Σ_i q_i * _JACOBIAN[i, r, c].
+_W, _X, _Y, _Z = range(4)
+_JACOBIAN = np.zeros((4, 3, 4))
+_JACOBIAN[_Y, 0, 0], _JACOBIAN[_Z, 0, 1], _JACOBIAN[_W, 0, 2], _JACOBIAN[_X, 0, 3] = -2, 2, -2, 2
+_JACOBIAN[_X, 1, 0], _JACOBIAN[_W, 1, 1], _JACOBIAN[_Z, 1, 2], _JACOBIAN[_Y, 1, 3] = 2, 2, 2, 2
+_JACOBIAN[_X, 2, 1], _JACOBIAN[_Y, 2, 2] = -4, -4
+_JACOBIAN = _JACOBIAN.reshape(4, 12)
+
+
+def _row_norm(values: np.ndarray) -> np.ndarray:
+    return np.sqrt(np.einsum("...i,...i->...", values, values))
+
+
+class MadgwickFilterBank(BaseFilter):
+    """
+    K Madgwick IMU filters sharing one (K, 4) `[w, x, y, z]` state.
+
+    Each `update` applies the `Madgwick.updateIMU` step to every active
+    stream at once, so the per-sample Python cost is paid once per time step
+    rather than once per stream. Row k tracks a standalone `MadgwickFilter`
+    fed the same samples (to floating-point rounding, NaNs included).
+    """
+
+    def __init__(self, frequency, streams: int):
+        super().__init__()
+        if streams <= 0:
+            raise ValueError("streams must be positive")
+        madgwick = Madgwick(frequency=frequency)
+        self.gain = float(madgwick.gain)
+        self.dt = float(madgwick.Dt)
+        self.streams = int(streams)
+        self.quaternion = np.tile(_IDENTITY, (self.streams, 1))
+
+    def normalize_quaternion(self) -> None:
+        norm = _row_norm(self.quaternion)[:, None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.quaternion = np.where(norm == 0.0, _IDENTITY, self.quaternion / norm)
+
+    @staticmethod
+    def _prepare(acc: np.ndarray, gyro: np.ndarray, active: np.ndarray):
+        """Precompute every input-only term of the update for (..., K, 3) samples."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            g_norm = _row_norm(gyro)
+            moving = (g_norm > 0) & active
+            padded = np.concatenate([np.zeros(gyro.shape[:-1] + (1,)), gyro], axis=-1)
+            omega = padded[..., _OMEGA_INDEX] * _OMEGA_SIGN
+            a_norm = _row_norm(acc)
+            has_acc = a_norm > 0
+            acc_unit = acc / a_norm[..., None]
+        return omega, acc_unit, has_acc, moving
+
+    def _step(self, omega, acc_unit, has_acc, moving) -> None:
+        q = self.quaternion
+        q_dot = np.matmul(omega, q[:, :, None])[:, :, 0]               # (eq. 12)
+
+        # The state is kept unit-norm, so ahrs' re-normalisation of q here
+        # and BaseFilter's second pass below only move the last bit.
+        jacobian = (q @ _JACOBIAN).reshape(-1, 3, 4)                   # (eq. 26)
+        objective = (
+            0.5 * np.matmul(jacobian, q[:, :, None])[:, :, 0] + _GRAVITY - acc_unit
+        )                                                              # (eq. 25)
+        gradient = np.matmul(objective[:, None, :], jacobian)[:, 0, :]  # (eq. 34)
+        gradient /= _row_norm(gradient)[:, None]
+        q_dot -= np.where(has_acc[:, None], self.gain * gradient, 0.0)  # (eq. 33)
+
+        q_new = q + q_dot * self.dt                                    # (eq. 13)
+        q_new /= _row_norm(q_new)[:, None]
+
+        self.quaternion = np.where(moving[:, None], q_new, q)
+
+    def update(self, acc_data, gyro_data, active=None) -> np.ndarray:
+        """
+        Advance every stream by one sample.
+        `acc_data`/`gyro_data` are (K, 3); rows where `active` is False keep
+        their current orientation. Returns the (K, 4) state.
+        """
+        acc = np.asarray(acc_data, dtype=float).reshape(self.streams, 3)
+        gyro = np.asarray(gyro_data, dtype=float).reshape(self.streams, 3)
+        if active is None:
+            active = np.ones(self.streams, dtype=bool)
+
+        prepared = self._prepare(acc, gyro, np.asarray(active, dtype=bool))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self._step(*prepared)
+        return self.quaternion
+
+    def run(self, acc_streams, gyro_streams) -> list[np.ndarray]:
+        """
+        Filter K sessions of possibly different lengths together.
+        Takes K (N_k, 3) accelerometer and gyroscope arrays and returns K
+        (N_k, 4) quaternion histories; a stream is masked once it has ended.
+        """
+        if len(acc_streams) != self.streams or len(gyro_streams) != self.streams:
+            raise ValueError(f"Expected {self.streams} acc and gyro streams.")
+
+        lengths = np.array([len(acc) for acc in acc_streams], dtype=int)
+        if any(len(g) != n for g, n in zip(gyro_streams, lengths)):
+            raise ValueError("acc and gyro must have the same number of samples.")
+
+        acc_streams = [np.asarray(a, dtype=float).reshape(-1, 3) for a in acc_streams]
+        gyro_streams = [np.asarray(g, dtype=float).reshape(-1, 3) for g in gyro_streams]
+        histories = [np.empty((n, 4), dtype=float) for n in lengths]
+
+        steps = int(lengths.max(initial=0))
+        chunk = min(RUN_CHUNK_STEPS, steps)
+        acc = np.zeros((chunk, self.streams, 3), dtype=float)
+        gyro = np.zeros((chunk, self.streams, 3), dtype=float)
+        history = np.empty((chunk, self.streams, 4), dtype=float)
+        for start in range(0, steps, chunk):
+            stop = min(start + chunk, steps)
+            span = stop - start
+            # per-stream sample counts within this chunk (0 once a stream ended)
+            counts = np.clip(lengths - start, 0, span)
+            acc[:span] = 0.0
+            gyro[:span] = 0.0
+            for k in np.flatnonzero(counts):
+                acc[: counts[k], k] = acc_streams[k][start : start + counts[k]]
+                gyro[: counts[k], k] = gyro_streams[k][start : start + counts[k]]
+            active = np.arange(span)[:, None] < counts[None, :]
+
+            omega, acc_unit, has_acc, moving = self._prepare(acc[:span], gyro[:span], active)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                for t in range(span):
+                    self._step(omega[t], acc_unit[t], has_acc[t], moving[t])
+                    history[t] = self.quaternion
+            for k in np.flatnonzero(counts):
+                histories[k][start : start + counts[k]] = history[: counts[k], k]
+
+        return histories
+
+    def rotation_matrix(self) -> np.ndarray:
+        """Return the (K, 3, 3) orientation of every stream."""
+
+        return quaternions_to_rotation_matrices(self.quaternion)
+
+    def euler_angles(self, degrees: bool = True) -> np.ndarray:
+        """Return (K, 3) roll, pitch, yaw for every stream."""
+
+        return quaternions_to_euler(self.quaternion, degrees=degrees)
@@ -1,8 +1,59 @@
+import math
+
 from ahrs.filters import Madgwick
 import numpy as np
 from .base_filter import BaseFilter
 
 
+def _madgwick_imu_step(q, gyr, acc, gain, dt):
+    """One `Madgwick.updateIMU` step on plain floats.
+
+    Mirrors the ahrs implementation operation for operation (including the
+    NaN it produces when the gradient vanishes) so `run()` matches `update()`.
+    """
+    qw, qx, qy, qz = q
+    gx, gy, gz = gyr
+    if not math.sqrt(gx * gx + gy * gy + gz * gz) > 0:
+        return q
+
+    # qDot = 0.5 * q ⊗ [0, gyr]                                    (eq. 12)
+    dw = 0.5 * (-qx * gx - qy * gy - qz * gz)
+    dx = 0.5 * (qw * gx + qy * gz - qz * gy)
+    dy = 0.5 * (qw * gy - qx * gz + qz * gx)
+    dz = 0.5 * (qw * gz + qx * gy - qy * gx)
+
+    ax, ay, az = acc
+    a_norm = math.sqrt(ax * ax + ay * ay + az * az)
+    if a_norm > 0:
+        ax, ay, az = ax / a_norm, ay / a_norm, az / a_norm
+        q_norm = math.sqrt(qw * qw + qx * qx + qy * qy + qz * qz)
+        nw, nx, ny, nz = qw / q_norm, qx / q_norm, qy / q_norm, qz / q_norm
+        # Gradient objective function (eq. 25) and J.T @ f (eq. 26, 34)
+        f0 = 2.0 * (nx * nz - nw * ny) - ax
+        f1 = 2.0 * (nw * nx + ny * nz) - ay
+        f2 = 2.0 * (0.5 - nx * nx - ny * ny) - az
+        g0 = -2.0 * ny * f0 + 2.0 * nx * f1
+        g1 = 2.0 * nz * f0 + 2.0 * nw * f1 - 4.0 * nx * f2
+        g2 = -2.0 * nw * f0 + 2.0 * nz * f1 - 4.0 * ny * f2
+        g3 = 2.0 * nx * f0 + 2.0 * ny * f1
+        g_norm = math.sqrt(g0 * g0 + g1 * g1 + g2 * g2 + g3 * g3)
+        if g_norm == 0.0:
+            # numpy turns 0/0 into NaN here; keep the same behaviour.
+            g0 = g1 = g2 = g3 = math.nan
+        else:
+            g0, g1, g2, g3 = g0 / g_norm, g1 / g_norm, g2 / g_norm, g3 / g_norm
+        dw -= gain * g0
+        dx -= gain * g1
+        dy -= gain * g2
+        dz -= gain * g3
+
+    qw, qx, qy, qz = qw + dw * dt, qx + dx * dt, qy + dy * dt, qz + dz * dt  # (eq. 13)
+    q_norm = math.sqrt(qw * qw + qx * qx + qy * qy + qz * qz)
+    if q_norm == 0.0:
+        return (math.nan, math.nan, math.nan, math.nan)
+    return (qw / q_norm, qx / q_norm, qy / q_norm, qz / q_norm)
+
+
 class MadgwickFilter(BaseFilter):
     """
     gyr (numpy.ndarray) - N-by-3 array with measurements of angular velocity in rad/s
@@ -24,3 +75,31 @@ class MadgwickFilter(BaseFilter):
         )
         self.normalize_quaternion()
         return self.quaternion
+
+    def run(self, acc_data, gyro_data) -> np.ndarray:
+        """
+        Filter a whole session and return the (N, 4) quaternion history.
+        Steps the recursion on Python floats instead of allocating numpy
+        temporaries per sample; the final state is kept in `self.quaternion`.
+        """
+        acc = np.asarray(acc_data, dtype=float).reshape(-1, 3)
+        gyro = np.asarray(gyro_data, dtype=float).reshape(-1, 3)
+        if acc.shape != gyro.shape:
+            raise ValueError("acc and gyro must have the same number of samples.")
+
+        gain = float(self.madgwick.gain)
+        dt = float(self.madgwick.Dt)
+        q = tuple(float(v) for v in self.quaternion)
+        history = []
+        for gyr, acc_row in zip(gyro.tolist(), acc.tolist()):
+            q = _madgwick_imu_step(q, gyr, acc_row, gain, dt)
+            # BaseFilter.normalize_quaternion()
+            norm = math.sqrt(q[0] * q[0] + q[1] * q[1] + q[2] * q[2] + q[3] * q[3])
+            if norm == 0.0:
+                q = (1.0, 0.0, 0.0, 0.0)
+            else:
+                q = (q[0] / norm, q[1] / norm, q[2] / norm, q[3] / norm)
+            history.append(q)
+
+        self.quaternion = np.array(q, dtype=float)
+        return np.array(history, dtype=float).reshape(-1, 4)
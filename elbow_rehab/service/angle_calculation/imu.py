@@ -1,18 +1,25 @@
-"""Helpers for handling BLE packets from a single ESP32 IMU."""
+"""Helpers for handling live packets from a single ESP32 IMU."""
+
+from __future__ import annotations
 
 import os
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import Optional, Sequence, Tuple
 
 import numpy as np
 from numpy.typing import NDArray
 
-from filters.base_filter import BaseFilter
-from filters.EKF import ExtendedKalmanFilter
-from filters.Madgwick import MadgwickFilter
+from elbow_rehab.service.angle_calculation.filters.base_filter import BaseFilter
+from elbow_rehab.service.angle_calculation.filters.EKF import ExtendedKalmanFilter
+from elbow_rehab.service.angle_calculation.filters.madgwick import MadgwickFilter
+from elbow_rehab.service.angle_calculation.preprocess import preprocess
+from elbow_rehab.service.angle_calculation.settings import (
+    DEFAULT_FILTER,
+    DEFAULT_SAMPLE_RATE_HZ,
+)
+from elbow_rehab.service.logger import get_logger
 
-from preprocess import preprocess
-from settings import DEFAULT_SAMPLE_RATE_HZ #todo remove global var from heere, default value should be initialized in calculations
+logger = get_logger()
 
 
 @dataclass(frozen=True)
@@ -26,8 +33,16 @@ class SensorSnapshot:
 
 @dataclass
 class IMUSensor:
+    """Orientation filter state of one sensor, advanced one sample at a time.
+
+    `gyro_bias` (rad/s) is subtracted from every gyro sample before filtering.
+    `filter_type` defaults to ``ORIENTATION_FILTER_<label>``, then
+    ``ORIENTATION_FILTER``, then the service default.
+    """
+
     label: str
     sample_rate_hz: float = DEFAULT_SAMPLE_RATE_HZ
+    filter_type: Optional[str] = None
 
     def __post_init__(self) -> None:
         self.sample_rate_hz = float(self.sample_rate_hz)
@@ -36,49 +51,55 @@ class IMUSensor:
         self.sample_period = 1.0 / self.sample_rate_hz
 
         self.filter_name, self.filter = self._select_filter()
+        self.gyro_bias: NDArray[np.float64] = np.zeros(3)
 
         self.latest_rotation: Optional[NDArray[np.float64]] = None
         self.latest_gyro_rad: Optional[NDArray[np.float64]] = None
         self.latest_snapshot: Optional[SensorSnapshot] = None
 
     def _select_filter(self) -> Tuple[str, BaseFilter]:
-        env_key = f"ORIENTATION_FILTER_{self.label}"
-        default = os.getenv("ORIENTATION_FILTER", "madgwick")
-        name = os.getenv(env_key, default).strip().lower()
-
-        if name == "madgwick":
-            return name, MadgwickFilter(DEFAULT_SAMPLE_RATE_HZ)
-        if name != "ekf":
-            print(f"⚠️  Unknown filter name '{name}'; falling back to Madgwick.")
-            name = "ekf"
-        return name, MadgwickFilter(DEFAULT_SAMPLE_RATE_HZ)
-
-    def process_packet(self, payload: bytearray) -> None:
-        """Decode a BLE packet and update the internal orientation state."""
-
-        text = payload.decode("utf-8").strip()
-        parts = text.split(",")
-        if len(parts) < 7:
-            raise ValueError("Expected timestamp + 6 sensor values.")
-
-        esp_ms = int(parts[0])
-        ax, ay, az, gx, gy, gz = (float(value) for value in parts[1:7])
-
-        raw_acc = np.array([ax, ay, az], dtype=float)
-        raw_gyr = np.array([gx, gy, gz], dtype=float)
-
-        processed_acc, processed_gyro = preprocess(raw_acc, raw_gyr)
+        name = self.filter_type
+        if name is None:
+            default = os.getenv("ORIENTATION_FILTER", DEFAULT_FILTER)
+            name = os.getenv(f"ORIENTATION_FILTER_{self.label}", default)
+        name = name.strip().lower()
+
+        if name == "ekf":
+            return name, ExtendedKalmanFilter(frequency=self.sample_rate_hz)
+        if name != "madgwick":
+            logger.warning(f"Unknown filter name '{name}'; falling back to Madgwick.")
+            name = "madgwick"
+        return name, MadgwickFilter(frequency=self.sample_rate_hz)
+
+    def update(
+        self, timestamp_ms: int, acc_m_s2: Sequence[float], gyr_rad_s: Sequence[float]
+    ) -> None:
+        """Advance the filter by one sample."""
+        processed_acc, processed_gyro = preprocess(acc_m_s2, gyr_rad_s)
+        processed_gyro = processed_gyro - self.gyro_bias
 
         self.filter.update(processed_acc, processed_gyro)
 
         self.latest_rotation = self.filter.rotation_matrix()
         self.latest_gyro_rad = processed_gyro
         self.latest_snapshot = SensorSnapshot(
-            timestamp_ms=esp_ms,
+            timestamp_ms=int(timestamp_ms),
             acc_m_s2=tuple(float(x) for x in processed_acc),
             gyr_rad_s=tuple(float(x) for x in processed_gyro),
         )
 
+    def process_packet(self, payload: bytes | bytearray) -> None:
+        """Decode a ``timestamp,ax,ay,az,gx,gy,gz`` BLE packet and update the orientation."""
+
+        text = bytes(payload).decode("utf-8").strip()
+        parts = text.split(",")
+        if len(parts) < 7:
+            raise ValueError("Expected timestamp + 6 sensor values.")
+
+        esp_ms = int(parts[0])
+        ax, ay, az, gx, gy, gz = (float(value) for value in parts[1:7])
+        self.update(esp_ms, (ax, ay, az), (gx, gy, gz))
+
     @property
     def is_ready(self) -> bool:
         return (
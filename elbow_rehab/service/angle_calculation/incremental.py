@@ -0,0 +1,143 @@
+"""Resumable angle processing for sessions that grow while they are polled.
+
+A session is processed once up to its latest reading and the recursive state
+(filter orientations, estimator axes, gyro bias) is captured in an
+`AngleCheckpoint`. Later readings continue from that checkpoint, so a poll
+costs time proportional to the new data only and yields exactly the angles a
+full reprocess would.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+
+import pandas as pd
+
+from elbow_rehab.service.angle_calculation.calculations import (
+    estimate_angles,
+    get_estimator,
+    get_filter,
+    sensor_block,
+)
+from elbow_rehab.service.angle_calculation.calibration import (
+    calibrate_gyro_blocks,
+    subtract_gyro_biases,
+)
+from elbow_rehab.service.angle_calculation.settings import (
+    DEFAULT_CALIBRATION_DURATION_FRAMES,
+    DEFAULT_CALIBRATION_SEARCH_FRAMES,
+    DEFAULT_ESTIMATOR,
+    DEFAULT_FILTER,
+    DEFAULT_SAMPLE_RATE_HZ,
+    ACCEL_COLS_A,
+    ACCEL_COLS_B,
+    GYRO_COLS_A,
+    GYRO_COLS_B,
+)
+
+
+@dataclass
+class AngleCheckpoint:
+    """Everything needed to continue a session after `last_esp32_ms_A`."""
+
+    session_id: str
+    estimator_type: str
+    sample_rate: float
+    filter_type: str
+    row_count: int
+    last_esp32_ms_A: int
+    gyro_biases: dict[str, float]
+    filter_a: dict
+    filter_b: dict
+    estimator: dict = field(default_factory=dict)
+
+    def matches(self, estimator_type, sample_rate, filter_type) -> bool:
+        return (self.estimator_type, self.sample_rate, self.filter_type) == (
+            estimator_type,
+            float(sample_rate),
+            filter_type,
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AngleCheckpoint":
+        return cls(**data)
+
+
+def process_session_angles_incremental(
+    session_id: str,
+    readings: pd.DataFrame,
+    checkpoint: AngleCheckpoint | None = None,
+    estimator_type=DEFAULT_ESTIMATOR,
+    sample_rate=DEFAULT_SAMPLE_RATE_HZ,
+    filter_type=DEFAULT_FILTER,
+    calibration_window=DEFAULT_CALIBRATION_DURATION_FRAMES,
+    calibration_search_frames=DEFAULT_CALIBRATION_SEARCH_FRAMES,
+) -> tuple[pd.DataFrame, AngleCheckpoint | None]:
+    """Process `readings` (sorted by esp32_ms_A) on top of `checkpoint`.
+
+    Without a checkpoint `readings` must be the session from its first sample.
+    Returns the calibrated rows with `flexion_deg`/`pronation_deg` attached and
+    the checkpoint to resume from. No checkpoint is returned while the session
+    is shorter than the calibration search span, because its gyro bias is
+    still provisional and later readings would change it.
+    """
+    acc_a = sensor_block(readings, ACCEL_COLS_A)
+    acc_b = sensor_block(readings, ACCEL_COLS_B)
+    gyro_a = sensor_block(readings, GYRO_COLS_A)
+    gyro_b = sensor_block(readings, GYRO_COLS_B)
+
+    if checkpoint is None:
+        gyro_biases = calibrate_gyro_blocks(
+            gyro_a, gyro_b, acc_a, acc_b, calibration_window, calibration_search_frames
+        ).biases
+        filter_a = get_filter(sample_rate, filter_type)
+        filter_b = get_filter(sample_rate, filter_type)
+        estimator = get_estimator(estimator_type, sample_rate)
+        row_count = 0
+    else:
+        if not checkpoint.matches(estimator_type, sample_rate, filter_type):
+            raise ValueError("Checkpoint was produced with a different configuration.")
+        gyro_biases = checkpoint.gyro_biases
+        filter_a = get_filter(sample_rate, filter_type)
+        filter_a.set_state(checkpoint.filter_a)
+        filter_b = get_filter(sample_rate, filter_type)
+        filter_b.set_state(checkpoint.filter_b)
+        estimator = get_estimator(estimator_type, sample_rate)
+        estimator.set_state(checkpoint.estimator)
+        row_count = checkpoint.row_count
+
+    # the blocks are our own copies, so calibrate them in place
+    subtract_gyro_biases(gyro_a, GYRO_COLS_A, gyro_biases)
+    subtract_gyro_biases(gyro_b, GYRO_COLS_B, gyro_biases)
+    quats_a = filter_a.run(acc_a, gyro_a)
+    quats_b = filter_b.run(acc_b, gyro_b)
+    flexions, pronations = estimate_angles(
+        quats_a, gyro_a, quats_b, gyro_b, estimator=estimator
+    )
+    # one copy of `readings`, with calibrated gyro columns and the angles
+    processed_df = readings.assign(
+        **{col: gyro_a[:, i] for i, col in enumerate(GYRO_COLS_A)},
+        **{col: gyro_b[:, i] for i, col in enumerate(GYRO_COLS_B)},
+        flexion_deg=flexions,
+        pronation_deg=pronations,
+    )
+
+    row_count += len(readings)
+    if row_count < max(calibration_window, calibration_search_frames) or readings.empty:
+        return processed_df, checkpoint
+
+    return processed_df, AngleCheckpoint(
+        session_id=session_id,
+        estimator_type=estimator_type,
+        sample_rate=float(sample_rate),
+        filter_type=filter_type,
+        row_count=row_count,
+        last_esp32_ms_A=int(readings["esp32_ms_A"].iloc[-1]),
+        gyro_biases=gyro_biases,
+        filter_a=filter_a.get_state(),
+        filter_b=filter_b.get_state(),
+        estimator=estimator.get_state(),
+    )
@@ -3,4 +3,13 @@
 DEFAULT_SAMPLE_RATE_HZ = 100.0
 DEFAULT_CALIBRATION_DURATION_S = 3.0
 DEFAULT_CALIBRATION_DURATION_FRAMES = int(DEFAULT_SAMPLE_RATE_HZ * DEFAULT_CALIBRATION_DURATION_S)
-DEFAULT_ESTIMATOR = "simple"
\ No newline at end of file
+# The stationary calibration window is searched for in this opening span
+DEFAULT_CALIBRATION_SEARCH_S = 10.0
+DEFAULT_CALIBRATION_SEARCH_FRAMES = int(DEFAULT_SAMPLE_RATE_HZ * DEFAULT_CALIBRATION_SEARCH_S)
+DEFAULT_ESTIMATOR = "simple"
+DEFAULT_FILTER = "madgwick"
+
+GYRO_COLS_A = ["gx_A", "gy_A", "gz_A"]
+GYRO_COLS_B = ["gx_B", "gy_B", "gz_B"]
+ACCEL_COLS_A = ["ax_A", "ay_A", "az_A"]
+ACCEL_COLS_B = ["ax_B", "ay_B", "az_B"]
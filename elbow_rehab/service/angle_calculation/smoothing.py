@@ -0,0 +1,76 @@
+"""Causal sliding-window median smoothing of angle series.
+
+Sample i is smoothed over the trailing window ``series[max(0, i - window + 1) : i + 1]``,
+so the first ``window - 1`` outputs use the shorter windows available. A
+window containing NaN yields NaN, as ``np.median`` does.
+
+`rolling_median` calls ``np.median(view, axis=1)`` on a strided
+``sliding_window_view`` of the series, a block of rows at a time. That is
+O(N * window) work, not the O(N log window) of a sorted-window median. It
+was chosen because the windows used here are short (tens of samples), and
+vectorized selection over a zero-copy view beats a per-sample Python loop
+that maintains a sorted window. Memory is bounded by the chunk size, since
+each block's median copies its rows.
+
+`StreamingMedian` carries the last ``window - 1`` samples across calls, so a
+series smoothed in chunks matches the batch result exactly. It is not wired
+into the incremental or live angle paths yet; only `rolling_median` is used
+(by `estimator.median_smooth`).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Values (rows * window) of the strided view handed to np.median at a time;
+# np.median copies them, so this bounds the temporary memory
+_CHUNK_VALUES = 1 << 20
+
+
+def rolling_median(series, window: int) -> np.ndarray:
+    """Trailing-window median of every sample of `series`."""
+    if window < 1:
+        raise ValueError(f"window must be positive, got {window}")
+    x = np.asarray(series, dtype=float).ravel()
+    n = len(x)
+    out = np.empty(n, dtype=float)
+
+    head = min(window - 1, n)
+    for i in range(head):
+        out[i] = np.median(x[: i + 1])
+    if n < window:
+        return out
+
+    view = sliding_window_view(x, window)
+    rows = max(1, _CHUNK_VALUES // window)
+    for start in range(0, len(view), rows):
+        out[head + start : head + start + rows] = np.median(view[start : start + rows], axis=1)
+    return out
+
+
+class StreamingMedian:
+    """`rolling_median` over a series that arrives in chunks."""
+
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError(f"window must be positive, got {window}")
+        self.window = window
+        self._history = np.empty(0, dtype=float)
+
+    def update(self, chunk) -> np.ndarray:
+        """Smoothed values of `chunk`, continuing from the previous chunks."""
+        chunk = np.asarray(chunk, dtype=float).ravel()
+        if not len(chunk):
+            return chunk
+        # a history shorter than window - 1 means the series started within it
+        x = np.concatenate([self._history, chunk])
+        smoothed = rolling_median(x, self.window)[len(self._history) :]
+        self._history = x[-(self.window - 1) :] if self.window > 1 else x[:0]
+        return smoothed
+
+    def get_state(self) -> dict:
+        return {"history": self._history.tolist()}
+
+    def set_state(self, state: dict) -> None:
+        self._history = np.asarray(state.get("history", []), dtype=float)
@@ -0,0 +1,119 @@
+"""Per-session storage of `AngleCheckpoint`s and the angles processed so far."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pandas as pd
+
+from elbow_rehab.service.logger import get_logger
+
+if TYPE_CHECKING:
+    # imports the filter stack (scipy, ahrs); loaded on first processing instead
+    from elbow_rehab.service.angle_calculation.incremental import AngleCheckpoint
+
+logger = get_logger()
+
+ANGLE_CHECKPOINT_DIR = os.getenv("ANGLE_CHECKPOINT_DIR")
+ANGLE_CHECKPOINT_MAX_SESSIONS = int(os.getenv("ANGLE_CHECKPOINT_MAX_SESSIONS", "64"))
+
+StoredAngles = tuple["AngleCheckpoint", pd.DataFrame]
+
+
+class AngleCheckpointStore:
+    """Latest checkpoint and processed frame per (session, configuration).
+
+    Kept in memory for the most recently used `max_sessions`; with
+    `directory` set they are also written to disk (checkpoint as JSON next to
+    a pickled frame) so they survive restarts and are shared by workers.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike | None = ANGLE_CHECKPOINT_DIR,
+        max_sessions: int = ANGLE_CHECKPOINT_MAX_SESSIONS,
+    ):
+        self.directory = Path(directory) if directory else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_sessions = max_sessions
+        self._entries: OrderedDict[tuple, StoredAngles] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(session_id, estimator_type, sample_rate, filter_type) -> tuple:
+        return (session_id, estimator_type, float(sample_rate), filter_type)
+
+    def load(
+        self, session_id, estimator_type, sample_rate, filter_type
+    ) -> StoredAngles | None:
+        key = self._key(session_id, estimator_type, sample_rate, filter_type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def save(self, checkpoint: AngleCheckpoint, processed_df: pd.DataFrame) -> None:
+        key = self._key(
+            checkpoint.session_id,
+            checkpoint.estimator_type,
+            checkpoint.sample_rate,
+            checkpoint.filter_type,
+        )
+        self._remember(key, (checkpoint, processed_df))
+        self._write_disk(key, checkpoint, processed_df)
+
+    def _remember(self, key, entry: StoredAngles) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+
+    def _paths(self, key) -> tuple[Path, Path]:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return self.directory / f"{digest}.json", self.directory / f"{digest}.pkl"
+
+    def _read_disk(self, key) -> StoredAngles | None:
+        if self.directory is None:
+            return None
+        from elbow_rehab.service.angle_calculation.incremental import AngleCheckpoint
+
+        checkpoint_path, frame_path = self._paths(key)
+        try:
+            checkpoint = AngleCheckpoint.from_dict(json.loads(checkpoint_path.read_text()))
+            processed_df = pd.read_pickle(frame_path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable angle checkpoint {checkpoint_path}: {e}")
+            return None
+        if len(processed_df) != checkpoint.row_count:
+            # Crashed between the two writes; the frame is written first, so
+            # a mismatch means the checkpoint is stale.
+            return None
+        return checkpoint, processed_df
+
+    def _write_disk(self, key, checkpoint: AngleCheckpoint, processed_df) -> None:
+        if self.directory is None:
+            return
+        checkpoint_path, frame_path = self._paths(key)
+        for path, write in (
+            (frame_path, processed_df.to_pickle),
+            (checkpoint_path, lambda p: Path(p).write_text(json.dumps(checkpoint.to_dict()))),
+        ):
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            write(tmp)
+            os.replace(tmp, path)
@@ -0,0 +1,234 @@
+"""Background angle computation: submit a session, poll the job, fetch the result.
+
+The filter loop is CPU bound and holds the GIL, so jobs run it in a process
+pool and the API process only fetches readings and serves results. Identical
+requests for an unchanged session share one job, at most
+``ANGLE_JOB_WORKERS`` jobs run at a time and submissions beyond
+``ANGLE_JOB_MAX_PENDING`` unfinished jobs are refused.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Literal
+
+import pandas as pd
+
+from elbow_rehab.service.angle_cache import SessionFingerprint
+from elbow_rehab.service.logger import get_logger
+
+logger = get_logger()
+
+ANGLE_JOB_WORKERS = int(os.getenv("ANGLE_JOB_WORKERS", str(os.cpu_count() or 1)))
+ANGLE_JOB_MAX_PENDING = int(os.getenv("ANGLE_JOB_MAX_PENDING", "64"))
+# Finished jobs (and their results) are forgotten after this long
+ANGLE_JOB_RESULT_TTL_S = float(os.getenv("ANGLE_JOB_RESULT_TTL_S", "600"))
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+@dataclass(frozen=True)
+class AngleJobSpec:
+    session_id: str
+    estimator_type: str
+    sample_rate: float
+    filter_type: str
+
+
+@dataclass
+class AngleJob:
+    job_id: str
+    spec: AngleJobSpec
+    fingerprint: SessionFingerprint
+    status: JobStatus = "queued"
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    error: str | None = None
+    result: pd.DataFrame | None = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "session_id": self.spec.session_id,
+            "estimator_type": self.spec.estimator_type,
+            "sample_rate": self.spec.sample_rate,
+            "filter_type": self.spec.filter_type,
+            "row_count": self.fingerprint.row_count,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class AngleJobQueueFull(Exception):
+    """Raised when accepting a job would exceed the pending-job bound."""
+
+    def __init__(self, retry_after_s: float):
+        super().__init__("Angle job queue is full")
+        self.retry_after_s = retry_after_s
+
+
+def run_angle_job(spec: AngleJobSpec, fingerprint: SessionFingerprint, executor: Executor):
+    """Processed angles for `spec`, with the filters run in `executor`.
+
+    Readings are fetched and the angle cache and checkpoints are updated in
+    the calling thread; only the filter computation is shipped to a worker.
+    """
+    from elbow_rehab.service.angle_calculation.incremental import (
+        process_session_angles_incremental,
+    )
+    from elbow_rehab.service.session_angles import get_session_angles
+
+    def compute(*args, **kwargs):
+        return executor.submit(process_session_angles_incremental, *args, **kwargs).result()
+
+    return get_session_angles(
+        spec.session_id,
+        estimator_type=spec.estimator_type,
+        sample_rate=spec.sample_rate,
+        filter_type=spec.filter_type,
+        fingerprint=fingerprint,
+        compute=compute,
+    )
+
+
+def _session_fingerprint(session_id: str) -> SessionFingerprint:
+    from elbow_rehab.service.storage.factory import get_reading_store
+
+    return get_reading_store().session_fingerprint(session_id)
+
+
+class AngleJobManager:
+    """Tracks angle jobs and runs at most `workers` of them at once."""
+
+    def __init__(
+        self,
+        run_job: Callable[[AngleJobSpec, SessionFingerprint, Executor], pd.DataFrame | None] = run_angle_job,
+        fingerprint: Callable[[str], SessionFingerprint] = _session_fingerprint,
+        executor_factory: Callable[[], Executor] | None = None,
+        *,
+        workers: int = ANGLE_JOB_WORKERS,
+        max_pending: int = ANGLE_JOB_MAX_PENDING,
+        result_ttl_s: float = ANGLE_JOB_RESULT_TTL_S,
+    ):
+        self._run_job = run_job
+        self._fingerprint = fingerprint
+        self._executor_factory = executor_factory or (
+            # spawn: forking a process that holds client threads is unsafe
+            lambda: ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        )
+        self._executor: Executor | None = None
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl_s = result_ttl_s
+
+        self._jobs: dict[str, AngleJob] = {}
+        self._in_flight: dict[tuple[AngleJobSpec, SessionFingerprint], AngleJob] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._slots: asyncio.Semaphore | None = None
+        # running mean of job duration, for Retry-After estimates
+        self._mean_duration_s = 1.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._executor_factory()
+        return self._executor
+
+    async def submit(self, spec: AngleJobSpec) -> AngleJob | None:
+        """Job computing `spec`; None if the session has no readings.
+
+        Returns the unfinished job for the same spec and session state if
+        there is one. Raises AngleJobQueueFull when too many jobs are pending.
+        """
+        self._purge()
+        fingerprint = await asyncio.to_thread(self._fingerprint, spec.session_id)
+        if fingerprint.row_count == 0:
+            return None
+
+        job = self._in_flight.get((spec, fingerprint))
+        if job is not None:
+            return job
+        if len(self._in_flight) >= self.max_pending:
+            waves = len(self._in_flight) / max(1, self.workers)
+            raise AngleJobQueueFull(retry_after_s=max(1.0, waves * self._mean_duration_s))
+
+        job = AngleJob(uuid.uuid4().hex, spec, fingerprint)
+        self._jobs[job.job_id] = job
+        self._in_flight[(spec, fingerprint)] = job
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> AngleJob | None:
+        self._purge()
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: AngleJob) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        try:
+            async with self._slots:
+                job.status = "running"
+                job.started_at = time.time()
+                job.result = await asyncio.to_thread(
+                    self._run_job, job.spec, job.fingerprint, self.executor
+                )
+            job.status = "succeeded"
+        except asyncio.CancelledError:
+            job.status, job.error = "failed", "Cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Angle job {job.job_id} failed: {e}")
+            job.status, job.error = "failed", str(e)
+        finally:
+            job.finished_at = time.time()
+            self._in_flight.pop((job.spec, job.fingerprint), None)
+            if job.started_at is not None:
+                duration = job.finished_at - job.started_at
+                self._mean_duration_s += 0.2 * (duration - self._mean_duration_s)
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.result_ttl_s
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        statuses = [job.status for job in self._jobs.values()]
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            **{status: statuses.count(status) for status in ("queued", "running", "succeeded", "failed")},
+        }
+
+    async def shutdown(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        for task in list(self._tasks):
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
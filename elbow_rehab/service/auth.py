@@ -1,14 +1,216 @@
-from fastapi import HTTPException, Security, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from firebase_admin import auth
-from typing import Annotated
-from fastapi import Depends
+"""Firebase ID token verification for request dependencies.
+
+Decoded claims are cached by token digest until the token's ``exp``, so a
+device uploading every second pays for one signature check per token
+lifetime. Verification runs in a worker thread against Google's public
+signing certificates, which `SigningKeys` fetches ahead of time and refreshes
+in the background before their ``Cache-Control`` max-age runs out.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Annotated, Callable
+
+from fastapi import Depends, HTTPException, Security, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from elbow_rehab.service.configure_infrastructure import initialize_firebase_admin
 from elbow_rehab.service.logger import get_logger
 
 logger = get_logger()
 
 security = HTTPBearer()
 
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+# Keys are refetched this long before Google says they go stale
+AUTH_KEYS_REFRESH_MARGIN_S = float(os.getenv("AUTH_KEYS_REFRESH_MARGIN_S", "300"))
+AUTH_KEYS_RETRY_S = float(os.getenv("AUTH_KEYS_RETRY_S", "30"))
+
+FIREBASE_CERTS_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509"
+    "/securetoken@system.gserviceaccount.com"
+)
+FIREBASE_ISSUER_PREFIX = "https://securetoken.google.com/"
+# Used when the certificate response carries no max-age
+DEFAULT_KEYS_MAX_AGE_S = 3600.0
+
+
+class TokenCache:
+    """Bounded LRU of decoded claims keyed by SHA-256 of the token, valid until ``exp``."""
+
+    def __init__(self, max_entries: int = AUTH_TOKEN_CACHE_SIZE, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # raw tokens are bearer credentials; never keep them as keys
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() < entry[1]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, claims: dict) -> None:
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)) or expires_at <= self._clock():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (claims, float(expires_at))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def parse_max_age(cache_control: str | None, default: float = DEFAULT_KEYS_MAX_AGE_S) -> float:
+    match = re.search(r"max-age=(\d+)", cache_control or "")
+    return float(match.group(1)) if match else default
+
+
+def fetch_firebase_certs() -> tuple[dict[str, str], float]:
+    """Google's current ``{kid: PEM certificate}`` map and how long it stays valid (s)."""
+    import google.auth.transport.requests
+
+    response = google.auth.transport.requests.Request()(FIREBASE_CERTS_URL, method="GET")
+    if response.status != 200:
+        raise RuntimeError(f"Fetching Firebase signing keys failed: HTTP {response.status}")
+    return json.loads(response.data), parse_max_age(response.headers.get("cache-control"))
+
+
+class SigningKeys:
+    """Public certificates for Firebase ID tokens, refreshed in the background.
+
+    `certs()` only fetches on the request path if the background refresh has
+    not run yet or has been failing past the certificates' max-age.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], tuple[dict[str, str], float]] = fetch_firebase_certs,
+        *,
+        refresh_margin_s: float = AUTH_KEYS_REFRESH_MARGIN_S,
+        retry_s: float = AUTH_KEYS_RETRY_S,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._fetch = fetch
+        self.refresh_margin_s = refresh_margin_s
+        self.retry_s = retry_s
+        self._clock = clock
+        self._certs: dict[str, str] | None = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._runner: asyncio.Task | None = None
+
+    def certs(self) -> dict[str, str]:
+        with self._lock:
+            if self._certs is None or self._clock() >= self._expires_at:
+                self._refresh_locked()
+            return self._certs
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self) -> None:
+        certs, max_age_s = self._fetch()
+        self._certs = certs
+        self._expires_at = self._clock() + max_age_s
+
+    def seconds_until_refresh(self) -> float:
+        if self._certs is None:
+            return 0.0
+        return max(0.0, self._expires_at - self.refresh_margin_s - self._clock())
+
+    async def start(self) -> None:
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._runner
+        self._runner = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.seconds_until_refresh())
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Refreshing Firebase signing keys failed: {e}")
+                await asyncio.sleep(self.retry_s)
+
+
+def verify_firebase_token(token: str, certs: dict[str, str], project_id: str) -> dict:
+    """Decoded claims of a Firebase ID token, with the checks firebase_admin applies.
+
+    Raises ValueError (or a google.auth error) if the token is invalid.
+    """
+    from google.auth import jwt
+
+    header = jwt.decode_header(token)
+    if header.get("alg") != "RS256":
+        raise ValueError(f"Unexpected token algorithm: {header.get('alg')}")
+    if header.get("kid") not in certs:
+        raise ValueError("Token signed with an unknown key")
+
+    # checks the signature, 'iat', 'exp' and 'aud'
+    claims = jwt.decode(token, certs=certs, audience=project_id)
+    if claims.get("iss") != FIREBASE_ISSUER_PREFIX + project_id:
+        raise ValueError(f"Unexpected token issuer: {claims.get('iss')}")
+    subject = claims.get("sub")
+    if not isinstance(subject, str) or not subject or len(subject) > 128:
+        raise ValueError("Token has an invalid subject")
+    claims["uid"] = subject
+    return claims
+
+
+@functools.lru_cache(maxsize=1)
+def firebase_project_id() -> str:
+    return initialize_firebase_admin().get_app().project_id
+
+
+token_cache = TokenCache()
+signing_keys = SigningKeys()
+
+
+def verify_token(token: str) -> dict:
+    if os.getenv("FIREBASE_AUTH_EMULATOR_HOST"):
+        # emulator tokens are unsigned; firebase_admin knows how to accept them
+        from firebase_admin import auth
+
+        initialize_firebase_admin()
+        return auth.verify_id_token(token)
+    return verify_firebase_token(token, signing_keys.certs(), firebase_project_id())
+
 
 async def get_firebase_user_from_token(
     res: HTTPAuthorizationCredentials = Security(security),
@@ -16,15 +218,27 @@ async def get_firebase_user_from_token(
     """
     Decodes the Firebase ID Token and returns the decoded token
     """
-    try:
-        decoded_token = auth.verify_id_token(res.credentials)
+    return await authenticate_token(res.credentials)
+
+
+async def authenticate_token(token: str) -> dict:
+    """
+    Decoded claims of a Firebase ID token, from the cache when possible;
+    raises 401 when the token is invalid
+    """
+    decoded_token = token_cache.get(token)
+    if decoded_token is not None:
         return decoded_token
+    try:
+        decoded_token = await asyncio.to_thread(verify_token, token)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid authentication: {str(e)}",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    token_cache.put(token, decoded_token)
+    return decoded_token
 
 
 async def get_user_id(user: Annotated[dict, Depends(get_firebase_user_from_token)]):
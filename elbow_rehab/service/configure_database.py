@@ -1,74 +1,146 @@
-import os
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-from firebase_admin import auth, credentials, initialize_app
+import time
+from functools import lru_cache
+
 from elbow_rehab.service.logger import get_logger
-from elbow_rehab.service.configure_infrastructure import require_env
+from elbow_rehab.service.user_sync import (
+    USER_SYNC_OVERLAP_MS,
+    UserSyncResult,
+    select_changed_users,
+)
+from elbow_rehab.service.configure_infrastructure import (
+    initialize_firebase_admin,
+    require_env,
+)
 
 logger = get_logger()
 
-# 1. Initialize Firebase (Ensure this is called once)
-# If running on Google Cloud, it uses default credentials automatically
-try:
-    initialize_app()
-except ValueError:
-    pass
 
-socket_path = require_env("INSTANCE_UNIX_SOCKET")
-db_user = require_env("DB_USER")
-db_pass = require_env("DB_PASS")
-db_name = require_env("DB_NAME")
+@lru_cache(maxsize=1)
+def get_engine():
+    """SQLAlchemy engine, created on first use (SQLAlchemy is imported then too)."""
+    from sqlalchemy import create_engine
 
-DATABASE_URL = (
-    f"postgresql+psycopg2://{db_user}:{db_pass}@/{db_name}?host={socket_path}"
-)
+    socket_path = require_env("INSTANCE_UNIX_SOCKET")
+    db_user = require_env("DB_USER")
+    db_pass = require_env("DB_PASS")
+    db_name = require_env("DB_NAME")
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=5,
-    max_overflow=2,
-    pool_timeout=30,
-)
+    database_url = (
+        f"postgresql+psycopg2://{db_user}:{db_pass}@/{db_name}?host={socket_path}"
+    )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-
-def sync_firebase_users_to_db():
-    # Create a new database session
-    db = SessionLocal()
-
-    try:
-        # Fetch users from Firebase
-        page = auth.list_users()
-        while page:
-            for user in page.users:
-                logger.info(f"Syncing User: {user.email}")
-                # Prepare the SQL Insert statement
-                # We use "ON CONFLICT" to avoid errors if the user already exists
-                query = text("""
-                    INSERT INTO users (uid, email, role)
-                    VALUES (:uid, :email, :role)
-                    ON CONFLICT (uid) DO NOTHING
-                """)
+    return create_engine(
+        database_url,
+        pool_size=5,
+        max_overflow=2,
+        pool_timeout=30,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_session_factory():
+    from sqlalchemy.orm import sessionmaker
+
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
 
-                # Execute the query using the session
-                # Note: 'role' is required by your schema; we'll default to 'patient'
-                db.execute(
-                    query, {"uid": user.uid, "email": user.email, "role": "patient"}
-                )
 
-                logger.info(f"Synced User: {user.email}")
+# Arbitrary key for pg_try_advisory_lock; one instance syncs at a time.
+USER_SYNC_LOCK_KEY = 7_311_001
+USER_SYNC_STATE_NAME = "firebase_users"
 
-            page = page.get_next_page()
 
-        # 3. Commit the transaction to save changes
-        db.commit()
-        logger.info("Synchronization complete.")
+def upsert_users_statement(rows: list[dict]):
+    """One multi-row upsert; existing users are only touched when the email changed."""
+    from sqlalchemy import column, table
+    from sqlalchemy.dialects.postgresql import insert
 
-    except Exception as e:
-        # Rollback if something goes wrong to keep data consistent
-        db.rollback()
-        logger.error(f"Error during sync: {e}")
-    finally:
-        # 4. Always close the session when finished
-        db.close()
+    users = table("users", column("uid"), column("email"), column("role"))
+    statement = insert(users).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=["uid"],
+        set_={"email": statement.excluded.email},
+        where=users.c.email.is_distinct_from(statement.excluded.email),
+    )
+
+
+def sync_firebase_users_to_db() -> UserSyncResult:
+    """Upsert Firebase users changed since the stored high-water mark.
+
+    Pages are committed as they are written; the mark only advances once the
+    whole listing succeeded, because Firebase pages by uid, not by time.
+    """
+    from firebase_admin import auth
+    from sqlalchemy import text
+
+    # If running on Google Cloud, Firebase uses default credentials automatically
+    initialize_firebase_admin()
+
+    with get_engine().connect() as conn:
+        locked = conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": USER_SYNC_LOCK_KEY}
+        ).scalar()
+        if not locked:
+            logger.info("Firebase user sync is running on another instance")
+            return UserSyncResult(skipped=True)
+        try:
+            conn.execute(
+                text("""
+                    CREATE TABLE IF NOT EXISTS sync_state (
+                        name TEXT PRIMARY KEY,
+                        high_water_mark_ms BIGINT NOT NULL,
+                        synced_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                    )
+                """)
+            )
+            high_water_mark_ms = conn.execute(
+                text("SELECT high_water_mark_ms FROM sync_state WHERE name = :name"),
+                {"name": USER_SYNC_STATE_NAME},
+            ).scalar() or 0
+            conn.commit()
+
+            result = UserSyncResult(high_water_mark_ms=high_water_mark_ms)
+            listing_started_ms = int(time.time() * 1000)
+            page = auth.list_users()
+            while page:
+                rows, newest = select_changed_users(page.users, high_water_mark_ms)
+                if rows:
+                    conn.execute(upsert_users_statement(rows))
+                    conn.commit()
+                result.users_seen += len(page.users)
+                result.users_written += len(rows)
+                result.high_water_mark_ms = max(result.high_water_mark_ms, newest)
+                page = page.get_next_page()
+
+            # A user created mid-listing on an already listed page would sit
+            # below a mark taken from later pages; never move it past the start.
+            result.high_water_mark_ms = max(
+                high_water_mark_ms,
+                min(result.high_water_mark_ms, listing_started_ms - USER_SYNC_OVERLAP_MS),
+            )
+
+            conn.execute(
+                text("""
+                    INSERT INTO sync_state (name, high_water_mark_ms, synced_at)
+                    VALUES (:name, :mark, now())
+                    ON CONFLICT (name) DO UPDATE
+                    SET high_water_mark_ms = EXCLUDED.high_water_mark_ms,
+                        synced_at = EXCLUDED.synced_at
+                """),
+                {"name": USER_SYNC_STATE_NAME, "mark": result.high_water_mark_ms},
+            )
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            # Never let a failed unlock hide the error of the sync itself.
+            # Closing the connection instead of pooling it releases the lock.
+            try:
+                conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": USER_SYNC_LOCK_KEY}
+                )
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Releasing the Firebase user sync lock failed: {e}")
+                conn.invalidate()
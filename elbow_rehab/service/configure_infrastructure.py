@@ -7,16 +7,18 @@ Returns:
     _type_: _description_
 """
 
+from __future__ import annotations
+
 import os
 import pathlib
-import firebase_admin
-import pandas as pd
-
+from typing import TYPE_CHECKING
 
-from google.cloud import bigquery
-from google.api_core.exceptions import NotFound  # pyright: ignore[reportMissingImports]
 from elbow_rehab.service.logger import get_logger
 
+# google-cloud and firebase are imported on first use to keep cold starts fast
+if TYPE_CHECKING:
+    from google.cloud import bigquery
+
 logger = get_logger()
 
 
@@ -28,21 +30,20 @@ def require_env(name: str) -> str:
     return value
 
 
-PROJECT_ID = require_env("PROJECT_ID")
-OUTPUT_DATASET = require_env("OUTPUT_DATASET")
-OUTPUT_TABLE = require_env("OUTPUT_TABLE")
-
-
 def get_table_id() -> str:
-    return f"{PROJECT_ID}.{OUTPUT_DATASET}.{OUTPUT_TABLE}"
+    return f"{require_env('PROJECT_ID')}.{require_env('OUTPUT_DATASET')}.{require_env('OUTPUT_TABLE')}"
 
 
 def initialize_bigquery_client(project_id: str):
+    from google.cloud import bigquery
+
     logger.info(f"Initializing BigQuery client for project: {project_id}")
     return bigquery.Client(project=project_id)
 
 
 def initialize_firebase_admin():
+    import firebase_admin
+
     if not firebase_admin._apps:
         logger.info("Initializing Firebase admin")
         firebase_admin.initialize_app()
@@ -53,6 +54,8 @@ def ensure_infrastructure_exists(
     bq_client: bigquery.Client, project_id: str, output_dataset: str, output_table: str
 ):
     """Checks if Dataset and Table exist, creates them if not."""
+    from google.api_core.exceptions import NotFound  # pyright: ignore[reportMissingImports]
+
     # Create Dataset if missing
     dataset_id = f"{project_id}.{output_dataset}"
     try:
@@ -1,5 +1,7 @@
-from pydantic import BaseModel, model_validator
+import numpy as np
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError, model_validator
 from datetime import datetime
+from typing_extensions import TypedDict
 
 
 class ImuReading(BaseModel):
@@ -33,3 +35,111 @@ class ImuReading(BaseModel):
         values["ingestion_timestamp_iso"] = datetime.utcnow()
 
         return values
+
+
+class ImuReadingPayload(TypedDict):
+    """Fields a device sends per reading; the rest of ImuReading is derived."""
+
+    __pydantic_config__ = ConfigDict(allow_inf_nan=False)
+
+    session_time_iso: str
+    esp32_ms_A: int
+    esp32_ms_B: int
+    ax_A: float
+    ay_A: float
+    az_A: float
+    gx_A: float
+    gy_A: float
+    gz_A: float
+    ax_B: float
+    ay_B: float
+    az_B: float
+    gx_B: float
+    gy_B: float
+    gz_B: float
+
+
+imu_payload_batch_adapter = TypeAdapter(list[ImuReadingPayload])
+
+IMU_INT_FIELDS = ("esp32_ms_A", "esp32_ms_B")
+IMU_FLOAT_FIELDS = tuple(
+    name
+    for name, annotation in ImuReadingPayload.__annotations__.items()
+    if annotation is float
+)
+
+# One packed little-endian binary record: ESP32 millis() counters are
+# uint32 and the IMU samples are float32 on the device.
+IMU_RECORD_DTYPE = np.dtype(
+    [(name, "<u4") for name in IMU_INT_FIELDS]
+    + [(name, "<f4") for name in IMU_FLOAT_FIELDS]
+)
+
+
+class ImuBatchValidationError(ValueError):
+    """A reading in a batch failed validation; `index` is its position."""
+
+    def __init__(self, index: int | None, message: str):
+        super().__init__(message)
+        self.index = index
+
+
+def validate_imu_readings(raw_readings: list[dict], user_id: str) -> list[dict]:
+    """
+    Validate a whole upload in one pass and return rows shaped like
+    `ImuReading(...).model_dump(mode="json")`.
+
+    The derived `session_id` and `ingestion_timestamp_iso` are computed once
+    per batch instead of once per row.
+    """
+    try:
+        payloads = imu_payload_batch_adapter.validate_python(raw_readings)
+    except ValidationError as e:
+        error = e.errors()[0]
+        loc = error["loc"]
+        index = loc[0] if loc and isinstance(loc[0], int) else None
+        field = ".".join(str(part) for part in loc[1:])
+        raise ImuBatchValidationError(index, f"{field}: {error['msg']}") from e
+
+    ingestion_timestamp_iso = _ingestion_timestamp_iso()
+    session_ids: dict[str, str] = {}
+    rows = []
+    for payload in payloads:
+        session_time_iso = payload["session_time_iso"]
+        session_id = session_ids.get(session_time_iso)
+        if session_id is None:
+            session_id = session_ids[session_time_iso] = f"{user_id}_{session_time_iso}"
+        rows.append(
+            {
+                "user_id": user_id,
+                "session_time_iso": session_time_iso,
+                "session_id": session_id,
+                "ingestion_timestamp_iso": ingestion_timestamp_iso,
+                **payload,
+            }
+        )
+    return rows
+
+
+def _ingestion_timestamp_iso() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def rows_from_columns(
+    user_id: str, session_time_iso: str, columns: dict[str, list]
+) -> list[dict]:
+    """
+    Expand already-validated numeric columns of one session into rows shaped
+    like `validate_imu_readings` output, for the same downstream writer.
+    """
+    header = {
+        "user_id": user_id,
+        "session_time_iso": session_time_iso,
+        "session_id": f"{user_id}_{session_time_iso}",
+        "ingestion_timestamp_iso": _ingestion_timestamp_iso(),
+    }
+    names = IMU_INT_FIELDS + IMU_FLOAT_FIELDS
+    return [
+        {**header, **dict(zip(names, values))}
+        for values in zip(*(columns[name] for name in names))
+    ]
@@ -0,0 +1,109 @@
+"""Import-time profile of the service, to track cold-start cost between releases.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter and
+aggregates the self time of every imported module by top-level package::
+
+    python -m elbow_rehab.service.import_profile
+    python -m elbow_rehab.service.import_profile --module elbow_rehab.service.main --json
+
+The environment is passed through, so set whatever the module needs at import.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+
+DEFAULT_MODULE = "elbow_rehab.service.main"
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> list[ImportTiming]:
+    """Parse ``-X importtime`` lines: ``import time: self [us] | cumulative | name``."""
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        module = name.lstrip()
+        timings.append(
+            ImportTiming(
+                module=module,
+                self_us=int(parts[0]),
+                cumulative_us=int(parts[1]),
+                depth=(len(name) - len(module) - 1) // 2,
+            )
+        )
+    return timings
+
+
+def profile_imports(module: str = DEFAULT_MODULE) -> list[ImportTiming]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def summarize(timings: list[ImportTiming], top: int = 25) -> dict:
+    """Total time, self time per top-level package and the slowest single modules."""
+    by_package: dict[str, int] = defaultdict(int)
+    for timing in timings:
+        by_package[timing.module.split(".")[0]] += timing.self_us
+    packages = sorted(by_package.items(), key=lambda item: item[1], reverse=True)
+    modules = sorted(timings, key=lambda t: t.self_us, reverse=True)[:top]
+    return {
+        "total_us": sum(t.self_us for t in timings),
+        "modules_imported": len(timings),
+        "packages": [{"package": name, "self_us": us} for name, us in packages[:top]],
+        "slowest_modules": [asdict(t) for t in modules],
+    }
+
+
+def format_report(summary: dict) -> str:
+    lines = [
+        f"Total import time: {summary['total_us'] / 1000:.1f} ms "
+        f"({summary['modules_imported']} modules)",
+        "",
+        f"{'package':<40}{'self ms':>10}",
+    ]
+    for row in summary["packages"]:
+        lines.append(f"{row['package']:<40}{row['self_us'] / 1000:>10.1f}")
+    lines += ["", f"{'module':<60}{'self ms':>10}{'cumul ms':>10}"]
+    for row in summary["slowest_modules"]:
+        lines.append(
+            f"{row['module']:<60}{row['self_us'] / 1000:>10.1f}{row['cumulative_us'] / 1000:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args(argv)
+
+    summary = summarize(profile_imports(args.module), top=args.top)
+    print(json.dumps(summary, indent=2) if args.json else format_report(summary))
+
+
+if __name__ == "__main__":
+    main()
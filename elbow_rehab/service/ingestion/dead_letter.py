@@ -0,0 +1,50 @@
+"""Durable parking place for acknowledged rows the warehouse keeps rejecting.
+
+Rows are only dead-lettered after they were accepted from a device, so they
+must not be dropped: each failed batch becomes one fsync'd JSON line
+``{"failed_at": ..., "reason": ..., "rows": [...]}`` that can be inspected
+and re-submitted by hand.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+class DeadLetterLog:
+    """Append-only JSON-lines file of rejected batches."""
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.rows_written = 0
+        self.batches_written = 0
+
+    def append(self, rows: list[dict], reason: str) -> None:
+        """Durably record `rows`; returns only after fsync."""
+        record = {
+            "failed_at": datetime.now(timezone.utc).isoformat(),
+            "reason": reason,
+            "rows": rows,
+        }
+        line = json.dumps(record, separators=(",", ":"), default=str).encode() + b"\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.rows_written += len(rows)
+            self.batches_written += 1
+
+    def read(self) -> list[dict]:
+        """All records written so far, oldest first."""
+        try:
+            with open(self.path, "rb") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
@@ -0,0 +1,193 @@
+"""Per-session suppression of re-sent IMU frames.
+
+Devices retry uploads whose response they never saw, which used to write the
+same frames again. :class:`IngestionDeduplicator` remembers the most recent
+``(esp32_ms_A, esp32_ms_B)`` pairs of each session (``DEDUP_WINDOW_FRAMES``
+per session, ``DEDUP_MAX_FRAMES`` in total, least recently written sessions
+evicted first) and, when the client numbers its batches, the batch sequence
+numbers already accepted. The index is per process: a retry routed to another
+instance is only caught if that instance saw the original.
+
+Frames recorded by `filter()` stay in flight until the caller reports the
+write with `commit()` or `forget()`. A concurrent request that repeats an
+in-flight frame raises :class:`BatchInFlight` rather than being acknowledged
+as a duplicate: if the first write failed, the frames would be lost.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from elbow_rehab.service.ingestion.settings import (
+    DEDUP_MAX_BATCH_SEQS,
+    DEDUP_MAX_FRAMES,
+    DEDUP_WINDOW_FRAMES,
+)
+
+
+# Values of the per-session frame and batch-sequence indexes
+_IN_FLIGHT = True
+_WRITTEN = False
+
+
+class BatchInFlight(Exception):
+    """Part of the batch is still being written by another request."""
+
+    def __init__(self, retry_after_s: float = 1.0):
+        super().__init__("These readings are still being written, retry later")
+        self.retry_after_s = retry_after_s
+
+
+def frame_key(row: dict) -> int:
+    """Both 32-bit device clocks packed into one int."""
+    return (int(row["esp32_ms_A"]) << 32) | (int(row["esp32_ms_B"]) & 0xFFFFFFFF)
+
+
+@dataclass
+class DedupResult:
+    rows: list[dict]
+    duplicates: int = 0
+    replayed_batch: bool = False
+    # what was recorded, so a failed write can be forgotten again
+    recorded: dict[str, list[int]] = field(default_factory=dict, repr=False)
+    batch_seq: int | None = None
+    session_ids: frozenset[str] = frozenset()
+
+
+class _SessionIndex:
+    __slots__ = ("frames", "batch_seqs")
+
+    def __init__(self):
+        self.frames: OrderedDict[int, bool] = OrderedDict()
+        self.batch_seqs: OrderedDict[int, bool] = OrderedDict()
+
+
+class IngestionDeduplicator:
+    """Drops frames (and numbered batches) a session has already sent."""
+
+    def __init__(
+        self,
+        *,
+        window_frames: int = DEDUP_WINDOW_FRAMES,
+        max_frames: int = DEDUP_MAX_FRAMES,
+        max_batch_seqs: int = DEDUP_MAX_BATCH_SEQS,
+    ):
+        self.window_frames = window_frames
+        self.max_frames = max_frames
+        self.max_batch_seqs = max_batch_seqs
+        self._sessions: OrderedDict[str, _SessionIndex] = OrderedDict()
+        self._frames = 0
+        self._lock = threading.Lock()
+
+        self.duplicates = 0
+        self.replayed_batches = 0
+        self.in_flight_conflicts = 0
+
+    def filter(self, rows: list[dict], batch_seq: int | None = None) -> DedupResult:
+        """New rows of `rows`, recording them as in flight.
+
+        A `batch_seq` already accepted for every session in `rows` marks the
+        whole batch as a replay. Raises BatchInFlight, recording nothing, if
+        any frame or the `batch_seq` belongs to a write not yet reported.
+        Call `commit()` with the result once the new rows are written, or
+        `forget()` if they could not be, so the client's retry is accepted.
+        """
+        with self._lock:
+            session_ids = frozenset(row["session_id"] for row in rows)
+            self._check_not_in_flight(rows, session_ids, batch_seq)
+            if batch_seq is not None and session_ids and all(
+                sid in self._sessions and batch_seq in self._sessions[sid].batch_seqs
+                for sid in session_ids
+            ):
+                self.replayed_batches += 1
+                self.duplicates += len(rows)
+                return DedupResult([], duplicates=len(rows), replayed_batch=True)
+
+            result = DedupResult([], batch_seq=batch_seq, session_ids=session_ids)
+            for row in rows:
+                session_id = row["session_id"]
+                index = self._index(session_id)
+                key = frame_key(row)
+                if key in index.frames:
+                    result.duplicates += 1
+                    continue
+                index.frames[key] = _IN_FLIGHT
+                self._frames += 1
+                result.recorded.setdefault(session_id, []).append(key)
+                result.rows.append(row)
+                if len(index.frames) > self.window_frames:
+                    index.frames.popitem(last=False)
+                    self._frames -= 1
+
+            if batch_seq is not None:
+                for session_id in session_ids:
+                    batch_seqs = self._index(session_id).batch_seqs
+                    batch_seqs[batch_seq] = _IN_FLIGHT
+                    if len(batch_seqs) > self.max_batch_seqs:
+                        batch_seqs.popitem(last=False)
+
+            self._evict()
+            self.duplicates += result.duplicates
+            return result
+
+    def _check_not_in_flight(self, rows, session_ids, batch_seq) -> None:
+        def in_flight(session_id, table, key):
+            index = self._sessions.get(session_id)
+            return index is not None and getattr(index, table).get(key, _WRITTEN)
+
+        if (
+            batch_seq is not None
+            and any(in_flight(sid, "batch_seqs", batch_seq) for sid in session_ids)
+        ) or any(in_flight(row["session_id"], "frames", frame_key(row)) for row in rows):
+            self.in_flight_conflicts += 1
+            raise BatchInFlight()
+
+    def commit(self, result: DedupResult) -> None:
+        """Mark what `filter()` recorded as written; repeats are duplicates from now on."""
+        with self._lock:
+            for session_id, index in self._recorded_indexes(result):
+                for key in result.recorded.get(session_id, ()):
+                    if key in index.frames:
+                        index.frames[key] = _WRITTEN
+                if result.batch_seq in index.batch_seqs:
+                    index.batch_seqs[result.batch_seq] = _WRITTEN
+
+    def forget(self, result: DedupResult) -> None:
+        """Undo what `filter()` recorded for a batch that was not written."""
+        with self._lock:
+            for session_id, index in self._recorded_indexes(result):
+                for key in result.recorded.get(session_id, ()):
+                    if index.frames.get(key):
+                        del index.frames[key]
+                        self._frames -= 1
+                if index.batch_seqs.get(result.batch_seq):
+                    del index.batch_seqs[result.batch_seq]
+
+    def _recorded_indexes(self, result: DedupResult):
+        for session_id in result.session_ids:
+            index = self._sessions.get(session_id)
+            if index is not None:
+                yield session_id, index
+
+    def _index(self, session_id: str) -> _SessionIndex:
+        index = self._sessions.get(session_id)
+        if index is None:
+            index = self._sessions[session_id] = _SessionIndex()
+        self._sessions.move_to_end(session_id)
+        return index
+
+    def _evict(self) -> None:
+        while self._frames > self.max_frames and len(self._sessions) > 1:
+            _, index = self._sessions.popitem(last=False)
+            self._frames -= len(index.frames)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "frames": self._frames,
+            "duplicates": self.duplicates,
+            "replayed_batches": self.replayed_batches,
+            "in_flight_conflicts": self.in_flight_conflicts,
+        }
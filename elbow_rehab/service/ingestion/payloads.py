@@ -0,0 +1,182 @@
+"""Decoders for the IMU upload formats accepted by POST /imu/readings.
+
+* ``application/json`` - a list of per-reading objects (the original format).
+* ``application/vnd.elbow-rehab.columns+json`` - one session header plus one
+  array per field: ``{"session_time_iso": ..., "columns": {"ax_A": [...], ...}}``.
+* ``application/vnd.elbow-rehab.imu-v1`` - packed little-endian records of
+  :data:`IMU_RECORD_DTYPE`, with the session start in the
+  ``X-Session-Time-Iso`` header; decoded zero-copy with ``np.frombuffer``.
+
+Every decoder returns rows in the shape produced by
+:func:`validate_imu_readings`, so all formats feed the same writer.
+"""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+
+from elbow_rehab.service.domain.imu_reading import (
+    IMU_FLOAT_FIELDS,
+    IMU_INT_FIELDS,
+    IMU_RECORD_DTYPE,
+    ImuBatchValidationError,
+    rows_from_columns,
+    validate_imu_readings,
+)
+
+JSON_CONTENT_TYPE = "application/json"
+COLUMNS_CONTENT_TYPE = "application/vnd.elbow-rehab.columns+json"
+BINARY_CONTENT_TYPE = "application/vnd.elbow-rehab.imu-v1"
+SESSION_TIME_HEADER = "X-Session-Time-Iso"
+
+
+class UnsupportedPayloadType(ValueError):
+    """The upload's Content-Type is not one of the supported formats."""
+
+
+def decode_imu_upload(
+    content_type: str | None,
+    body: bytes,
+    user_id: str,
+    session_time_iso: str | None = None,
+) -> list[dict]:
+    """Decode and validate an upload; raises ImuBatchValidationError on bad data."""
+    media_type = (content_type or JSON_CONTENT_TYPE).split(";")[0].strip().lower()
+
+    if media_type == BINARY_CONTENT_TYPE:
+        return decode_binary_readings(body, user_id, session_time_iso)
+
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise ImuBatchValidationError(None, f"Malformed JSON body: {e}") from e
+
+    if media_type == JSON_CONTENT_TYPE:
+        if not isinstance(payload, list):
+            raise ImuBatchValidationError(None, "Expected a list of readings")
+        return validate_imu_readings(payload, user_id)
+    if media_type == COLUMNS_CONTENT_TYPE:
+        return decode_columnar_readings(payload, user_id)
+    raise UnsupportedPayloadType(f"Unsupported content type: {media_type}")
+
+
+def decode_columnar_readings(payload: dict, user_id: str) -> list[dict]:
+    if not isinstance(payload, dict) or not isinstance(payload.get("columns"), dict):
+        raise ImuBatchValidationError(None, "Expected session_time_iso and columns")
+    session_time_iso = payload.get("session_time_iso")
+    if not isinstance(session_time_iso, str):
+        raise ImuBatchValidationError(None, "session_time_iso: Field required")
+
+    raw_columns = payload["columns"]
+    missing = [
+        name for name in IMU_INT_FIELDS + IMU_FLOAT_FIELDS if name not in raw_columns
+    ]
+    if missing:
+        raise ImuBatchValidationError(None, f"Missing columns: {', '.join(missing)}")
+
+    columns = {}
+    for name in IMU_INT_FIELDS:
+        columns[name] = _coerce_column(name, raw_columns[name], integer=True)
+    for name in IMU_FLOAT_FIELDS:
+        columns[name] = _coerce_column(name, raw_columns[name], integer=False)
+
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) != 1:
+        raise ImuBatchValidationError(None, "All columns must have the same length")
+
+    return rows_from_columns(
+        user_id, session_time_iso, {k: v.tolist() for k, v in columns.items()}
+    )
+
+
+def decode_binary_readings(
+    body: bytes, user_id: str, session_time_iso: str | None
+) -> list[dict]:
+    if not session_time_iso:
+        raise ImuBatchValidationError(None, f"{SESSION_TIME_HEADER} header is required")
+    if len(body) % IMU_RECORD_DTYPE.itemsize:
+        raise ImuBatchValidationError(
+            len(body) // IMU_RECORD_DTYPE.itemsize,
+            f"Body is not a whole number of {IMU_RECORD_DTYPE.itemsize}-byte records",
+        )
+
+    records = np.frombuffer(body, dtype=IMU_RECORD_DTYPE)
+    columns = {name: records[name].tolist() for name in IMU_INT_FIELDS}
+    for name in IMU_FLOAT_FIELDS:
+        _check_finite(name, records[name])
+        columns[name] = _float32_values(records[name])
+    return rows_from_columns(user_id, session_time_iso, columns)
+
+
+def _float32_values(column: np.ndarray) -> list[float]:
+    """float32 samples as the shortest decimals that round-trip, so 0.1 is
+    stored as 0.1 rather than its widened 0.10000000149011612.
+
+    Each sample is rounded to 6, 7, 8 and then 9 significant digits and keeps
+    the first that reads back as the same float32 (9 always does).
+    """
+    widened = column.astype(np.float64)
+    values = widened.copy()
+    with np.errstate(divide="ignore"):
+        exponent = np.floor(np.log10(np.abs(widened)))
+    exponent[~np.isfinite(exponent)] = 0  # zeros
+
+    pending = np.arange(len(column))
+    for digits in (6, 7, 8, 9):
+        shift = digits - 1 - exponent[pending]
+        # Scale by an exact power of ten: multiply for small, divide for large
+        up = 10.0 ** np.maximum(shift, 0)
+        down = 10.0 ** np.maximum(-shift, 0)
+        rounded = np.round(widened[pending] * up / down) * down / up
+        exact = rounded.astype(np.float32) == column[pending]
+        values[pending[exact]] = rounded[exact]
+        pending = pending[~exact]
+        if not len(pending):
+            break
+    return values.tolist()
+
+
+def _check_finite(name: str, column: np.ndarray) -> None:
+    nonfinite = ~np.isfinite(column)
+    if nonfinite.any():
+        raise ImuBatchValidationError(
+            int(np.argmax(nonfinite)), f"{name}: Input should be a finite number"
+        )
+
+
+def _coerce_column(name: str, values, *, integer: bool) -> np.ndarray:
+    if not isinstance(values, list):
+        raise ImuBatchValidationError(None, f"{name}: Expected an array")
+    # np.asarray would turn null into NaN; reject it as the row format does
+    if None in values:
+        raise ImuBatchValidationError(
+            values.index(None), f"{name}: Input should be a valid number"
+        )
+    try:
+        column = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ImuBatchValidationError(
+            _first_bad_index(values), f"{name}: Input should be a valid number"
+        )
+    if column.ndim != 1:
+        raise ImuBatchValidationError(None, f"{name}: Expected a flat array")
+    _check_finite(name, column)
+    if integer:
+        fractional = column != np.floor(column)
+        if fractional.any():
+            raise ImuBatchValidationError(
+                int(np.argmax(fractional)), f"{name}: Input should be a valid integer"
+            )
+        return column.astype(np.int64)
+    return column
+
+
+def _first_bad_index(values: list) -> int | None:
+    for index, value in enumerate(values):
+        try:
+            float(value)
+        except (TypeError, ValueError):
+            return index
+    return None
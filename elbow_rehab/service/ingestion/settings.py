@@ -0,0 +1,35 @@
+"""Tunables for the ingestion write path, overridable through the environment."""
+
+import os
+import tempfile
+
+WRITER_MAX_BATCH_ROWS = int(os.getenv("INGEST_MAX_BATCH_ROWS", "500"))
+WRITER_MAX_BATCH_AGE_S = float(os.getenv("INGEST_MAX_BATCH_AGE_S", "0.5"))
+WRITER_MAX_QUEUE_ROWS = int(os.getenv("INGEST_MAX_QUEUE_ROWS", "50000"))
+WRITER_MAX_CONCURRENT_FLUSHES = int(os.getenv("INGEST_MAX_CONCURRENT_FLUSHES", "4"))
+WRITER_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))
+WRITER_RETRY_AFTER_S = float(os.getenv("INGEST_RETRY_AFTER_S", "1.0"))
+
+# Write-ahead spool; leave INGEST_SPOOL_DIR unset to write through the
+# in-memory BatchWriter only.
+SPOOL_DIR = os.getenv("INGEST_SPOOL_DIR")
+SPOOL_SEGMENT_BYTES = int(os.getenv("INGEST_SPOOL_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+SPOOL_MAX_BYTES = int(os.getenv("INGEST_SPOOL_MAX_BYTES", str(1024 * 1024 * 1024)))
+SPOOL_REPLAY_POLL_S = float(os.getenv("INGEST_SPOOL_REPLAY_POLL_S", "0.5"))
+# Rejections (not outages) of one spooled record before it is dead-lettered
+SPOOL_MAX_ATTEMPTS = int(os.getenv("INGEST_SPOOL_MAX_ATTEMPTS", "5"))
+
+# Acknowledged rows the warehouse still rejects after retries end up here.
+# Without INGEST_DEAD_LETTER_PATH or a spool this is the temp directory, which
+# on Cloud Run is in memory and lost on restart (a warning is logged at startup).
+DEAD_LETTER_DURABLE = bool(os.getenv("INGEST_DEAD_LETTER_PATH") or SPOOL_DIR)
+DEAD_LETTER_PATH = os.getenv(
+    "INGEST_DEAD_LETTER_PATH",
+    os.path.join(SPOOL_DIR or tempfile.gettempdir(), "imu_dead_letter.jsonl"),
+)
+
+# Duplicate suppression: the (esp32_ms_A, esp32_ms_B) frames seen recently per
+# session, with a bound per session and across all sessions.
+DEDUP_WINDOW_FRAMES = int(os.getenv("INGEST_DEDUP_WINDOW_FRAMES", "10000"))
+DEDUP_MAX_FRAMES = int(os.getenv("INGEST_DEDUP_MAX_FRAMES", "500000"))
+DEDUP_MAX_BATCH_SEQS = int(os.getenv("INGEST_DEDUP_MAX_BATCH_SEQS", "1024"))
@@ -0,0 +1,368 @@
+"""Crash-safe local write-ahead spool for accepted IMU batches.
+
+:class:`SegmentSpool` appends each accepted batch as one checksummed line to
+the active segment file and fsyncs it before the request is acknowledged.
+Segments rotate by size. :class:`SpoolReplayer` drains segments to the
+warehouse in order, persisting a ``(segment, offset)`` checkpoint after
+every successful insert, so a restart resumes where it stopped. Delivery is
+at-least-once: a crash between an insert and its checkpoint replays that
+batch.
+
+Failures are split in two. Exceptions such as timeouts and 5xx responses
+are transient: the replayer keeps retrying them. Row-level errors returned
+by the insert, and 4xx exceptions, mean the data is rejected. For those, the
+batch is retried one record at a time. A record still rejected after
+`max_attempts` goes to the dead-letter log and the checkpoint moves past it,
+so one bad upload cannot block the spool behind it. A record that fails its
+checksum is copied verbatim to ``corrupt.records`` (prefixed with
+``<segment>@<offset> ``) before the replayer moves past it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+
+from elbow_rehab.service.logger import get_logger
+from elbow_rehab.service.ingestion.dead_letter import DeadLetterLog
+from elbow_rehab.service.ingestion.settings import (
+    SPOOL_MAX_ATTEMPTS,
+    SPOOL_MAX_BYTES,
+    SPOOL_REPLAY_POLL_S,
+    SPOOL_SEGMENT_BYTES,
+    WRITER_MAX_BATCH_ROWS,
+    WRITER_RETRY_AFTER_S,
+)
+from elbow_rehab.service.ingestion.writer import DeadLetter, IngestionQueueFull, InsertRows
+
+logger = get_logger()
+
+SEGMENT_SUFFIX = ".seg"
+CHECKPOINT_FILE = "checkpoint.json"
+DEAD_LETTER_FILE = "dead_letter.jsonl"
+CORRUPT_RECORDS_FILE = "corrupt.records"
+
+# Outcomes of one insert attempt
+_TRANSIENT = "transient"
+_REJECTED = "rejected"
+
+
+def _fsync_directory(directory: Path) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _is_rejection(error: Exception) -> bool:
+    """4xx API errors (bad rows, schema mismatch) will fail again on retry."""
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and 400 <= code < 500 and code not in (408, 429)
+
+
+def _encode_record(rows: list[dict]) -> bytes:
+    payload = json.dumps(rows, separators=(",", ":")).encode()
+    return b"%08x " % zlib.crc32(payload) + payload + b"\n"
+
+
+def _decode_record(line: bytes) -> list[dict] | None:
+    checksum, _, payload = line.partition(b" ")
+    try:
+        if int(checksum, 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+class SegmentSpool:
+    """Append-only, size-rotated segment files under `directory`."""
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        *,
+        max_segment_bytes: int = SPOOL_SEGMENT_BYTES,
+        max_bytes: int = SPOOL_MAX_BYTES,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        existing = self.segments()
+        self._disk_bytes = sum((self.directory / name).stat().st_size for name in existing)
+        # Always start a fresh segment so a torn tail left by a crash is
+        # confined to a sealed segment and never appended to.
+        self._next_seq = int(existing[-1].removesuffix(SEGMENT_SUFFIX)) + 1 if existing else 0
+        self._file = None
+        self._open_segment()
+
+    @property
+    def active_segment(self) -> str:
+        return self._active_name
+
+    @property
+    def disk_bytes(self) -> int:
+        return self._disk_bytes
+
+    def segments(self) -> list[str]:
+        return sorted(p.name for p in self.directory.glob(f"*{SEGMENT_SUFFIX}"))
+
+    def _open_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._active_name = f"{self._next_seq:012d}{SEGMENT_SUFFIX}"
+        self._next_seq += 1
+        self._file = open(self.directory / self._active_name, "ab")
+        self._active_bytes = 0
+        _fsync_directory(self.directory)
+
+    def append(self, rows: list[dict]) -> None:
+        """Durably append one batch; returns only after fsync."""
+        record = _encode_record(rows)
+        with self._lock:
+            if self._disk_bytes + len(record) > self.max_bytes:
+                raise IngestionQueueFull(WRITER_RETRY_AFTER_S)
+            if self._active_bytes and self._active_bytes + len(record) > self.max_segment_bytes:
+                self._open_segment()
+            self._file.write(record)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._active_bytes += len(record)
+            self._disk_bytes += len(record)
+
+    def remove_segment(self, name: str) -> None:
+        with self._lock:
+            if name == self._active_name:
+                return
+            path = self.directory / name
+            size = path.stat().st_size
+            path.unlink()
+            self._disk_bytes -= size
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class SpoolReplayer:
+    """Drain spooled batches to `insert_rows`, checkpointing progress.
+
+    `dead_letter(rows, reason)` receives records rejected `max_attempts`
+    times; it defaults to a log in the spool directory.
+    """
+
+    def __init__(
+        self,
+        spool: SegmentSpool,
+        insert_rows: InsertRows,
+        *,
+        max_batch_rows: int = WRITER_MAX_BATCH_ROWS,
+        poll_interval_s: float = SPOOL_REPLAY_POLL_S,
+        max_attempts: int = SPOOL_MAX_ATTEMPTS,
+        dead_letter: DeadLetter | None = None,
+    ):
+        self.spool = spool
+        self._insert_rows = insert_rows
+        self.max_batch_rows = max_batch_rows
+        self.poll_interval_s = poll_interval_s
+        self.max_attempts = max_attempts
+        self._dead_letter = dead_letter or DeadLetterLog(spool.directory / DEAD_LETTER_FILE).append
+        self._checkpoint_path = spool.directory / CHECKPOINT_FILE
+        self._corrupt_path = spool.directory / CORRUPT_RECORDS_FILE
+        self._runner: asyncio.Task | None = None
+        self._stopping: asyncio.Event | None = None
+        # rejections per (segment, record offset); only records that failed
+        self._attempts: dict[tuple[str, int], int] = {}
+        # corrupt records already copied out, so a retried segment does not copy them again
+        self._quarantined: set[tuple[str, int]] = set()
+
+        self.rows_replayed = 0
+        self.corrupt_records = 0
+        self.transient_failures = 0
+        self.rows_dead_lettered = 0
+
+    def stats(self) -> dict:
+        return {
+            "rows_replayed": self.rows_replayed,
+            "corrupt_records": self.corrupt_records,
+            "transient_failures": self.transient_failures,
+            "rows_dead_lettered": self.rows_dead_lettered,
+            "spool_bytes": self.spool.disk_bytes,
+        }
+
+    def load_checkpoint(self) -> tuple[str, int]:
+        try:
+            data = json.loads(self._checkpoint_path.read_text())
+            return data["segment"], int(data["offset"])
+        except FileNotFoundError:
+            return "", 0
+
+    def _save_checkpoint(self, segment: str, offset: int) -> None:
+        tmp = self._checkpoint_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"segment": segment, "offset": offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._checkpoint_path)
+
+    def replay_once(self) -> int:
+        """Insert everything spooled so far; returns the number of rows replayed.
+
+        Stops at the first failed insert, leaving the checkpoint before it.
+        """
+        checkpoint_segment, checkpoint_offset = self.load_checkpoint()
+        replayed = 0
+        for name in self.spool.segments():
+            if name < checkpoint_segment:
+                self.spool.remove_segment(name)
+                continue
+            start = checkpoint_offset if name == checkpoint_segment else 0
+            count, complete = self._replay_segment(name, start)
+            replayed += count
+            if not complete:
+                break
+            if name != self.spool.active_segment:
+                self.spool.remove_segment(name)
+        self.rows_replayed += replayed
+        return replayed
+
+    def _replay_segment(self, name: str, offset: int) -> tuple[int, bool]:
+        with open(self.spool.directory / name, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+
+        replayed = 0
+        # (start, end, rows) of the records waiting to be inserted
+        records: list[tuple[int, int, list[dict]]] = []
+        pending_rows = 0
+        position = offset
+        # A trailing piece without a newline is a torn write that was never
+        # acknowledged (or is still being written to the active segment).
+        for line in data.split(b"\n")[:-1]:
+            start, position = position, position + len(line) + 1
+            rows = _decode_record(line)
+            if rows is None:
+                if not self._quarantine(name, start, line):
+                    # keep the checkpoint before the record until it is copied
+                    if records:
+                        count, _ = self._flush(name, records)
+                        replayed += count
+                    return replayed, False
+                continue
+            records.append((start, position, rows))
+            pending_rows += len(rows)
+            if pending_rows >= self.max_batch_rows:
+                count, complete = self._flush(name, records)
+                replayed += count
+                if not complete:
+                    return replayed, False
+                records, pending_rows = [], 0
+
+        if records:
+            count, complete = self._flush(name, records)
+            replayed += count
+            if not complete:
+                return replayed, False
+        self._save_checkpoint(name, position)
+        return replayed, True
+
+    def _quarantine(self, name: str, start: int, line: bytes) -> bool:
+        """Durably copy a corrupt record aside; False if that failed."""
+        if (name, start) in self._quarantined:
+            return True
+        try:
+            with open(self._corrupt_path, "ab") as f:
+                f.write(b"%s@%d " % (name.encode(), start) + line + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            logger.error(f"Quarantining corrupt spool record {name}@{start} failed: {e}")
+            return False
+        self._quarantined.add((name, start))
+        self.corrupt_records += 1
+        logger.error(f"Corrupt spool record {name}@{start} moved to {self._corrupt_path}")
+        return True
+
+    def _flush(self, name: str, records: list[tuple[int, int, list[dict]]]) -> tuple[int, bool]:
+        """Insert `records` in one call; returns the rows inserted and whether
+        every record was either inserted or dead-lettered."""
+        rows = [row for _, _, record_rows in records for row in record_rows]
+        outcome, errors = self._insert(rows)
+        if outcome is None:
+            for start, _, _ in records:
+                self._attempts.pop((name, start), None)
+            self._save_checkpoint(name, records[-1][1])
+            return len(rows), True
+        if outcome == _TRANSIENT:
+            self.transient_failures += 1
+            return 0, False
+
+        if len(records) > 1:
+            # find the rejected record: the others go through on their own
+            replayed = 0
+            for record in records:
+                count, complete = self._flush(name, [record])
+                replayed += count
+                if not complete:
+                    return replayed, False
+            return replayed, True
+
+        start, end, record_rows = records[0]
+        attempts = self._attempts.get((name, start), 0) + 1
+        if attempts < self.max_attempts:
+            self._attempts[(name, start)] = attempts
+            return 0, False
+        reason = f"Rejected {attempts} times: {errors}"
+        try:
+            self._dead_letter(record_rows, reason)
+        except Exception as e:
+            logger.error(f"Dead-lettering spool record {name}@{start} failed: {e}")
+            return 0, False
+        del self._attempts[(name, start)]
+        self.rows_dead_lettered += len(record_rows)
+        logger.error(f"Dead-lettered {len(record_rows)} spooled rows from {name}@{start}: {reason}")
+        self._save_checkpoint(name, end)
+        return 0, True
+
+    def _insert(self, rows: list[dict]) -> tuple[str | None, list]:
+        try:
+            errors = self._insert_rows(rows)
+        except Exception as e:
+            outcome, errors = (_REJECTED if _is_rejection(e) else _TRANSIENT), [str(e)]
+        else:
+            outcome = _REJECTED if errors else None
+        if outcome is not None:
+            logger.warning(f"Spool replay of {len(rows)} rows failed ({outcome}): {errors}")
+        return outcome, errors
+
+    async def start(self) -> None:
+        self._stopping = asyncio.Event()
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Make a last drain attempt; anything left is replayed after restart."""
+        if self._runner is None:
+            return
+        self._stopping.set()
+        await self._runner
+        self._runner = None
+        await asyncio.to_thread(self.replay_once)
+        logger.info(f"Spool replayer stopped after {self.rows_replayed} rows")
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            replayed = await asyncio.to_thread(self.replay_once)
+            if replayed:
+                continue
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.poll_interval_s)
+            except asyncio.TimeoutError:
+                pass
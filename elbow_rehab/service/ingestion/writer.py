@@ -0,0 +1,208 @@
+"""Asynchronous micro-batching writer for validated IMU rows.
+
+Request handlers hand rows to :class:`BatchWriter` and return immediately;
+a background task coalesces rows across requests by size and age and
+flushes them off the event loop with a bounded number of concurrent
+inserts. When the in-process queue is full, :meth:`BatchWriter.submit`
+raises :class:`IngestionQueueFull` so the API can answer 429. Batches that
+still fail after `max_retries` were already acknowledged, so they go to the
+dead-letter sink; only if that fails too are they dropped (and counted).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Sequence
+
+from elbow_rehab.service.logger import get_logger
+from elbow_rehab.service.ingestion.settings import (
+    WRITER_MAX_BATCH_AGE_S,
+    WRITER_MAX_BATCH_ROWS,
+    WRITER_MAX_CONCURRENT_FLUSHES,
+    WRITER_MAX_QUEUE_ROWS,
+    WRITER_MAX_RETRIES,
+    WRITER_RETRY_AFTER_S,
+)
+
+logger = get_logger()
+
+InsertRows = Callable[[list[dict]], Sequence]
+DeadLetter = Callable[[list[dict], str], None]
+
+
+class IngestionQueueFull(Exception):
+    """Raised when accepting a batch would exceed the writer's queue bound."""
+
+    def __init__(self, retry_after_s: float):
+        super().__init__("Ingestion queue is full")
+        self.retry_after_s = retry_after_s
+
+
+class BatchWriter:
+    """Coalesce rows from many requests into few warehouse inserts.
+
+    `insert_rows` is the blocking sink (e.g. a bound
+    `bigquery.Client.insert_rows_json`); it returns a list of errors, empty on
+    success, and always runs in a worker thread. `dead_letter(rows, reason)`
+    (e.g. `DeadLetterLog.append`) receives batches that exhausted their retries.
+    """
+
+    def __init__(
+        self,
+        insert_rows: InsertRows,
+        *,
+        max_batch_rows: int = WRITER_MAX_BATCH_ROWS,
+        max_batch_age_s: float = WRITER_MAX_BATCH_AGE_S,
+        max_queue_rows: int = WRITER_MAX_QUEUE_ROWS,
+        max_concurrent_flushes: int = WRITER_MAX_CONCURRENT_FLUSHES,
+        max_retries: int = WRITER_MAX_RETRIES,
+        retry_after_s: float = WRITER_RETRY_AFTER_S,
+        dead_letter: DeadLetter | None = None,
+    ):
+        if max_batch_rows <= 0 or max_queue_rows <= 0:
+            raise ValueError("Batch and queue bounds must be positive")
+        self._insert_rows = insert_rows
+        self.max_batch_rows = max_batch_rows
+        self.max_batch_age_s = max_batch_age_s
+        self.max_queue_rows = max_queue_rows
+        self.max_concurrent_flushes = max_concurrent_flushes
+        self.max_retries = max_retries
+        self.retry_after_s = retry_after_s
+        self._dead_letter = dead_letter
+
+        self._pending: deque[dict] = deque()
+        self._oldest_at: float | None = None
+        self._outstanding_rows = 0  # pending + being flushed
+        self._wakeup: asyncio.Event | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._flushes: set[asyncio.Task] = set()
+        self._runner: asyncio.Task | None = None
+        self._stopping = False
+
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.rows_dead_lettered = 0
+        self.rows_dropped = 0
+        self.batches_written = 0
+
+    def stats(self) -> dict:
+        return {
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "rows_failed": self.rows_failed,
+            "rows_dead_lettered": self.rows_dead_lettered,
+            "rows_dropped": self.rows_dropped,
+            "outstanding_rows": self._outstanding_rows,
+        }
+
+    @property
+    def outstanding_rows(self) -> int:
+        return self._outstanding_rows
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrent_flushes)
+        self._stopping = False
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything still queued, then wait for in-flight inserts."""
+        if self._runner is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._runner
+        self._runner = None
+        logger.info(
+            f"Ingestion writer drained: {self.rows_written} rows written, "
+            f"{self.rows_dead_lettered} dead-lettered, {self.rows_dropped} dropped"
+        )
+
+    def submit(self, rows: list[dict]) -> None:
+        """Queue validated rows for the next flush; never blocks."""
+        if self._runner is None or self._stopping:
+            raise RuntimeError("BatchWriter is not running")
+        if self._outstanding_rows + len(rows) > self.max_queue_rows:
+            raise IngestionQueueFull(self.retry_after_s)
+
+        if not self._pending:
+            self._oldest_at = time.monotonic()
+        self._pending.extend(rows)
+        self._outstanding_rows += len(rows)
+        if len(self._pending) >= self.max_batch_rows:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                if self._stopping:
+                    break
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            age = time.monotonic() - self._oldest_at
+            if (
+                len(self._pending) < self.max_batch_rows
+                and age < self.max_batch_age_s
+                and not self._stopping
+            ):
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.max_batch_age_s - age
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._slots.acquire()
+            batch = [
+                self._pending.popleft()
+                for _ in range(min(self.max_batch_rows, len(self._pending)))
+            ]
+            self._oldest_at = time.monotonic() if self._pending else None
+            task = asyncio.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+        if self._flushes:
+            await asyncio.gather(*self._flushes)
+
+    async def _flush(self, batch: list[dict]) -> None:
+        try:
+            for attempt in range(1, self.max_retries + 1):
+                try:
+                    errors = await asyncio.to_thread(self._insert_rows, batch)
+                except Exception as e:
+                    errors = [str(e)]
+                if not errors:
+                    self.rows_written += len(batch)
+                    self.batches_written += 1
+                    return
+                logger.warning(
+                    f"Insert of {len(batch)} rows failed (attempt {attempt}): {errors}"
+                )
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self.retry_after_s * attempt)
+
+            self.rows_failed += len(batch)
+            await self._park(batch, f"{self.max_retries} attempts failed: {errors}")
+        finally:
+            self._outstanding_rows -= len(batch)
+            self._slots.release()
+
+    async def _park(self, batch: list[dict], reason: str) -> None:
+        if self._dead_letter is not None:
+            try:
+                await asyncio.to_thread(self._dead_letter, batch, reason)
+            except Exception as e:
+                logger.error(f"Dead-lettering {len(batch)} rows failed: {e}")
+            else:
+                self.rows_dead_lettered += len(batch)
+                logger.error(f"Dead-lettered {len(batch)} rows: {reason}")
+                return
+        self.rows_dropped += len(batch)
+        logger.error(f"Dropping {len(batch)} rows: {reason}")
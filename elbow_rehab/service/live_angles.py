@@ -0,0 +1,211 @@
+"""Live FE/PS angles over a WebSocket, with one tracker per connection.
+
+The first client message must be ``{"token": <Firebase ID token>}``, sent
+within `LIVE_AUTH_TIMEOUT_S`. Tokens are kept out of the URL so they do not
+end up in access logs. The server answers ``{"status": "ready"}``, or
+closes with 1008 (policy violation).
+
+Later client messages are JSON text: one packet or a list of packets,
+``{"sensor": "A" | "B", "t": <esp32 ms>, "acc": [ax, ay, az], "gyr": [gx, gy, gz]}``.
+The server answers with ``{"status": "calibrating", "progress": 0.4}`` while
+the zero pose is measured, then ``{"t": ..., "flexion_deg": ...,
+"pronation_deg": ..., "coalesced": n}``. A malformed message gets
+``{"error": ...}`` and the connection stays open.
+
+Output is coalesced: the sender holds only the newest result, so a client
+that reads slower than packets arrive gets fewer, fresher messages (``n``
+counts the results it skipped) instead of a growing backlog.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import math
+import os
+from typing import Any, Awaitable, Callable
+
+from elbow_rehab.service.angle_calculation.settings import (
+    DEFAULT_CALIBRATION_DURATION_FRAMES,
+    DEFAULT_ESTIMATOR,
+    DEFAULT_FILTER,
+    DEFAULT_SAMPLE_RATE_HZ,
+)
+
+LIVE_MAX_PACKETS_PER_MESSAGE = int(os.getenv("LIVE_MAX_PACKETS_PER_MESSAGE", "200"))
+LIVE_MAX_SEND_HZ = float(os.getenv("LIVE_MAX_SEND_HZ", "60"))
+LIVE_AUTH_TIMEOUT_S = float(os.getenv("LIVE_AUTH_TIMEOUT_S", "5"))
+
+WS_POLICY_VIOLATION = 1008
+
+
+def _vector(value, name: str) -> tuple[float, float, float]:
+    if not isinstance(value, list) or len(value) != 3:
+        raise ValueError(f"{name}: expected 3 numbers")
+    try:
+        vector = tuple(float(v) for v in value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: expected 3 numbers") from None
+    # json.loads accepts NaN and Infinity, which would poison the filter state
+    if not all(math.isfinite(v) for v in vector):
+        raise ValueError(f"{name}: expected 3 finite numbers")
+    return vector
+
+
+def parse_packets(message: str) -> list[tuple[str, int, tuple, tuple]]:
+    """(sensor, t, acc, gyr) for each packet in a client message; raises ValueError."""
+    try:
+        payload = json.loads(message)
+    except ValueError as e:
+        raise ValueError(f"Malformed JSON: {e}") from None
+    packets = payload if isinstance(payload, list) else [payload]
+    if len(packets) > LIVE_MAX_PACKETS_PER_MESSAGE:
+        raise ValueError(f"At most {LIVE_MAX_PACKETS_PER_MESSAGE} packets per message")
+
+    parsed = []
+    for index, packet in enumerate(packets):
+        if not isinstance(packet, dict):
+            raise ValueError(f"Packet {index}: expected an object")
+        sensor = packet.get("sensor")
+        if sensor not in ("A", "B"):
+            raise ValueError(f"Packet {index}: sensor must be 'A' or 'B'")
+        timestamp = packet.get("t")
+        if not isinstance(timestamp, int) or isinstance(timestamp, bool):
+            raise ValueError(f"Packet {index}: t must be an integer")
+        parsed.append(
+            (
+                sensor,
+                timestamp,
+                _vector(packet.get("acc"), f"Packet {index}: acc"),
+                _vector(packet.get("gyr"), f"Packet {index}: gyr"),
+            )
+        )
+    return parsed
+
+
+class LatestValue:
+    """Single-slot mailbox: `put` replaces an unsent value, `get` waits for one."""
+
+    def __init__(self):
+        self._value: Any = None
+        self._pending = 0
+        self._ready = asyncio.Event()
+
+    def put(self, value, produced: int = 1) -> None:
+        self._value = value
+        self._pending += produced
+        self._ready.set()
+
+    async def get(self) -> tuple[Any, int]:
+        """The newest value and how many earlier ones it superseded."""
+        await self._ready.wait()
+        self._ready.clear()
+        value, self._value = self._value, None
+        skipped, self._pending = max(0, self._pending - 1), 0
+        return value, skipped
+
+
+class LiveAngleSession:
+    """Filter and estimator state of one live connection."""
+
+    def __init__(
+        self,
+        sample_rate: float = DEFAULT_SAMPLE_RATE_HZ,
+        filter_type: str = DEFAULT_FILTER,
+        estimator_type: str = DEFAULT_ESTIMATOR,
+        calibration_frames: int = DEFAULT_CALIBRATION_DURATION_FRAMES,
+    ):
+        # The filter stack (scipy, ahrs) is imported on the first connection
+        from elbow_rehab.service.angle_calculation.elbow_tracker import ElbowTracker
+        from elbow_rehab.service.angle_calculation.imu import IMUSensor
+
+        self.tracker = ElbowTracker(
+            IMUSensor("A", sample_rate, filter_type),
+            IMUSensor("B", sample_rate, filter_type),
+            sample_rate,
+            estimator_type=estimator_type,
+            calibration_frames=calibration_frames,
+        )
+
+    def handle_message(self, message: str) -> tuple[dict | None, int]:
+        """Feed a client message; returns the reply to send (if any) and how
+        many angle results it produced."""
+        pairs_before, latest = self.tracker.pairs, None
+        for packet in parse_packets(message):
+            latest = self.tracker.add_sample(*packet) or latest
+        produced = self.tracker.pairs - pairs_before
+
+        if latest is not None:
+            reply = {
+                "t": latest.timestamp_ms,
+                "flexion_deg": latest.flexion_deg,
+                "pronation_deg": latest.pronation_deg,
+            }
+            return reply, produced
+        if self.tracker.calibrating:
+            return {"status": "calibrating", "progress": self.tracker.calibration_progress}, 0
+        return None, 0
+
+
+async def authenticate_websocket(
+    websocket,
+    authenticate: Callable[[str], Awaitable[dict]],
+    timeout_s: float = LIVE_AUTH_TIMEOUT_S,
+) -> dict | None:
+    """Claims of the token in the first message of an accepted connection.
+
+    `authenticate` raises on an invalid token. On any failure the socket is
+    closed with 1008 and None is returned.
+    """
+    from starlette.websockets import WebSocketDisconnect
+
+    try:
+        message = await asyncio.wait_for(websocket.receive_text(), timeout_s)
+        token = json.loads(message)["token"]
+        if not isinstance(token, str):
+            raise TypeError("token must be a string")
+        claims = await authenticate(token)
+    except WebSocketDisconnect:
+        return None
+    except Exception:
+        await websocket.close(code=WS_POLICY_VIOLATION)
+        return None
+    await websocket.send_json({"status": "ready"})
+    return claims
+
+
+async def serve_live_angles(websocket, session: LiveAngleSession, max_send_hz: float = LIVE_MAX_SEND_HZ) -> None:
+    """Run an accepted connection until the client disconnects.
+
+    Packets are processed off the event loop in arrival order; a separate
+    task sends the newest reply at most `max_send_hz` times a second.
+    """
+    from starlette.websockets import WebSocketDisconnect
+
+    outbox = LatestValue()
+
+    async def send_replies():
+        while True:
+            reply, skipped = await outbox.get()
+            if "t" in reply:
+                reply = {**reply, "coalesced": skipped}
+            await websocket.send_json(reply)
+            await asyncio.sleep(1.0 / max_send_hz)
+
+    sender = asyncio.create_task(send_replies())
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                reply, produced = await asyncio.to_thread(session.handle_message, message)
+            except ValueError as e:
+                reply, produced = {"error": str(e)}, 0
+            if reply is not None:
+                outbox.put(reply, produced)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await sender
@@ -1,48 +1,140 @@
 import os
+import math
+import asyncio
+import importlib
 import uvicorn
 from datetime import datetime
-from typing import List
-from fastapi import FastAPI, HTTPException, Depends
-
-import firebase_admin  # pyright: ignore[reportMissingImports]
-from firebase_admin import auth, credentials  # pyright: ignore[reportMissingImports]
-
-from elbow_rehab.service.big_query import get_imu_reading_df
-from elbow_rehab.service.domain.imu_reading import ImuReading
-from elbow_rehab.service.configure_infrastructure import (
-    initialize_bigquery_client,
-    initialize_firebase_admin,
-    ensure_infrastructure_exists,
-    require_env,
-    get_table_id,
+from typing import List, Literal
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, WebSocket
+from fastapi.responses import Response, StreamingResponse
+
+from elbow_rehab.service.domain.imu_reading import ImuBatchValidationError
+from elbow_rehab.service.ingestion.payloads import (
+    SESSION_TIME_HEADER,
+    UnsupportedPayloadType,
+    decode_imu_upload,
 )
-from elbow_rehab.service.auth import get_user_id
+from elbow_rehab.service.configure_infrastructure import initialize_firebase_admin
+from elbow_rehab.service.storage.factory import get_reading_store
+from elbow_rehab.service.auth import authenticate_token, get_user_id, signing_keys
 from elbow_rehab.service.configure_database import sync_firebase_users_to_db
+from elbow_rehab.service.user_sync import UserSyncWorker
 from elbow_rehab.service.logger import get_logger
-from elbow_rehab.service.angle_calculation.calculations import process_session_angles
+from elbow_rehab.service.session_angles import (
+    MAX_BATCH_SESSIONS,
+    angle_cache,
+    get_session_angles,
+    get_sessions_angles,
+)
+from elbow_rehab.service.angle_jobs import AngleJobManager, AngleJobQueueFull, AngleJobSpec
+from elbow_rehab.service.analytics.decimation import DecimationMethod, decimate_frame
+from elbow_rehab.service.analytics.plot_service import (
+    PLOT_MAX_POINTS,
+    PLOT_MEDIA_TYPES,
+    PlotFormat,
+    PlotKind,
+    PlotService,
+)
+from elbow_rehab.service.responses import (
+    NotAcceptable,
+    negotiate_media_type,
+    select_columns,
+    serialize_frame,
+    serialize_sessions,
+)
+from elbow_rehab.service.angle_calculation.settings import (
+    DEFAULT_ESTIMATOR,
+    DEFAULT_FILTER,
+    DEFAULT_SAMPLE_RATE_HZ,
+)
+from elbow_rehab.service.ingestion.writer import BatchWriter, IngestionQueueFull
+from elbow_rehab.service.ingestion.dedup import BatchInFlight, IngestionDeduplicator
+from elbow_rehab.service.ingestion.spool import SegmentSpool, SpoolReplayer
+from elbow_rehab.service.ingestion.dead_letter import DeadLetterLog
+from elbow_rehab.service.ingestion.settings import (
+    DEAD_LETTER_DURABLE,
+    DEAD_LETTER_PATH,
+    SPOOL_DIR,
+)
+from elbow_rehab.service.live_angles import (
+    LiveAngleSession,
+    authenticate_websocket,
+    serve_live_angles,
+)
 from contextlib import asynccontextmanager
 
 logger = get_logger()
 logger.info("Service started successfully")
 
 
+def warm_up():
+    """Slow startup work, run after the server starts accepting requests."""
+    initialize_firebase_admin()
+    get_reading_store().ensure_exists()
+    # Load the filter stack (scipy, ahrs) before the first angles request
+    importlib.import_module("elbow_rehab.service.angle_calculation.incremental")
+
+
+def log_warm_up_result(task: asyncio.Task):
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        logger.error(f"Startup warm-up failed: {task.exception()}")
+    else:
+        logger.info("Startup warm-up complete")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup logic
-    ensure_infrastructure_exists(bq_client, PROJECT_ID, OUTPUT_DATASET, OUTPUT_TABLE)
-    sync_firebase_users_to_db()
+    # Startup logic; /health answers while warm_up() runs in the background
+    if not DEAD_LETTER_DURABLE:
+        logger.warning(
+            f"Dead-lettered readings go to {DEAD_LETTER_PATH}, which may not survive "
+            "a restart; set INGEST_DEAD_LETTER_PATH to a persistent volume"
+        )
+    await ingestion_writer.start()
+    if spool_replayer is not None:
+        await spool_replayer.start()
+    app.state.warm_up = asyncio.create_task(asyncio.to_thread(warm_up))
+    app.state.warm_up.add_done_callback(log_warm_up_result)
+    await user_sync_worker.start()
+    await signing_keys.start()
     yield
-    # Shutdown logic (if any) can go here
+    await signing_keys.stop()
+    await user_sync_worker.stop()
+    await angle_jobs.shutdown()
+    # Shutdown logic: drain queued readings before the instance goes away
+    if spool_replayer is not None:
+        await spool_replayer.stop()
+        ingestion_spool.close()
+    await ingestion_writer.stop()
+    plot_service.shutdown()
 
 
 app = FastAPI(lifespan=lifespan)
 
-PROJECT_ID = require_env("PROJECT_ID")
-OUTPUT_DATASET = require_env("OUTPUT_DATASET")
-OUTPUT_TABLE = require_env("OUTPUT_TABLE")
+plot_service = PlotService()
+angle_jobs = AngleJobManager()
+user_sync_worker = UserSyncWorker(sync_firebase_users_to_db)
+ingestion_dead_letter = DeadLetterLog(DEAD_LETTER_PATH)
+ingestion_writer = BatchWriter(
+    lambda rows: get_reading_store().append_readings(rows),
+    dead_letter=ingestion_dead_letter.append,
+)
+ingestion_dedup = IngestionDeduplicator()
 
-bq_client = initialize_bigquery_client(PROJECT_ID)
-firebase_admin = initialize_firebase_admin()
+# With a spool configured, uploads are acknowledged once fsync'd locally and
+# the replayer drains them to storage in the background.
+ingestion_spool = SegmentSpool(SPOOL_DIR) if SPOOL_DIR else None
+spool_replayer = (
+    SpoolReplayer(
+        ingestion_spool,
+        lambda rows: get_reading_store().append_readings(rows),
+        dead_letter=ingestion_dead_letter.append,
+    )
+    if ingestion_spool is not None
+    else None
+)
 
 
 # @app.on_event("startup")
@@ -56,53 +148,359 @@ def health():
     return 200
 
 
+@app.get("/ready")
+def ready():
+    """200 once startup warm-up has finished, 503 before (or if it failed)."""
+    task = getattr(app.state, "warm_up", None)
+    if task is None or not task.done() or task.cancelled() or task.exception():
+        raise HTTPException(status_code=503, detail="Warming up")
+    return 200
+
+
+@app.get("/user_sync/status")
+def user_sync_status():
+    return user_sync_worker.status()
+
+
 @app.get("/")
 def home():
     return {"message": "welcome"}
 
 
 @app.get("/calculate_angles/")
-def calculate_angles(session_id: str):
+def calculate_angles(
+    session_id: str,
+    filter_type: Literal["madgwick", "ekf"] = DEFAULT_FILTER,
+    estimator_type: Literal["simple", "alignment_free"] = DEFAULT_ESTIMATOR,
+    sample_rate: float = Query(DEFAULT_SAMPLE_RATE_HZ, gt=0),
+    columns: List[str] | None = Query(None),
+    max_points: int | None = Query(None, ge=10),
+    method: DecimationMethod = "lttb",
+    resample: bool = False,
+    accept: str | None = Header(None),
+):
+    """
+    Processed session readings with `flexion_deg`/`pronation_deg`, streamed as
+    JSON (default), NDJSON, Arrow IPC or Parquet depending on `Accept`.
+    `columns` (repeated or comma-separated) limits the returned columns and
+    `max_points` decimates the angle series for charting (see `method`).
+    `resample` drops repeated frames, aligns the A/B clocks and resamples
+    both sensors to `sample_rate` before filtering.
+    """
     logger.info(f"Calculating angles for session_ID: {session_id}")
 
-    # Fetch from BigQuery
-    session_data = get_imu_reading_df(session_id)  # Returns a pandas DF
+    try:
+        media_type = negotiate_media_type(accept)
+    except NotAcceptable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+    # Served from the angle cache unless the session changed since last time
+    processed_df = get_session_angles(
+        session_id,
+        estimator_type=estimator_type,
+        sample_rate=sample_rate,
+        filter_type=filter_type,
+        resample=resample,
+    )
+
+    if processed_df is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    return angles_response(processed_df, media_type, columns, max_points, method)
+
+
+def angles_response(processed_df, media_type, columns, max_points, method):
+    if max_points is not None:
+        processed_df = decimate_frame(processed_df, max_points, method)
+
+    try:
+        processed_df = select_columns(processed_df, columns)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+
+    return StreamingResponse(
+        serialize_frame(processed_df, media_type), media_type=media_type
+    )
+
+
+@app.get("/calculate_angles/batch")
+def calculate_sessions_angles(
+    session_ids: List[str] = Query(...),
+    filter_type: Literal["madgwick", "ekf"] = DEFAULT_FILTER,
+    estimator_type: Literal["simple", "alignment_free"] = DEFAULT_ESTIMATOR,
+    sample_rate: float = Query(DEFAULT_SAMPLE_RATE_HZ, gt=0),
+    columns: List[str] | None = Query(None),
+    max_points: int | None = Query(None, ge=10),
+    method: DecimationMethod = "lttb",
+    accept: str | None = Header(None),
+):
+    """
+    Processed angles of several sessions (`session_ids` repeated or
+    comma-separated), read with a single warehouse query and processed in
+    parallel. JSON responses are `{"sessions": {session_id: [records] | null}}`;
+    the other formats return one table with a leading `session_id` column.
+    """
+    session_ids = list(
+        dict.fromkeys(
+            name.strip() for item in session_ids for name in item.split(",") if name.strip()
+        )
+    )
+    if not session_ids:
+        raise HTTPException(status_code=400, detail="No session_ids provided")
+    if len(session_ids) > MAX_BATCH_SESSIONS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_BATCH_SESSIONS} sessions per request"
+        )
+
+    try:
+        media_type = negotiate_media_type(accept)
+    except NotAcceptable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+    logger.info(f"Calculating angles for {len(session_ids)} sessions")
+    frames = get_sessions_angles(
+        session_ids,
+        estimator_type=estimator_type,
+        sample_rate=sample_rate,
+        filter_type=filter_type,
+        executor=angle_jobs.executor,
+    )
+
+    for session_id, processed_df in frames.items():
+        if processed_df is None:
+            continue
+        if max_points is not None:
+            processed_df = decimate_frame(processed_df, max_points, method)
+        try:
+            frames[session_id] = select_columns(processed_df, columns)
+        except KeyError as e:
+            raise HTTPException(status_code=400, detail=e.args[0])
+
+    return StreamingResponse(
+        serialize_sessions(frames, media_type), media_type=media_type
+    )
+
 
-    if session_data.empty:
+@app.get("/calculate_angles/cache_stats")
+def calculate_angles_cache_stats():
+    return angle_cache.stats()
+
+
+@app.post("/angle_jobs", status_code=202)
+async def submit_angle_job(
+    session_id: str,
+    filter_type: Literal["madgwick", "ekf"] = DEFAULT_FILTER,
+    estimator_type: Literal["simple", "alignment_free"] = DEFAULT_ESTIMATOR,
+    sample_rate: float = Query(DEFAULT_SAMPLE_RATE_HZ, gt=0),
+):
+    """
+    Queue angle processing of a session in the worker pool. Poll
+    `/angle_jobs/{job_id}` and fetch `/angle_jobs/{job_id}/result` once it
+    has succeeded. Identical requests for an unchanged session share a job.
+    """
+    spec = AngleJobSpec(session_id, estimator_type, float(sample_rate), filter_type)
+    try:
+        job = await angle_jobs.submit(spec)
+    except AngleJobQueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many angle jobs pending, retry later",
+            headers={"Retry-After": str(math.ceil(e.retry_after_s))},
+        )
+    if job is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return job.to_dict()
+
+
+@app.get("/angle_jobs/stats")
+def angle_job_stats():
+    return angle_jobs.stats()
+
+
+@app.get("/angle_jobs/{job_id}")
+def angle_job_status(job_id: str):
+    job = angle_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/angle_jobs/{job_id}/result")
+def angle_job_result(
+    job_id: str,
+    columns: List[str] | None = Query(None),
+    max_points: int | None = Query(None, ge=10),
+    method: DecimationMethod = "lttb",
+    accept: str | None = Header(None),
+):
+    """The job's processed angles, in the same formats as `/calculate_angles/`."""
+    job = angle_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Job failed: {job.error}")
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if job.result is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    try:
+        media_type = negotiate_media_type(accept)
+    except NotAcceptable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    return angles_response(job.result, media_type, columns, max_points, method)
+
+
+@app.get("/plots/{kind}")
+async def session_plot(
+    kind: PlotKind,
+    session_id: str,
+    format: PlotFormat = "png",
+    max_points: int = Query(PLOT_MAX_POINTS, ge=100, le=100_000),
+    filter_type: Literal["madgwick", "ekf"] = DEFAULT_FILTER,
+    estimator_type: Literal["simple", "alignment_free"] = DEFAULT_ESTIMATOR,
+    sample_rate: float = Query(DEFAULT_SAMPLE_RATE_HZ, gt=0),
+):
+    """
+    A figure of the session, rendered on first request and cached until the
+    session receives new readings.
+    """
+    store = get_reading_store()
+    fingerprint = await asyncio.to_thread(store.session_fingerprint, session_id)
+    if fingerprint.row_count == 0:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    processed_df = process_session_angles(session_data)
+    if kind == "gyro_calibration":
+        key = (fingerprint, kind, format, max_points)
+
+        def load_frame():
+            return store.fetch_session(session_id)
+
+    else:
+        key = (fingerprint, kind, format, max_points, estimator_type, sample_rate, filter_type)
 
-    return {"message": processed_df.to_dict(orient="records")}
+        def load_frame():
+            return get_session_angles(
+                session_id,
+                estimator_type=estimator_type,
+                sample_rate=sample_rate,
+                filter_type=filter_type,
+                fingerprint=fingerprint,
+            )
+
+    image = await plot_service.get_plot(key, load_frame, kind, format, max_points)
+    return Response(content=image, media_type=PLOT_MEDIA_TYPES[format])
+
+
+@app.get("/sessions")
+def list_sessions(user_id: str = Depends(get_user_id)):
+    """Sessions of the signed-in user, newest first."""
+    return {"sessions": get_reading_store().list_sessions(user_id)}
+
+
+@app.get("/imu/readings/writer_stats")
+def ingestion_writer_stats():
+    return {
+        **ingestion_writer.stats(),
+        "spool": spool_replayer.stats() if spool_replayer is not None else None,
+    }
+
+
+@app.get("/imu/readings/dedup_stats")
+def ingestion_dedup_stats():
+    return ingestion_dedup.stats()
 
 
 @app.post("/imu/readings")
 async def ingest_imu_readings(
-    raw_readings: list[dict],
+    request: Request,
     user_id: str = Depends(get_user_id),
+    batch_seq: int | None = Header(None, alias="X-Batch-Seq", ge=0),
 ):
-    if not raw_readings:
-        raise HTTPException(status_code=400, detail="No readings provided")
+    """
+    Accepts a JSON list of readings, a columnar JSON session, or packed
+    binary records (see `ingestion.payloads` for the content types).
+    Frames the session already sent, and batches whose `X-Batch-Seq` was
+    already accepted, are counted as duplicates instead of written again.
+    """
+    body = await request.body()
+    try:
+        rows_to_insert = decode_imu_upload(
+            request.headers.get("content-type"),
+            body,
+            user_id,
+            session_time_iso=request.headers.get(SESSION_TIME_HEADER),
+        )
+    except UnsupportedPayloadType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ImuBatchValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Validation error at reading {e.index}: {str(e)}",
+        )
 
-    rows_to_insert = []
-    for item in raw_readings:
-        item["user_id"] = user_id
-        try:
-            reading = ImuReading(**item)
-            rows_to_insert.append(reading.model_dump(mode="json"))
-        except Exception as e:
-            raise HTTPException(status_code=422, detail=f"Validation error: {str(e)}")
+    if not rows_to_insert:
+        raise HTTPException(status_code=400, detail="No readings provided")
 
     logger.info(f"Readings: {rows_to_insert[0]}")
-    errors = bq_client.insert_rows_json(get_table_id(), rows_to_insert)
-
-    if errors:
+    try:
+        dedup = ingestion_dedup.filter(rows_to_insert, batch_seq)
+    except BatchInFlight as e:
+        # the original request is still writing these frames; if that write
+        # fails, this retry is what gets them stored
+        raise HTTPException(
+            status_code=409,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after_s))},
+        )
+    try:
+        if dedup.rows and ingestion_spool is not None:
+            await asyncio.to_thread(ingestion_spool.append, dedup.rows)
+        elif dedup.rows:
+            # Rows are coalesced with other uploads and written in the background
+            ingestion_writer.submit(dedup.rows)
+    except IngestionQueueFull as e:
+        ingestion_dedup.forget(dedup)
         raise HTTPException(
-            status_code=500,
-            detail=f"BigQuery insertion errors: {errors}",
+            status_code=429,
+            detail="Ingestion queue is full, retry later",
+            headers={"Retry-After": str(math.ceil(e.retry_after_s))},
         )
+    except Exception:
+        # not written, so the client's retry must not count as a duplicate
+        ingestion_dedup.forget(dedup)
+        raise
+    ingestion_dedup.commit(dedup)
+
+    return {
+        "message": f"Successfully inserted {len(dedup.rows)} readings.",
+        "inserted": len(dedup.rows),
+        "duplicates": dedup.duplicates,
+        "replayed_batch": dedup.replayed_batch,
+    }
+
+
+@app.websocket("/ws/live_angles/{session_id}")
+async def live_angles(
+    websocket: WebSocket,
+    session_id: str,
+    filter_type: Literal["madgwick", "ekf"] = DEFAULT_FILTER,
+    estimator_type: Literal["simple", "alignment_free"] = DEFAULT_ESTIMATOR,
+    sample_rate: float = Query(DEFAULT_SAMPLE_RATE_HZ, gt=0),
+):
+    """
+    Live FE/PS angles for packets streamed from both sensors. The first
+    message carries the Firebase ID token (see `live_angles` for the
+    message format); it is not accepted in the URL, which gets logged.
+    """
+    await websocket.accept()
+    user = await authenticate_websocket(websocket, authenticate_token)
+    if user is None:
+        return
 
-    return {"message": f"Successfully inserted {len(rows_to_insert)} readings."}
+    logger.info(f"Live angles for session_ID: {session_id} (user {user['uid']})")
+    session = LiveAngleSession(sample_rate, filter_type, estimator_type)
+    await serve_live_angles(websocket, session)
 
 
 if __name__ == "__main__":
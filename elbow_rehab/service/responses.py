@@ -0,0 +1,191 @@
+"""Chunked serialisation of processed-angle frames for /calculate_angles.
+
+The response format is negotiated from the ``Accept`` header:
+
+* ``application/json`` (default) - the original ``{"message": [records]}`` body.
+* ``application/x-ndjson`` - one JSON record per line.
+* ``application/vnd.apache.arrow.stream`` - Arrow IPC stream of record batches.
+* ``application/vnd.apache.parquet`` - a single Parquet file.
+
+JSON, NDJSON and Arrow are produced ``RESPONSE_CHUNK_ROWS`` rows at a time,
+so peak memory stays close to the frame itself and the first bytes leave
+before the whole session is encoded.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+from typing import Iterable, Iterator
+
+import pandas as pd
+
+RESPONSE_CHUNK_ROWS = int(os.getenv("RESPONSE_CHUNK_ROWS", "5000"))
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+SUPPORTED_MEDIA_TYPES = (
+    JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    ARROW_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+)
+
+# pandas caps JSON float precision at 15 significant digits
+_JSON_DOUBLE_PRECISION = 15
+
+
+class NotAcceptable(ValueError):
+    """None of the media types in the Accept header can be produced."""
+
+
+def negotiate_media_type(accept: str | None) -> str:
+    """Pick the supported media type the client prefers (highest q, then order)."""
+    if not accept:
+        return JSON_MEDIA_TYPE
+
+    candidates = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            candidates.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(candidates):
+        if media_type in ("*/*", "application/*"):
+            return JSON_MEDIA_TYPE
+        if media_type in SUPPORTED_MEDIA_TYPES:
+            return media_type
+    raise NotAcceptable(
+        f"Supported media types: {', '.join(SUPPORTED_MEDIA_TYPES)}"
+    )
+
+
+def select_columns(df: pd.DataFrame, columns: Iterable[str] | None) -> pd.DataFrame:
+    """Keep only `columns` (which may also be comma-separated); None keeps all.
+
+    A name given twice is kept once: duplicate columns cannot be serialized.
+    """
+    if not columns:
+        return df
+    names = [name.strip() for item in columns for name in item.split(",") if name.strip()]
+    names = list(dict.fromkeys(names))
+    unknown = [name for name in names if name not in df.columns]
+    if unknown:
+        raise KeyError(f"Unknown columns: {', '.join(unknown)}")
+    return df[names]
+
+
+def _chunks(df: pd.DataFrame, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start : start + chunk_rows]
+
+
+def _iter_json_records(df: pd.DataFrame, chunk_rows: int) -> Iterator[bytes]:
+    yield b"["
+    separator = b""
+    for chunk in _chunks(df, chunk_rows):
+        records = chunk.to_json(
+            orient="records", date_format="iso", double_precision=_JSON_DOUBLE_PRECISION
+        )
+        yield separator + records[1:-1].encode()
+        separator = b","
+    yield b"]"
+
+
+def iter_json_message(df: pd.DataFrame, chunk_rows: int = RESPONSE_CHUNK_ROWS) -> Iterator[bytes]:
+    """``{"message": [...]}`` built one chunk of records at a time."""
+    yield b'{"message":'
+    yield from _iter_json_records(df, chunk_rows)
+    yield b"}"
+
+
+def iter_json_sessions(
+    frames: dict[str, pd.DataFrame | None], chunk_rows: int = RESPONSE_CHUNK_ROWS
+) -> Iterator[bytes]:
+    """``{"sessions": {"<session_id>": [...] | null}}``, one session after another."""
+    yield b'{"sessions":{'
+    separator = b""
+    for session_id, df in frames.items():
+        yield separator + json.dumps(session_id).encode() + b":"
+        separator = b","
+        if df is None:
+            yield b"null"
+        else:
+            yield from _iter_json_records(df, chunk_rows)
+    yield b"}}"
+
+
+def iter_ndjson(df: pd.DataFrame, chunk_rows: int = RESPONSE_CHUNK_ROWS) -> Iterator[bytes]:
+    for chunk in _chunks(df, chunk_rows):
+        yield chunk.to_json(
+            orient="records",
+            lines=True,
+            date_format="iso",
+            double_precision=_JSON_DOUBLE_PRECISION,
+        ).encode()
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def iter_arrow_stream(df: pd.DataFrame, chunk_rows: int = RESPONSE_CHUNK_ROWS) -> Iterator[bytes]:
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=chunk_rows):
+            writer.write_batch(batch)
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def to_parquet_bytes(df: pd.DataFrame) -> bytes:
+    sink = io.BytesIO()
+    df.to_parquet(sink, engine="pyarrow", index=False)
+    return sink.getvalue()
+
+
+def serialize_frame(df: pd.DataFrame, media_type: str) -> Iterator[bytes]:
+    """Body chunks of `df` encoded as `media_type` (one of SUPPORTED_MEDIA_TYPES)."""
+    if media_type == NDJSON_MEDIA_TYPE:
+        return iter_ndjson(df)
+    if media_type == ARROW_MEDIA_TYPE:
+        return iter_arrow_stream(df)
+    if media_type == PARQUET_MEDIA_TYPE:
+        return iter([to_parquet_bytes(df)])
+    return iter_json_message(df)
+
+
+def serialize_sessions(frames: dict[str, pd.DataFrame | None], media_type: str) -> Iterator[bytes]:
+    """Body chunks for several sessions: keyed by id in JSON, otherwise one
+    frame with a leading `session_id` column (sessions without data are omitted)."""
+    if media_type == JSON_MEDIA_TYPE:
+        return iter_json_sessions(frames)
+    present = {
+        session_id: df.drop(columns="session_id", errors="ignore")
+        for session_id, df in frames.items()
+        if df is not None
+    }
+    if present:
+        combined = pd.concat(present, names=["session_id"]).reset_index(level=0)
+        combined = combined.reset_index(drop=True)
+    else:
+        combined = pd.DataFrame({"session_id": pd.Series(dtype=str)})
+    return serialize_frame(combined, media_type)
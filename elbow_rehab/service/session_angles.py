@@ -0,0 +1,212 @@
+"""Serve processed session angles, reusing cached results when possible."""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import Executor
+from typing import Callable, Iterable
+
+import pandas as pd
+
+from elbow_rehab.service.angle_cache import (
+    AngleCacheKey,
+    AngleResultCache,
+    SessionFingerprint,
+)
+from elbow_rehab.service.storage.factory import get_reading_store
+from elbow_rehab.service.angle_checkpoints import AngleCheckpointStore
+from elbow_rehab.service.angle_calculation.settings import (
+    DEFAULT_ESTIMATOR,
+    DEFAULT_FILTER,
+    DEFAULT_SAMPLE_RATE_HZ,
+)
+from elbow_rehab.service.logger import get_logger
+
+logger = get_logger()
+
+MAX_BATCH_SESSIONS = int(os.getenv("MAX_BATCH_SESSIONS", "50"))
+
+angle_cache = AngleResultCache()
+checkpoint_store = AngleCheckpointStore()
+
+
+def get_session_angles(
+    session_id: str,
+    estimator_type: str = DEFAULT_ESTIMATOR,
+    sample_rate: float = DEFAULT_SAMPLE_RATE_HZ,
+    filter_type: str = DEFAULT_FILTER,
+    fingerprint: SessionFingerprint | None = None,
+    compute: Callable | None = None,
+    resample: bool = False,
+) -> pd.DataFrame | None:
+    """Return the processed angles of a session, or None if it has no readings.
+
+    Served from the angle cache when the session is unchanged, otherwise
+    extended from the session's checkpoint with only the new readings.
+    `compute` replaces `process_session_angles_incremental` (same signature),
+    e.g. to run the filters in another process. With `resample` the readings
+    are first clock-aligned and resampled (see `alignment.resample_streams`).
+    """
+    if fingerprint is None:
+        fingerprint = get_reading_store().session_fingerprint(session_id)
+    if fingerprint.row_count == 0:
+        return None
+
+    key = AngleCacheKey(fingerprint, estimator_type, float(sample_rate), filter_type, resample)
+    processed_df = angle_cache.get(key)
+    if processed_df is not None:
+        logger.info(f"Angle cache hit for session_ID: {session_id}")
+        return processed_df
+
+    if resample:
+        processed_df = _process_resampled(
+            session_id, estimator_type, sample_rate, filter_type, compute
+        )
+    else:
+        processed_df = _process_from_checkpoint(
+            session_id, fingerprint.row_count, estimator_type, sample_rate, filter_type, compute
+        )
+    angle_cache.put(key, processed_df)
+    return processed_df
+
+
+def get_sessions_angles(
+    session_ids: Iterable[str],
+    estimator_type: str = DEFAULT_ESTIMATOR,
+    sample_rate: float = DEFAULT_SAMPLE_RATE_HZ,
+    filter_type: str = DEFAULT_FILTER,
+    executor: Executor | None = None,
+) -> dict[str, pd.DataFrame | None]:
+    """Processed angles of several sessions keyed by id (None for sessions without readings).
+
+    All readings are read with one `fetch_sessions` call and each session's
+    fingerprint is taken from its rows, so no per-session query is issued.
+    Cached sessions are served from the angle cache; the others are processed
+    in `executor` when given (e.g. a process pool), one task per session.
+    """
+    from elbow_rehab.service.angle_calculation.incremental import (
+        process_session_angles_incremental,
+    )
+
+    session_ids = list(dict.fromkeys(session_ids))
+    results: dict[str, pd.DataFrame | None] = dict.fromkeys(session_ids)
+    pending = {}
+    for session_id, readings in get_reading_store().fetch_sessions(session_ids).items():
+        fingerprint = SessionFingerprint(
+            session_id, len(readings), int(readings["esp32_ms_A"].max())
+        )
+        key = AngleCacheKey(fingerprint, estimator_type, float(sample_rate), filter_type)
+        processed_df = angle_cache.get(key)
+        if processed_df is not None:
+            results[session_id] = processed_df
+        else:
+            pending[session_id] = (key, readings)
+
+    options = dict(estimator_type=estimator_type, sample_rate=sample_rate, filter_type=filter_type)
+    if executor is not None:
+        futures = {
+            session_id: executor.submit(
+                process_session_angles_incremental, session_id, readings, **options
+            )
+            for session_id, (_, readings) in pending.items()
+        }
+    logger.info(f"Processing {len(pending)} of {len(session_ids)} sessions")
+
+    for session_id, (key, readings) in pending.items():
+        if executor is not None:
+            processed_df, checkpoint = futures[session_id].result()
+        else:
+            processed_df, checkpoint = process_session_angles_incremental(
+                session_id, readings, **options
+            )
+        angle_cache.put(key, processed_df)
+        if checkpoint is not None:
+            checkpoint_store.save(checkpoint, processed_df)
+        results[session_id] = processed_df
+    return results
+
+
+def _process_resampled(
+    session_id: str, estimator_type, sample_rate, filter_type, compute=None
+) -> pd.DataFrame:
+    """Full processing of the aligned, resampled session.
+
+    Not checkpointed: the clock fit covers the whole session, so new
+    readings can shift every resampled row.
+    """
+    from elbow_rehab.service.angle_calculation.alignment import resample_streams
+
+    if compute is None:
+        from elbow_rehab.service.angle_calculation.incremental import (
+            process_session_angles_incremental as compute,
+        )
+
+    readings, alignment = resample_streams(
+        get_reading_store().fetch_session(session_id), sample_rate
+    )
+    if alignment is not None:
+        logger.info(
+            f"Resampled session_ID: {session_id} to {len(readings)} rows "
+            f"(clock B offset {alignment.offset_ms:.0f} ms, drift {alignment.drift:.6f})"
+        )
+    processed_df, _ = compute(
+        session_id,
+        readings,
+        estimator_type=estimator_type,
+        sample_rate=sample_rate,
+        filter_type=filter_type,
+    )
+    return processed_df
+
+
+def _process_from_checkpoint(
+    session_id: str, row_count: int, estimator_type, sample_rate, filter_type, compute=None
+) -> pd.DataFrame:
+    """Continue from the stored checkpoint when only later readings were added.
+
+    Readings that arrive out of order (at or before the checkpointed
+    timestamp) show up as a row-count mismatch and force a full reprocess.
+    """
+    # The filter stack (scipy, ahrs) is imported on the first computation
+    if compute is None:
+        from elbow_rehab.service.angle_calculation.incremental import (
+            process_session_angles_incremental as compute,
+        )
+
+    stored = checkpoint_store.load(session_id, estimator_type, sample_rate, filter_type)
+    if stored is not None:
+        checkpoint, processed_df = stored
+        if checkpoint.row_count == row_count:
+            return processed_df
+
+        new_readings = get_reading_store().fetch_session(
+            session_id, after_ms=checkpoint.last_esp32_ms_A
+        )
+        if checkpoint.row_count + len(new_readings) == row_count:
+            logger.info(
+                f"Processing {len(new_readings)} new readings for session_ID: {session_id}"
+            )
+            new_processed_df, checkpoint = compute(
+                session_id,
+                new_readings,
+                checkpoint,
+                estimator_type=estimator_type,
+                sample_rate=sample_rate,
+                filter_type=filter_type,
+            )
+            processed_df = pd.concat([processed_df, new_processed_df], ignore_index=True)
+            checkpoint_store.save(checkpoint, processed_df)
+            return processed_df
+
+        logger.info(f"Out-of-order readings for session_ID: {session_id}; reprocessing")
+
+    processed_df, checkpoint = compute(
+        session_id,
+        get_reading_store().fetch_session(session_id),
+        estimator_type=estimator_type,
+        sample_rate=sample_rate,
+        filter_type=filter_type,
+    )
+    if checkpoint is not None:
+        checkpoint_store.save(checkpoint, processed_df)
+    return processed_df
@@ -0,0 +1,86 @@
+"""Interface shared by the IMU reading storage backends."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from elbow_rehab.service.angle_cache import SessionFingerprint
+from elbow_rehab.service.domain.imu_reading import IMU_FLOAT_FIELDS, IMU_INT_FIELDS
+
+IMU_READING_COLUMNS = (
+    "user_id",
+    "session_time_iso",
+    "session_id",
+    "ingestion_timestamp_iso",
+) + IMU_INT_FIELDS + IMU_FLOAT_FIELDS
+
+# What angle processing needs; the per-row user/session strings are left out.
+SESSION_READING_COLUMNS = ("session_time_iso",) + IMU_INT_FIELDS + IMU_FLOAT_FIELDS
+
+
+def check_columns(columns) -> None:
+    unknown = set(columns) - set(IMU_READING_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown IMU reading columns: {sorted(unknown)}")
+
+
+def split_by_session(df: pd.DataFrame, columns: tuple[str, ...]) -> dict[str, pd.DataFrame]:
+    """Per-session frames of `columns` from `df` sorted by (session_id, esp32_ms_A)."""
+    ids = df["session_id"].to_numpy()
+    if len(ids) == 0:
+        return {}
+    starts = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+    bounds = zip(np.r_[0, starts], np.r_[starts, len(ids)])
+    body = df[list(columns)]
+    return {ids[lo]: body.iloc[lo:hi].reset_index(drop=True) for lo, hi in bounds}
+
+
+class ReadingStore(ABC):
+    """Append-only store of IMU readings, read back one session at a time.
+
+    Rows are shaped like `validate_imu_readings()` output. Backends are
+    expected to be safe to call from worker threads.
+    """
+
+    def ensure_exists(self) -> None:
+        """Create (or check) whatever the backend needs before serving."""
+
+    @abstractmethod
+    def append_readings(self, rows: list[dict]) -> list:
+        """Persist `rows`; returns per-row errors like `insert_rows_json` (empty on success)."""
+
+    @abstractmethod
+    def fetch_session(
+        self,
+        session_id: str,
+        after_ms: int | None = None,
+        columns: tuple[str, ...] = SESSION_READING_COLUMNS,
+    ) -> pd.DataFrame:
+        """Readings of a session sorted by esp32_ms_A, optionally only those after `after_ms`."""
+
+    def fetch_sessions(
+        self,
+        session_ids: Iterable[str],
+        columns: tuple[str, ...] = SESSION_READING_COLUMNS,
+    ) -> dict[str, pd.DataFrame]:
+        """Readings of several sessions, each like `fetch_session`; sessions without readings are left out.
+
+        Backends with per-query overhead should override this with a single read.
+        """
+        frames = {
+            session_id: self.fetch_session(session_id, columns=columns)
+            for session_id in dict.fromkeys(session_ids)
+        }
+        return {session_id: df for session_id, df in frames.items() if len(df)}
+
+    @abstractmethod
+    def session_fingerprint(self, session_id: str) -> SessionFingerprint:
+        """Row count and latest esp32_ms_A of a session."""
+
+    @abstractmethod
+    def list_sessions(self, user_id: str | None = None) -> list[dict]:
+        """`session_id`, `user_id`, `session_time_iso` and `row_count` per session, newest first."""
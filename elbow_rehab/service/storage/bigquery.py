@@ -0,0 +1,125 @@
+from functools import cached_property
+from typing import Iterable
+
+import pandas as pd
+from google.cloud import bigquery, bigquery_storage
+from elbow_rehab.service.logger import get_logger
+from elbow_rehab.service.configure_infrastructure import (
+    ensure_infrastructure_exists,
+    initialize_bigquery_client,
+)
+from elbow_rehab.service.angle_cache import SessionFingerprint
+from elbow_rehab.service.storage.base import (
+    SESSION_READING_COLUMNS,
+    ReadingStore,
+    check_columns,
+    split_by_session,
+)
+
+logger = get_logger()
+
+
+class BigQueryReadingStore(ReadingStore):
+    """Readings in one BigQuery table; clients are created on first use."""
+
+    def __init__(self, project_id: str, dataset: str, table: str):
+        self.project_id = project_id
+        self.dataset = dataset
+        self.table = table
+        self.table_id = f"{project_id}.{dataset}.{table}"
+
+    @cached_property
+    def client(self) -> bigquery.Client:
+        return initialize_bigquery_client(self.project_id)
+
+    @cached_property
+    def bqstorage_client(self) -> bigquery_storage.BigQueryReadClient:
+        return bigquery_storage.BigQueryReadClient()
+
+    def ensure_exists(self) -> None:
+        ensure_infrastructure_exists(self.client, self.project_id, self.dataset, self.table)
+
+    def append_readings(self, rows: list[dict]) -> list:
+        return self.client.insert_rows_json(self.table_id, rows)
+
+    def _query(self, query: str, **params: tuple[str, object]):
+        """Run `query` with `name=(type, value)` parameters; list values become arrays."""
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ArrayQueryParameter(name, type_, value)
+                if isinstance(value, (list, tuple))
+                else bigquery.ScalarQueryParameter(name, type_, value)
+                for name, (type_, value) in params.items()
+            ]
+        )
+        return self.client.query(query, job_config=job_config)
+
+    def fetch_session(
+        self,
+        session_id: str,
+        after_ms: int | None = None,
+        columns: tuple[str, ...] = SESSION_READING_COLUMNS,
+    ) -> pd.DataFrame:
+        """
+        The query is parameterized and ordered server-side; rows are downloaded
+        through the BigQuery Storage Read API as Arrow record batches (a single
+        stream, so the ORDER BY is preserved) and converted to numpy-backed columns.
+        """
+        check_columns(columns)
+        filters = ["session_id = @session_id"]
+        params = {"session_id": ("STRING", session_id)}
+        if after_ms is not None:
+            filters.append("esp32_ms_A > @after_ms")
+            params["after_ms"] = ("INT64", int(after_ms))
+
+        query = (
+            f"SELECT {', '.join(f'`{col}`' for col in columns)} "
+            f"FROM `{self.table_id}` "
+            f"WHERE {' AND '.join(filters)} "
+            "ORDER BY esp32_ms_A"
+        )
+        table = self._query(query, **params).to_arrow(
+            bqstorage_client=self.bqstorage_client
+        )
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    def fetch_sessions(
+        self,
+        session_ids: Iterable[str],
+        columns: tuple[str, ...] = SESSION_READING_COLUMNS,
+    ) -> dict[str, pd.DataFrame]:
+        """One query for all sessions, ordered by session then esp32_ms_A and split locally."""
+        check_columns(columns)
+        select = dict.fromkeys((*columns, "session_id"))
+        query = (
+            f"SELECT {', '.join(f'`{col}`' for col in select)} "
+            f"FROM `{self.table_id}` "
+            "WHERE session_id IN UNNEST(@session_ids) "
+            "ORDER BY session_id, esp32_ms_A"
+        )
+        table = self._query(
+            query, session_ids=("STRING", list(dict.fromkeys(session_ids)))
+        ).to_arrow(bqstorage_client=self.bqstorage_client)
+        return split_by_session(
+            table.to_pandas(split_blocks=True, self_destruct=True), columns
+        )
+
+    def session_fingerprint(self, session_id: str) -> SessionFingerprint:
+        """Scans two columns only."""
+        query = (
+            "SELECT COUNT(*) AS row_count, MAX(esp32_ms_A) AS max_esp32_ms_A "
+            f"FROM `{self.table_id}` WHERE session_id = @session_id"
+        )
+        row = next(iter(self._query(query, session_id=("STRING", session_id)).result()))
+        return SessionFingerprint(session_id, int(row.row_count), row.max_esp32_ms_A)
+
+    def list_sessions(self, user_id: str | None = None) -> list[dict]:
+        where = "WHERE user_id = @user_id" if user_id is not None else ""
+        params = {"user_id": ("STRING", user_id)} if user_id is not None else {}
+        query = (
+            "SELECT session_id, ANY_VALUE(user_id) AS user_id, "
+            "MIN(session_time_iso) AS session_time_iso, COUNT(*) AS row_count "
+            f"FROM `{self.table_id}` {where} "
+            "GROUP BY session_id ORDER BY session_time_iso DESC"
+        )
+        return [dict(row.items()) for row in self._query(query, **params).result()]
@@ -0,0 +1,23 @@
+from functools import lru_cache
+
+from elbow_rehab.service.configure_infrastructure import require_env
+from elbow_rehab.service.storage.base import ReadingStore
+from elbow_rehab.service.storage.settings import LOCAL_STORAGE_DIR, STORAGE_BACKEND
+
+
+@lru_cache(maxsize=1)
+def get_reading_store() -> ReadingStore:
+    """The configured backend (STORAGE_BACKEND), created on first use."""
+    if STORAGE_BACKEND == "parquet":
+        from elbow_rehab.service.storage.parquet import ParquetReadingStore
+
+        return ParquetReadingStore(LOCAL_STORAGE_DIR)
+    if STORAGE_BACKEND == "bigquery":
+        from elbow_rehab.service.storage.bigquery import BigQueryReadingStore
+
+        return BigQueryReadingStore(
+            require_env("PROJECT_ID"),
+            require_env("OUTPUT_DATASET"),
+            require_env("OUTPUT_TABLE"),
+        )
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
@@ -0,0 +1,151 @@
+"""Local columnar backend: Parquet files partitioned by session.
+
+Layout: ``<root>/session_id=<url-quoted id>/<time_ns>-<uuid>.parquet``, one
+file per appended batch. The ``session_id=`` directory names only group
+files; the column itself is stored in each file. Fetching a session only opens its own directory and
+the fingerprint is answered from Parquet footers, so neither touches other
+sessions. Needs no cloud access; meant for on-prem installs and load tests.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from elbow_rehab.service.angle_cache import SessionFingerprint
+from elbow_rehab.service.domain.imu_reading import IMU_FLOAT_FIELDS, IMU_INT_FIELDS
+from elbow_rehab.service.storage.base import (
+    SESSION_READING_COLUMNS,
+    ReadingStore,
+    check_columns,
+)
+
+# Mirrors schema/imu_readings.json
+IMU_READINGS_SCHEMA = pa.schema(
+    [
+        ("user_id", pa.string()),
+        ("session_time_iso", pa.timestamp("us", tz="UTC")),
+        ("session_id", pa.string()),
+        ("ingestion_timestamp_iso", pa.timestamp("us", tz="UTC")),
+    ]
+    + [(name, pa.int64()) for name in IMU_INT_FIELDS]
+    + [(name, pa.float64()) for name in IMU_FLOAT_FIELDS]
+)
+
+_TIMESTAMP_FIELDS = ("session_time_iso", "ingestion_timestamp_iso")
+
+
+def rows_to_table(rows: list[dict]) -> pa.Table:
+    arrays = []
+    for field in IMU_READINGS_SCHEMA:
+        values = [row.get(field.name) for row in rows]
+        if field.name in _TIMESTAMP_FIELDS:
+            values = pd.to_datetime(pd.Series(values), utc=True, format="ISO8601")
+        arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=IMU_READINGS_SCHEMA)
+
+
+class ParquetReadingStore(ReadingStore):
+    def __init__(self, root: str | os.PathLike):
+        self.root = Path(root)
+
+    def ensure_exists(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _session_dir(self, session_id: str) -> Path:
+        return self.root / f"session_id={quote(session_id, safe='')}"
+
+    def _session_files(self, session_id: str) -> list[Path]:
+        return sorted(self._session_dir(session_id).glob("*.parquet"))
+
+    def append_readings(self, rows: list[dict]) -> list:
+        by_session: dict[str, list[dict]] = {}
+        for row in rows:
+            by_session.setdefault(row["session_id"], []).append(row)
+
+        for session_id, session_rows in by_session.items():
+            table = rows_to_table(session_rows)
+            directory = self._session_dir(session_id)
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"{time.time_ns():020d}-{uuid.uuid4().hex}.parquet"
+            tmp = path.with_suffix(".tmp")
+            pq.write_table(table, tmp)
+            # readers only glob *.parquet, so a batch appears all at once
+            os.replace(tmp, path)
+        return []
+
+    def fetch_session(
+        self,
+        session_id: str,
+        after_ms: int | None = None,
+        columns: tuple[str, ...] = SESSION_READING_COLUMNS,
+    ) -> pd.DataFrame:
+        check_columns(columns)
+        read_columns = list(dict.fromkeys((*columns, "esp32_ms_A")))
+        filters = [("esp32_ms_A", ">", int(after_ms))] if after_ms is not None else None
+        tables = [
+            pq.read_table(path, columns=read_columns, filters=filters, partitioning=None)
+            for path in self._session_files(session_id)
+        ]
+        if not tables:
+            table = IMU_READINGS_SCHEMA.empty_table().select(read_columns)
+        else:
+            table = pa.concat_tables(tables)
+        table = table.sort_by("esp32_ms_A").select(list(columns))
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    def session_fingerprint(self, session_id: str) -> SessionFingerprint:
+        row_count = 0
+        max_ms = None
+        for path in self._session_files(session_id):
+            metadata = pq.ParquetFile(path).metadata
+            row_count += metadata.num_rows
+            file_max = _column_max(path, metadata, "esp32_ms_A")
+            if file_max is not None:
+                max_ms = file_max if max_ms is None else max(max_ms, file_max)
+        return SessionFingerprint(session_id, row_count, max_ms)
+
+    def list_sessions(self, user_id: str | None = None) -> list[dict]:
+        sessions = []
+        for directory in self.root.glob("session_id=*"):
+            session_id = unquote(directory.name.partition("=")[2])
+            files = self._session_files(session_id)
+            if not files:
+                continue
+            head = pq.ParquetFile(files[0]).read_row_group(
+                0, columns=["user_id", "session_time_iso"]
+            ).slice(0, 1)
+            owner = head["user_id"][0].as_py()
+            if user_id is not None and owner != user_id:
+                continue
+            sessions.append(
+                {
+                    "session_id": session_id,
+                    "user_id": owner,
+                    "session_time_iso": head["session_time_iso"][0].as_py(),
+                    "row_count": self.session_fingerprint(session_id).row_count,
+                }
+            )
+        sessions.sort(key=lambda s: s["session_time_iso"], reverse=True)
+        return sessions
+
+
+def _column_max(path: Path, metadata: pq.FileMetaData, column: str):
+    """Max of `column` from row-group statistics, reading the column if absent."""
+    index = metadata.schema.names.index(column)
+    maxima = []
+    for rg in range(metadata.num_row_groups):
+        stats = metadata.row_group(rg).column(index).statistics
+        if stats is None or not stats.has_min_max:
+            values = pq.ParquetFile(path).read(columns=[column])[column]
+            return pc.max(values).as_py()
+        maxima.append(stats.max)
+    return max(maxima) if maxima else None
@@ -0,0 +1,7 @@
+"""Storage backend selection, overridable through the environment."""
+
+import os
+
+# "bigquery" (Cloud Run) or "parquet" (local / on-prem, no GCP needed)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "bigquery")
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", "data/readings")
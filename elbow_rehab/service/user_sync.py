@@ -0,0 +1,148 @@
+"""Background, incremental sync of Firebase users into the users table.
+
+Each run pages through Firebase and upserts, one multi-row statement per
+page, only the users created or refreshed after the persisted high-water
+mark. Runs happen on an interval in the background, so readiness never
+waits on it, and `UserSyncWorker.status()` reports how far behind it is.
+
+Firebase keeps no modification time, so an email changed in Firebase only
+reaches the users table once that user's token is next refreshed (an
+active user refreshes hourly). A user who never signs in again keeps the
+old email here.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterable
+
+from elbow_rehab.service.logger import get_logger
+
+logger = get_logger()
+
+USER_SYNC_INTERVAL_S = float(os.getenv("USER_SYNC_INTERVAL_S", "300"))
+# Margin for clock skew between Firebase and this instance
+USER_SYNC_OVERLAP_MS = int(os.getenv("USER_SYNC_OVERLAP_MS", "60000"))
+# 'role' is required by the users schema; new users default to patients
+DEFAULT_USER_ROLE = "patient"
+
+
+@dataclass
+class UserSyncResult:
+    users_seen: int = 0
+    users_written: int = 0
+    high_water_mark_ms: int = 0
+    skipped: bool = False  # another instance held the sync lock
+
+
+def user_change_ms(user) -> int:
+    """Latest Firebase timestamp (ms) at which `user` was created or refreshed.
+
+    Profile edits such as an email change do not move it.
+    """
+    metadata = user.user_metadata
+    return max(metadata.creation_timestamp or 0, metadata.last_refresh_timestamp or 0)
+
+
+def select_changed_users(users: Iterable, high_water_mark_ms: int) -> tuple[list[dict], int]:
+    """Rows to upsert for users changed after the mark, and the newest change seen."""
+    rows = []
+    newest = high_water_mark_ms
+    for user in users:
+        changed_ms = user_change_ms(user)
+        newest = max(newest, changed_ms)
+        if changed_ms > high_water_mark_ms:
+            rows.append({"uid": user.uid, "email": user.email, "role": DEFAULT_USER_ROLE})
+    return rows, newest
+
+
+class UserSyncWorker:
+    """Runs `sync()` now and then every `interval_s`, keeping lag metrics."""
+
+    def __init__(
+        self,
+        sync: Callable[[], UserSyncResult],
+        *,
+        interval_s: float = USER_SYNC_INTERVAL_S,
+    ):
+        self._sync = sync
+        self.interval_s = interval_s
+        self._runner: asyncio.Task | None = None
+        self._stopping: asyncio.Event | None = None
+
+        self.runs = 0
+        self.failures = 0
+        self.last_started_at: float | None = None
+        self.last_success_at: float | None = None
+        self.last_duration_s: float | None = None
+        self.last_error: str | None = None
+        self.last_result: UserSyncResult | None = None
+
+    async def start(self) -> None:
+        self._stopping = asyncio.Event()
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop without waiting for a run in progress; the next start resumes from the mark."""
+        if self._runner is None:
+            return
+        self._stopping.set()
+        self._runner.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._runner
+        self._runner = None
+
+    async def run_once(self) -> None:
+        self.runs += 1
+        self.last_started_at = time.time()
+        try:
+            result = await asyncio.to_thread(self._sync)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            logger.error(f"Firebase user sync failed: {e}")
+            return
+        finally:
+            self.last_duration_s = time.time() - self.last_started_at
+
+        self.last_success_at = time.time()
+        self.last_error = None
+        self.last_result = result
+        logger.info(
+            f"Firebase user sync: {result.users_written} of {result.users_seen} users "
+            f"written in {self.last_duration_s:.1f}s"
+        )
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            await self.run_once()
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval_s)
+            except asyncio.TimeoutError:
+                pass
+
+    def status(self) -> dict:
+        now = time.time()
+        result = self.last_result
+        high_water_mark_ms = result.high_water_mark_ms if result else None
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_started_at": self.last_started_at,
+            "last_success_at": self.last_success_at,
+            "last_duration_s": self.last_duration_s,
+            "last_error": self.last_error,
+            "last_result": asdict(result) if result else None,
+            # how stale the users table may be
+            "seconds_since_last_success": (
+                now - self.last_success_at if self.last_success_at else None
+            ),
+            # age of the newest user change that has been synced
+            "high_water_mark_age_s": (
+                now - high_water_mark_ms / 1000 if high_water_mark_ms else None
+            ),
+        }
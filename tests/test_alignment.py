@@ -0,0 +1,115 @@
+"""
+Test A/B clock alignment and uniform resampling
+"""
+
+import numpy as np
+import pandas as pd
+
+from elbow_rehab.service.angle_calculation.alignment import (
+    SENSOR_COLS_A,
+    SENSOR_COLS_B,
+    drop_duplicate_frames,
+    estimate_clock_alignment,
+    resample_streams,
+)
+
+OFFSET_MS = -4400.0
+DRIFT = 1.0002
+
+
+def signal(t_ms, phase):
+    return np.sin(t_ms / 500.0 + phase)
+
+
+def raw_session(seconds=20, seed=0):
+    """Rows sent every 4 ms carrying the latest ~80 Hz sample of each board."""
+    rng = np.random.default_rng(seed)
+    n = seconds * 80
+    sample_a = 1000 + np.cumsum(rng.uniform(11, 14, n))
+    sample_b = 1000 + np.cumsum(rng.uniform(11, 14, n))
+    rows_t = np.arange(1020.0, min(sample_a[-1], sample_b[-1]), 4.0)
+    latest_a = sample_a[np.searchsorted(sample_a, rows_t, side="right") - 1]
+    latest_b = sample_b[np.searchsorted(sample_b, rows_t, side="right") - 1]
+
+    data = {
+        "session_id": "s1",
+        "esp32_ms_A": np.floor(latest_a).astype(np.int64),
+        "esp32_ms_B": np.floor(OFFSET_MS + DRIFT * latest_b + 0.5).astype(np.int64),
+    }
+    for k, col in enumerate(SENSOR_COLS_A):
+        data[col] = signal(latest_a, k)
+    for k, col in enumerate(SENSOR_COLS_B):
+        data[col] = signal(latest_b, k)
+    df = pd.DataFrame(data)
+    # a glitched clock-B timestamp and a retried upload
+    df.loc[len(df) // 2, "esp32_ms_B"] = 16_751_380
+    return pd.concat([df, df.iloc[100:200]], ignore_index=True)
+
+
+def test_duplicate_frames_are_dropped():
+    df = raw_session()
+
+    deduplicated = drop_duplicate_frames(df)
+
+    assert len(deduplicated) < len(df) - 100
+    assert not deduplicated.duplicated().any()
+
+
+def test_clock_offset_and_drift_are_recovered():
+    ms_a = np.arange(0.0, 60_000, 12.5)
+    ms_b = OFFSET_MS + DRIFT * ms_a + np.random.default_rng(0).uniform(-6, 6, len(ms_a))
+    ms_b[[10, 500]] = [16_751_380, -3]
+
+    alignment = estimate_clock_alignment(ms_a, ms_b)
+
+    assert abs(alignment.drift - DRIFT) < 1e-5
+    assert abs(alignment.offset_ms - OFFSET_MS) < 2
+    assert alignment.outliers == 2
+
+
+def test_percent_level_drift_is_accepted():
+    ms_a = np.arange(0.0, 60_000, 12.5)
+    ms_b = OFFSET_MS + 0.9923 * ms_a
+
+    assert abs(estimate_clock_alignment(ms_a, ms_b).drift - 0.9923) < 1e-6
+
+
+def test_resampled_streams_are_uniform_and_follow_the_signal():
+    df = raw_session()
+
+    resampled, alignment = resample_streams(df, sample_rate=100.0)
+
+    assert alignment is not None and alignment.outliers >= 1
+    assert set(np.diff(resampled["esp32_ms_A"])) <= {9, 10, 11}
+    assert len(resampled) < len(drop_duplicate_frames(df))
+    assert (resampled["session_id"] == "s1").all()
+    assert list(resampled.columns) == list(df.columns)
+
+    t = resampled["esp32_ms_A"].to_numpy(dtype=float)
+    np.testing.assert_allclose(resampled["ax_A"], signal(t, 0), atol=0.05)
+    np.testing.assert_allclose(resampled["ax_B"], signal(t, 0), atol=0.05)
+    # B is on clock A now, so its signal lines up with its own sample times
+    t_b = (resampled["esp32_ms_B"].to_numpy(dtype=float) - alignment.offset_ms) / alignment.drift
+    np.testing.assert_allclose(t_b, t, atol=1.0)
+
+
+def test_dropouts_are_skipped_not_interpolated():
+    df = raw_session()
+    dropout = (df["esp32_ms_A"] > 5000) & (df["esp32_ms_A"] < 6000)
+
+    resampled, _ = resample_streams(df[~dropout], sample_rate=100.0)
+
+    t = resampled["esp32_ms_A"].to_numpy()
+    assert not ((t > 5015) & (t < 5985)).any()
+    steps = np.diff(t)
+    assert (steps > 900).sum() == 1
+    assert set(steps[steps < 900]) <= {9, 10, 11}
+    np.testing.assert_allclose(resampled["ax_A"], signal(t.astype(float), 0), atol=0.05)
+
+
+def test_too_few_samples_are_returned_unaligned():
+    df = raw_session().iloc[:1]
+
+    resampled, alignment = resample_streams(df)
+
+    assert alignment is None and len(resampled) == 1
@@ -0,0 +1,91 @@
+"""
+Test the fingerprint-keyed cache of processed session angles
+"""
+
+import numpy as np
+import pandas as pd
+
+from elbow_rehab.service.angle_cache import (
+    AngleCacheKey,
+    AngleResultCache,
+    SessionFingerprint,
+)
+
+
+def _key(session_id="s1", row_count=100, max_ms=1000, estimator="simple"):
+    fingerprint = SessionFingerprint(session_id, row_count, max_ms)
+    return AngleCacheKey(fingerprint, estimator, 100.0, "madgwick")
+
+
+def _frame(rows=100):
+    return pd.DataFrame(
+        {"flexion_angle": np.arange(rows, dtype=float), "pronation_angle": np.zeros(rows)}
+    )
+
+
+def _frame_bytes(rows=100):
+    return int(_frame(rows).memory_usage(deep=True).sum())
+
+
+def test_hit_and_miss_counters():
+    cache = AngleResultCache(disk_dir=None)
+    assert cache.get(_key()) is None
+
+    df = _frame()
+    cache.put(_key(), df)
+
+    assert cache.get(_key()) is df
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_new_readings_change_the_key():
+    cache = AngleResultCache(disk_dir=None)
+    cache.put(_key(row_count=100, max_ms=1000), _frame())
+
+    assert cache.get(_key(row_count=120, max_ms=1200)) is None
+    assert cache.get(_key(estimator="alignment_free")) is None
+
+
+def test_lru_evicts_least_recently_used_within_byte_budget():
+    cache = AngleResultCache(max_bytes=2 * _frame_bytes(), disk_dir=None)
+    cache.put(_key("a"), _frame())
+    cache.put(_key("b"), _frame())
+    cache.get(_key("a"))
+    cache.put(_key("c"), _frame())
+
+    assert cache.get(_key("b")) is None
+    assert cache.get(_key("a")) is not None
+    assert cache.get(_key("c")) is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_oversized_frame_is_not_kept_in_memory():
+    cache = AngleResultCache(max_bytes=_frame_bytes(10), disk_dir=None)
+    cache.put(_key(), _frame(1000))
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_disk_tier_survives_a_new_cache_instance(tmp_path):
+    df = _frame()
+    AngleResultCache(disk_dir=tmp_path).put(_key(), df)
+
+    cache = AngleResultCache(disk_dir=tmp_path)
+    restored = cache.get(_key())
+
+    pd.testing.assert_frame_equal(restored, df)
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get(_key()) is restored
+
+
+def test_invalidate_drops_only_that_session():
+    cache = AngleResultCache(disk_dir=None)
+    cache.put(_key("a"), _frame())
+    cache.put(_key("b"), _frame())
+
+    cache.invalidate("a")
+
+    assert cache.get(_key("a")) is None
+    assert cache.get(_key("b")) is not None
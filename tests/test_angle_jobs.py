@@ -0,0 +1,112 @@
+"""
+Test the angle job queue: deduplication, bounds and results
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from elbow_rehab.service.angle_cache import SessionFingerprint
+from elbow_rehab.service.angle_jobs import (
+    AngleJobManager,
+    AngleJobQueueFull,
+    AngleJobSpec,
+)
+
+SPEC = AngleJobSpec("u1_session", "simple", 100.0, "madgwick")
+
+
+def fingerprint(session_id):
+    rows = 0 if session_id == "missing" else 10
+    return SessionFingerprint(session_id, rows, 90 if rows else None)
+
+
+def manager(run_job, **kwargs):
+    return AngleJobManager(
+        run_job, fingerprint, lambda: ThreadPoolExecutor(max_workers=2), **kwargs
+    )
+
+
+async def wait_finished(jobs, job_id):
+    for _ in range(500):
+        if jobs.get(job_id).finished:
+            return jobs.get(job_id)
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_identical_jobs_are_deduplicated_and_succeed():
+    release = threading.Event()
+    calls = []
+
+    def run_job(spec, fp, executor):
+        calls.append(spec)
+        release.wait(5)
+        return executor.submit(pd.DataFrame, {"flexion_deg": [1.0, 2.0]}).result()
+
+    async def scenario():
+        jobs = manager(run_job)
+        first = await jobs.submit(SPEC)
+        second = await jobs.submit(SPEC)
+        other = await jobs.submit(AngleJobSpec("u1_session", "simple", 50.0, "madgwick"))
+        assert second is first and other is not first
+        release.set()
+        done = await wait_finished(jobs, first.job_id)
+        await jobs.shutdown()
+        return done
+
+    job = asyncio.run(scenario())
+    assert job.status == "succeeded"
+    assert job.result["flexion_deg"].tolist() == [1.0, 2.0]
+    assert job.to_dict()["row_count"] == 10
+    assert len(calls) == 2
+
+
+def test_pending_jobs_are_bounded():
+    release = threading.Event()
+
+    async def scenario():
+        jobs = manager(lambda spec, fp, ex: release.wait(5), workers=1, max_pending=2)
+        await jobs.submit(SPEC)
+        await jobs.submit(AngleJobSpec("u2_session", "simple", 100.0, "madgwick"))
+        with pytest.raises(AngleJobQueueFull) as excinfo:
+            await jobs.submit(AngleJobSpec("u3_session", "simple", 100.0, "madgwick"))
+        assert excinfo.value.retry_after_s >= 1
+        assert jobs.stats()["running"] == 1 and jobs.stats()["queued"] == 1
+        release.set()
+        await jobs.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_missing_session_and_failures():
+    def run_job(spec, fp, executor):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        jobs = manager(run_job)
+        assert await jobs.submit(AngleJobSpec("missing", "simple", 100.0, "madgwick")) is None
+        job = await jobs.submit(SPEC)
+        done = await wait_finished(jobs, job.job_id)
+        await jobs.shutdown()
+        return done
+
+    job = asyncio.run(scenario())
+    assert job.status == "failed" and job.error == "boom"
+
+
+def test_finished_jobs_expire():
+    async def scenario():
+        jobs = manager(lambda spec, fp, ex: None, result_ttl_s=0)
+        job = await jobs.submit(SPEC)
+        for _ in range(500):
+            if job.finished:
+                break
+            await asyncio.sleep(0.01)
+        await jobs.shutdown()
+        return jobs.get(job.job_id)
+
+    assert asyncio.run(scenario()) is None
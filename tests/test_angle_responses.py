@@ -0,0 +1,133 @@
+"""
+Test the streamed /calculate_angles response encodings
+"""
+
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from elbow_rehab.service.responses import (
+    ARROW_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    NotAcceptable,
+    iter_arrow_stream,
+    iter_json_message,
+    iter_json_sessions,
+    iter_ndjson,
+    negotiate_media_type,
+    select_columns,
+    serialize_sessions,
+    to_parquet_bytes,
+)
+
+
+@pytest.fixture
+def frame():
+    n = 23
+    return pd.DataFrame(
+        {
+            "session_id": ["s1"] * n,
+            "esp32_ms_A": np.arange(n, dtype=np.int64) * 10,
+            "flexion_deg": np.linspace(-10.0, 95.123456789, n),
+            "pronation_deg": np.linspace(5.0, -40.0, n),
+        }
+    )
+
+
+def test_json_message_matches_records_in_chunks(frame):
+    body = b"".join(iter_json_message(frame, chunk_rows=5))
+
+    records = json.loads(body)["message"]
+    expected = frame.to_dict(orient="records")
+
+    assert [r["esp32_ms_A"] for r in records] == [r["esp32_ms_A"] for r in expected]
+    np.testing.assert_allclose(
+        [r["flexion_deg"] for r in records], frame["flexion_deg"], rtol=1e-14
+    )
+
+
+def test_empty_frame_is_an_empty_message(frame):
+    assert json.loads(b"".join(iter_json_message(frame.iloc[:0]))) == {"message": []}
+
+
+def test_ndjson_has_one_record_per_line(frame):
+    lines = b"".join(iter_ndjson(frame, chunk_rows=4)).decode().splitlines()
+
+    assert len(lines) == len(frame)
+    assert json.loads(lines[-1])["esp32_ms_A"] == 220
+
+
+def test_arrow_stream_round_trips(frame):
+    body = b"".join(iter_arrow_stream(frame, chunk_rows=10))
+
+    restored = pa.ipc.open_stream(body).read_pandas()
+    pd.testing.assert_frame_equal(restored, frame)
+
+
+def test_parquet_round_trips(frame):
+    restored = pd.read_parquet(io.BytesIO(to_parquet_bytes(frame)))
+
+    pd.testing.assert_frame_equal(restored, frame)
+
+
+def test_select_columns(frame):
+    selected = select_columns(frame, ["esp32_ms_A,flexion_deg", "pronation_deg"])
+
+    assert list(selected.columns) == ["esp32_ms_A", "flexion_deg", "pronation_deg"]
+    assert select_columns(frame, None) is frame
+    with pytest.raises(KeyError):
+        select_columns(frame, ["nope"])
+
+
+def test_select_columns_drops_repeated_names(frame):
+    selected = select_columns(frame, ["flexion_deg,flexion_deg", "esp32_ms_A", "flexion_deg"])
+
+    assert list(selected.columns) == ["flexion_deg", "esp32_ms_A"]
+    body = b"".join(iter_json_message(selected, chunk_rows=2))
+    assert len(json.loads(body)["message"]) == len(frame)
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, JSON_MEDIA_TYPE),
+        ("*/*", JSON_MEDIA_TYPE),
+        ("application/x-ndjson", NDJSON_MEDIA_TYPE),
+        ("text/html, application/vnd.apache.arrow.stream", ARROW_MEDIA_TYPE),
+        (
+            "application/json;q=0.5, application/vnd.apache.parquet",
+            PARQUET_MEDIA_TYPE,
+        ),
+    ],
+)
+def test_negotiate_media_type(accept, expected):
+    assert negotiate_media_type(accept) == expected
+
+
+def test_negotiate_rejects_unsupported_types():
+    with pytest.raises(NotAcceptable):
+        negotiate_media_type("text/csv")
+
+
+def test_json_sessions_are_keyed_by_id(frame):
+    body = b"".join(iter_json_sessions({"s1": frame, "missing": None}, chunk_rows=5))
+
+    sessions = json.loads(body)["sessions"]
+    assert sessions["missing"] is None
+    assert len(sessions["s1"]) == len(frame)
+
+
+def test_columnar_sessions_carry_session_id(frame):
+    body = b"".join(
+        serialize_sessions({"s1": frame, "s2": frame.iloc[:3], "missing": None}, ARROW_MEDIA_TYPE)
+    )
+
+    table = pa.ipc.open_stream(io.BytesIO(body)).read_all()
+    assert table.column_names[0] == "session_id"
+    assert table["session_id"].to_pylist() == ["s1"] * len(frame) + ["s2"] * 3
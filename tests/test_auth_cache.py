@@ -0,0 +1,112 @@
+"""
+Test the verified-token cache and signing-key refresh in auth
+"""
+
+import asyncio
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from elbow_rehab.service import auth
+from elbow_rehab.service.auth import SigningKeys, TokenCache, parse_max_age
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_cache_expires_at_exp_and_is_bounded():
+    clock = FakeClock()
+    cache = TokenCache(max_entries=2, clock=clock)
+
+    cache.put("a", {"uid": "a", "exp": 1010})
+    cache.put("b", {"uid": "b", "exp": 2000})
+    cache.put("expired", {"uid": "x", "exp": 999})
+    assert cache.get("a")["uid"] == "a"
+    assert cache.get("expired") is None
+
+    # "b" is least recently used
+    cache.put("c", {"uid": "c", "exp": 2000})
+    assert cache.get("b") is None and len(cache) == 2
+
+    clock.now = 1010
+    assert cache.get("a") is None
+    assert cache.get("c")["uid"] == "c"
+
+
+def test_token_cache_keys_by_digest_not_token():
+    cache = TokenCache(clock=FakeClock())
+    cache.put("secret-token", {"uid": "u", "exp": 2000})
+
+    assert all(isinstance(key, bytes) and len(key) == 32 for key in cache._entries)
+    assert b"secret-token" not in cache._entries
+
+
+def test_signing_keys_refresh_before_max_age():
+    clock = FakeClock()
+    fetches = []
+
+    def fetch():
+        fetches.append(clock.now)
+        return {"kid": "cert"}, 3600.0
+
+    keys = SigningKeys(fetch, refresh_margin_s=300, clock=clock)
+    assert keys.seconds_until_refresh() == 0
+
+    assert keys.certs() == {"kid": "cert"}
+    assert keys.certs() == {"kid": "cert"}
+    assert len(fetches) == 1
+    assert keys.seconds_until_refresh() == 3300
+
+    clock.now += 3600
+    keys.certs()
+    assert len(fetches) == 2
+
+
+def test_background_refresh_prefetches_keys():
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return {"kid": "cert"}, 3600.0
+
+    async def scenario():
+        keys = SigningKeys(fetch)
+        await keys.start()
+        for _ in range(500):
+            if keys.seconds_until_refresh() > 0:
+                break
+            await asyncio.sleep(0.01)
+        await keys.stop()
+        return keys
+
+    keys = asyncio.run(scenario())
+    assert keys.seconds_until_refresh() > 0
+    assert keys.certs() == {"kid": "cert"} and fetches == [1]
+
+
+def test_parse_max_age():
+    assert parse_max_age("public, max-age=19302, must-revalidate") == 19302
+    assert parse_max_age(None, default=60) == 60
+
+
+def test_dependency_verifies_each_token_once(monkeypatch):
+    calls = []
+
+    def verify(token):
+        calls.append(token)
+        return {"uid": "user-1", "exp": 4_000_000_000}
+
+    monkeypatch.setattr(auth, "verify_token", verify)
+    monkeypatch.setattr(auth, "token_cache", TokenCache())
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="token")
+
+    async def scenario():
+        return [await auth.get_firebase_user_from_token(credentials) for _ in range(3)]
+
+    users = asyncio.run(scenario())
+    assert [user["uid"] for user in users] == ["user-1"] * 3
+    assert calls == ["token"]
@@ -1,5 +1,4 @@
 import pytest
-from elbow_rehab.service.big_query import get_imu_reading_df
 from elbow_rehab.service.main import calculate_angles
 
 
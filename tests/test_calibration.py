@@ -0,0 +1,92 @@
+"""
+Test gyro calibration on the stillest window of a session
+"""
+
+import numpy as np
+import pandas as pd
+
+from elbow_rehab.service.angle_calculation.calibration import (
+    _window_sums,
+    calibrate_gyro_blocks,
+    find_gyro_calibration,
+    get_gyro_biases,
+)
+
+G = 9.81
+BIAS_A = np.array([0.02, -0.01, 0.005])
+BIAS_B = np.array([-0.03, 0.015, 0.0])
+
+
+def session(n=1000, moving=slice(0, 250), seed=0):
+    """Still sensors with constant gyro bias, except while `moving`."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for sensor, bias in (("A", BIAS_A), ("B", BIAS_B)):
+        gyro = bias + rng.normal(0, 0.002, (n, 3))
+        acc = np.array([0.0, 0.0, G]) + rng.normal(0, 0.02, (n, 3))
+        gyro[moving] += rng.normal(0, 1.0, (len(range(n)[moving]), 3))
+        acc[moving] += rng.normal(0, 2.0, (len(range(n)[moving]), 3))
+        for i, axis in enumerate("xyz"):
+            data[f"g{axis}_{sensor}"] = gyro[:, i]
+            data[f"a{axis}_{sensor}"] = acc[:, i]
+    return pd.DataFrame(data)
+
+
+def test_window_sums_match_rolling():
+    x = np.random.default_rng(1).normal(size=(50, 2))
+
+    sums = _window_sums(x, 7)
+
+    expected = pd.DataFrame(x).rolling(7).sum().to_numpy()[6:]
+    np.testing.assert_allclose(sums, expected)
+
+
+def test_bias_ignores_early_movement():
+    df = session()
+
+    calibration = find_gyro_calibration(df, window=300)
+
+    assert calibration.start >= 250
+    assert calibration.stop - calibration.start == 300
+    measured = [calibration.biases[f"g{axis}_A"] for axis in "xyz"]
+    np.testing.assert_allclose(measured, BIAS_A, atol=1e-3)
+    # the fixed first-300-rows estimate is thrown off by the movement
+    first_rows = df[["gx_A", "gy_A", "gz_A"]].iloc[:300].mean().to_numpy()
+    assert np.abs(first_rows - BIAS_A).max() > 1e-2
+
+
+def test_search_is_limited_to_the_opening_span():
+    df = session(n=1200, moving=slice(0, 900))
+
+    calibration = find_gyro_calibration(df, window=300, search_frames=1000)
+
+    assert calibration.stop <= 1000
+    assert get_gyro_biases(df, 300, search_frames=None)["gx_B"] == find_gyro_calibration(
+        df, window=300, search_frames=None
+    ).biases["gx_B"]
+
+
+def test_short_sessions_and_nan_windows():
+    df = session(n=100, moving=slice(0, 0))
+    short = find_gyro_calibration(df, window=300)
+    assert (short.start, short.stop) == (0, 100)
+
+    df = session(n=1000, moving=slice(0, 0))
+    df.loc[:600, "gx_A"] = np.nan
+    calibration = find_gyro_calibration(df, window=300)
+    assert calibration.start > 600
+    assert np.isfinite(list(calibration.biases.values())).all()
+
+
+def test_blocks_are_not_modified():
+    df = session()
+    blocks = [
+        df[[f"{kind}{axis}_{sensor}" for axis in "xyz"]].to_numpy()
+        for kind, sensor in (("g", "A"), ("g", "B"), ("a", "A"), ("a", "B"))
+    ]
+    copies = [block.copy() for block in blocks]
+
+    calibrate_gyro_blocks(*blocks, window=300)
+
+    for block, copy in zip(blocks, copies):
+        np.testing.assert_array_equal(block, copy)
@@ -0,0 +1,64 @@
+"""
+Test the shape-preserving downsamplers used for chart responses
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from elbow_rehab.service.analytics.decimation import (
+    decimate_frame,
+    lttb_indices,
+    minmax_indices,
+)
+
+
+def session_frame(n=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) * 10
+    flexion = 60 * np.sin(t / 3000.0) + rng.normal(0, 1, n)
+    pronation = 30 * np.cos(t / 1700.0) + rng.normal(0, 1, n)
+    # a short spike that a naive stride would miss
+    flexion[n * 5 // 8] = 140.0
+    return pd.DataFrame(
+        {"esp32_ms_A": t, "flexion_deg": flexion, "pronation_deg": pronation}
+    )
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_decimation_bounds_size_and_keeps_range_of_motion(method):
+    df = session_frame()
+
+    decimated = decimate_frame(df, max_points=1000, method=method)
+
+    assert len(decimated) <= 1000
+    assert decimated.index.is_monotonic_increasing
+    assert decimated.index[0] == 0 and decimated.index[-1] == len(df) - 1
+    for col in ("flexion_deg", "pronation_deg"):
+        assert decimated[col].max() == df[col].max()
+        assert decimated[col].min() == df[col].min()
+
+
+def test_short_frames_are_returned_unchanged():
+    df = session_frame(n=50)
+
+    assert decimate_frame(df, max_points=100) is df
+
+
+def test_minmax_picks_bucket_extrema():
+    y = np.array([3.0, 1.0, 2.0, 9.0, 0.0, 5.0, np.nan, 7.0])
+
+    indices = minmax_indices(y, buckets=2)
+
+    np.testing.assert_array_equal(indices, [1, 3, 4, 7])
+
+
+def test_lttb_keeps_endpoints_and_threshold():
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 50.0)
+
+    indices = lttb_indices(x, y, threshold=100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
@@ -0,0 +1,40 @@
+# tests/test_ekf_filter.py
+import numpy as np
+import pytest
+
+from elbow_rehab.service.angle_calculation.filters.EKF import ExtendedKalmanFilter
+
+G = 9.81
+
+
+def test_run_matches_update_loop():
+    rng = np.random.default_rng(1)
+    acc = np.array([0.0, 0.0, G]) + rng.normal(0, 0.05, (300, 3))
+    gyro = rng.normal(0, 0.02, (300, 3)) + np.array([0.01, -0.02, 0.005])
+
+    looped = ExtendedKalmanFilter(frequency=100)
+    expected_q, expected_b = [], []
+    for a, g in zip(acc, gyro):
+        expected_q.append(looped.update(a, g).copy())
+        expected_b.append(looped.get_bias())
+
+    batched = ExtendedKalmanFilter(frequency=100)
+    quats, biases = batched.run(acc, gyro, return_bias=True)
+
+    np.testing.assert_allclose(quats, np.array(expected_q), atol=1e-12)
+    np.testing.assert_allclose(biases, np.array(expected_b), atol=1e-12)
+    assert quats.shape == (300, 4)
+    assert biases.shape == (300, 3)
+
+
+def test_run_returns_quaternions_only_by_default():
+    f = ExtendedKalmanFilter(frequency=100)
+    quats = f.run(np.tile([0.0, 0.0, G], (10, 1)), np.zeros((10, 3)))
+    assert quats.shape == (10, 4)
+    np.testing.assert_allclose(np.linalg.norm(quats, axis=1), 1.0, atol=1e-12)
+
+
+def test_run_rejects_mismatched_shapes():
+    f = ExtendedKalmanFilter(frequency=100)
+    with pytest.raises(ValueError):
+        f.run(np.zeros((5, 3)), np.zeros((4, 3)))
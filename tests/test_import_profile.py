@@ -0,0 +1,38 @@
+"""
+Test the import-time profile and that heavy modules stay lazy
+"""
+
+import subprocess
+import sys
+
+from elbow_rehab.service.import_profile import parse_importtime, summarize
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      3000 |       3000 |     scipy.linalg
+import time:      1000 |       4000 |   scipy
+import time:       500 |       4620 | elbow_rehab.service.main
+"""
+
+
+def test_parse_and_summarize_importtime():
+    timings = parse_importtime(SAMPLE)
+
+    assert [t.module for t in timings] == ["_io", "scipy.linalg", "scipy", "elbow_rehab.service.main"]
+    assert timings[1].depth == 2 and timings[3].depth == 0
+
+    summary = summarize(timings)
+    assert summary["total_us"] == 4620
+    assert summary["packages"][0] == {"package": "scipy", "self_us": 4000}
+
+
+def test_angle_service_import_does_not_load_analytics_stack():
+    code = (
+        "import sys, elbow_rehab.service.session_angles, elbow_rehab.service.analytics.plot_service;"
+        "print(' '.join(m for m in ('scipy', 'ahrs', 'matplotlib', 'sqlalchemy') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == ""
@@ -0,0 +1,157 @@
+"""
+Test the compact IMU upload formats
+"""
+
+import json
+import time
+
+import numpy as np
+import pytest
+
+from elbow_rehab.service.domain.imu_reading import (
+    IMU_FLOAT_FIELDS,
+    IMU_INT_FIELDS,
+    IMU_RECORD_DTYPE,
+    ImuBatchValidationError,
+)
+from elbow_rehab.service.ingestion.payloads import (
+    BINARY_CONTENT_TYPE,
+    COLUMNS_CONTENT_TYPE,
+    UnsupportedPayloadType,
+    decode_imu_upload,
+)
+
+USER_ID = "test_user"
+SESSION_TIME = "2026-01-01T00:00:00Z"
+
+
+def readings(n=4):
+    return [
+        {"session_time_iso": SESSION_TIME, "esp32_ms_A": 1000 + 10 * i, "esp32_ms_B": 990 + 10 * i,
+         **{name: 0.25 * (i + j) for j, name in enumerate(IMU_FLOAT_FIELDS)}}
+        for i in range(n)
+    ]
+
+
+def without_timestamp(rows):
+    return [{k: v for k, v in row.items() if k != "ingestion_timestamp_iso"} for row in rows]
+
+
+def test_columnar_json_matches_row_json():
+    rows = readings()
+    columnar = {
+        "session_time_iso": SESSION_TIME,
+        "columns": {name: [r[name] for r in rows] for name in IMU_INT_FIELDS + IMU_FLOAT_FIELDS},
+    }
+
+    from_rows = decode_imu_upload("application/json", json.dumps(rows).encode(), USER_ID)
+    from_columns = decode_imu_upload(
+        COLUMNS_CONTENT_TYPE, json.dumps(columnar).encode(), USER_ID
+    )
+
+    assert without_timestamp(from_columns) == without_timestamp(from_rows)
+
+
+def test_binary_records_match_row_json():
+    rows = readings()
+    records = np.zeros(len(rows), dtype=IMU_RECORD_DTYPE)
+    for name in IMU_RECORD_DTYPE.names:
+        records[name] = [r[name] for r in rows]
+
+    decoded = decode_imu_upload(
+        BINARY_CONTENT_TYPE, records.tobytes(), USER_ID, session_time_iso=SESSION_TIME
+    )
+    from_rows = decode_imu_upload("application/json", json.dumps(rows).encode(), USER_ID)
+
+    assert without_timestamp(decoded) == without_timestamp(from_rows)
+    assert len(records.tobytes()) * 4 < len(json.dumps(rows))
+
+
+def test_binary_requires_whole_records_and_session_header():
+    body = np.zeros(2, dtype=IMU_RECORD_DTYPE).tobytes()
+    with pytest.raises(ImuBatchValidationError):
+        decode_imu_upload(BINARY_CONTENT_TYPE, body[:-3], USER_ID, session_time_iso=SESSION_TIME)
+    with pytest.raises(ImuBatchValidationError):
+        decode_imu_upload(BINARY_CONTENT_TYPE, body, USER_ID)
+
+
+def test_columnar_reports_bad_index():
+    rows = readings()
+    columns = {name: [r[name] for r in rows] for name in IMU_INT_FIELDS + IMU_FLOAT_FIELDS}
+    columns["gz_B"][2] = "oops"
+    body = json.dumps({"session_time_iso": SESSION_TIME, "columns": columns}).encode()
+
+    with pytest.raises(ImuBatchValidationError) as exc:
+        decode_imu_upload(COLUMNS_CONTENT_TYPE, body, USER_ID)
+
+    assert exc.value.index == 2
+
+
+@pytest.mark.parametrize("bad_value", [None, float("inf"), float("nan")])
+def test_columnar_rejects_missing_and_non_finite_samples(bad_value):
+    rows = readings()
+    columns = {name: [r[name] for r in rows] for name in IMU_INT_FIELDS + IMU_FLOAT_FIELDS}
+    columns["ax_A"][1] = bad_value
+    body = json.dumps({"session_time_iso": SESSION_TIME, "columns": columns}).encode()
+
+    with pytest.raises(ImuBatchValidationError) as exc:
+        decode_imu_upload(COLUMNS_CONTENT_TYPE, body, USER_ID)
+    assert exc.value.index == 1
+    assert str(exc.value).startswith("ax_A:")
+
+    rows[1]["ax_A"] = bad_value
+    with pytest.raises(ImuBatchValidationError):
+        decode_imu_upload("application/json", json.dumps(rows).encode(), USER_ID)
+
+
+def test_binary_floats_keep_their_decimal_values():
+    records = np.zeros(2, dtype=IMU_RECORD_DTYPE)
+    records["ax_A"] = [0.1, -9.81]
+    body = records.tobytes()
+
+    decoded = decode_imu_upload(BINARY_CONTENT_TYPE, body, USER_ID, session_time_iso=SESSION_TIME)
+    assert [row["ax_A"] for row in decoded] == [0.1, -9.81]
+
+    records["gz_B"][1] = np.nan
+    with pytest.raises(ImuBatchValidationError) as exc:
+        decode_imu_upload(BINARY_CONTENT_TYPE, records.tobytes(), USER_ID, session_time_iso=SESSION_TIME)
+    assert exc.value.index == 1
+
+
+def test_unknown_content_type_is_rejected():
+    with pytest.raises(UnsupportedPayloadType):
+        decode_imu_upload("text/csv", b"[]", USER_ID)
+
+
+def test_binary_floats_match_their_shortest_repr():
+    rng = np.random.default_rng(0)
+    column = (rng.normal(0, 5, 5000) * 10.0 ** rng.integers(-4, 3, 5000)).astype(np.float32)
+    column[:3] = [0.0, -0.0, 1.0]
+    records = np.zeros(len(column), dtype=IMU_RECORD_DTYPE)
+    records["ax_A"] = column
+
+    decoded = decode_imu_upload(BINARY_CONTENT_TYPE, records.tobytes(), USER_ID, session_time_iso=SESSION_TIME)
+    values = [row["ax_A"] for row in decoded]
+    assert values == [float(str(v)) for v in column]
+
+
+def test_binary_decodes_faster_than_row_json():
+    rows = readings(6000)
+    records = np.zeros(len(rows), dtype=IMU_RECORD_DTYPE)
+    for name in IMU_RECORD_DTYPE.names:
+        records[name] = [r[name] for r in rows]
+    binary, row_json = records.tobytes(), json.dumps(rows).encode()
+
+    def best_of(decode, repeat=5):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            decode()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    binary_s = best_of(
+        lambda: decode_imu_upload(BINARY_CONTENT_TYPE, binary, USER_ID, session_time_iso=SESSION_TIME)
+    )
+    json_s = best_of(lambda: decode_imu_upload("application/json", row_json, USER_ID))
+    assert binary_s < json_s
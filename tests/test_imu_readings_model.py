@@ -2,8 +2,13 @@
 Test the ImuReading Pydantic model
 """
 
+import pytest
 from datetime import datetime, timezone
-from elbow_rehab.service.domain.imu_reading import ImuReading
+from elbow_rehab.service.domain.imu_reading import (
+    ImuBatchValidationError,
+    ImuReading,
+    validate_imu_readings,
+)
 
 
 def test_imu_reading_model():
@@ -46,3 +51,37 @@ def test_imu_reading_model():
     now = datetime.now(timezone.utc)
     delta = now - imu_reading.ingestion_timestamp_iso.replace(tzinfo=timezone.utc)
     assert delta.total_seconds() < 5
+
+
+def test_batch_validation_matches_per_row_model():
+    user_id = "test_user"
+    raw_readings = [
+        {"session_time_iso": "2026-01-01T00:00:00Z", "esp32_ms_A": i, "esp32_ms_B": i + 5,
+         "ax_A": 0.1, "ay_A": 0.2, "az_A": 9.8, "gx_A": 0.0, "gy_A": 0.0, "gz_A": 0.01,
+         "ax_B": "0.3", "ay_B": 0.0, "az_B": 9.7, "gx_B": 0, "gy_B": 0.0, "gz_B": 0.0}
+        for i in range(3)
+    ]
+
+    rows = validate_imu_readings(raw_readings, user_id)
+
+    assert len(rows) == 3
+    assert len({row["ingestion_timestamp_iso"] for row in rows}) == 1
+    for raw, row in zip(raw_readings, rows):
+        expected = ImuReading(**raw, user_id=user_id).model_dump(mode="json")
+        expected.pop("ingestion_timestamp_iso")
+        row = dict(row)
+        row.pop("ingestion_timestamp_iso")
+        assert row == expected
+
+
+def test_batch_validation_reports_bad_row_index():
+    good = {"session_time_iso": "2026-01-01T00:00:00Z", "esp32_ms_A": 1, "esp32_ms_B": 1,
+            "ax_A": 0.0, "ay_A": 0.0, "az_A": 0.0, "gx_A": 0.0, "gy_A": 0.0, "gz_A": 0.0,
+            "ax_B": 0.0, "ay_B": 0.0, "az_B": 0.0, "gx_B": 0.0, "gy_B": 0.0, "gz_B": 0.0}
+    bad = dict(good, gy_B="not-a-number")
+
+    with pytest.raises(ImuBatchValidationError) as exc:
+        validate_imu_readings([good, good, bad], "test_user")
+
+    assert exc.value.index == 2
+    assert "gy_B" in str(exc.value)
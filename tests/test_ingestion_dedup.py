@@ -0,0 +1,98 @@
+"""
+Test duplicate suppression of re-sent IMU frames
+"""
+
+import pytest
+
+from elbow_rehab.service.ingestion.dedup import BatchInFlight, IngestionDeduplicator
+
+
+def rows(session_id, start, n, step=10):
+    return [
+        {"session_id": session_id, "esp32_ms_A": ms, "esp32_ms_B": ms - 4400}
+        for ms in range(start, start + step * n, step)
+    ]
+
+
+def written(dedup, batch, batch_seq=None):
+    """Filter `batch` and report its write as successful."""
+    result = dedup.filter(batch, batch_seq)
+    dedup.commit(result)
+    return result
+
+
+def test_resent_frames_are_dropped_per_session():
+    dedup = IngestionDeduplicator()
+
+    first = written(dedup, rows("s1", 0, 5))
+    retry = dedup.filter(rows("s1", 30, 5) + rows("s2", 0, 2))
+
+    assert len(first.rows) == 5 and first.duplicates == 0
+    # frames 30 and 40 of s1 were already written; s2 is a different session
+    assert retry.duplicates == 2
+    assert [r["esp32_ms_A"] for r in retry.rows] == [50, 60, 70, 0, 10]
+
+
+def test_duplicates_within_one_batch():
+    result = IngestionDeduplicator().filter(rows("s1", 0, 3) + rows("s1", 0, 3))
+
+    assert len(result.rows) == 3 and result.duplicates == 3
+
+
+def test_replayed_batch_sequence_is_rejected_whole():
+    dedup = IngestionDeduplicator()
+    written(dedup, rows("s1", 0, 3), batch_seq=7)
+
+    replay = dedup.filter(rows("s1", 1000, 3), batch_seq=7)
+    other = dedup.filter(rows("s2", 0, 3), batch_seq=7)
+
+    assert replay.replayed_batch and replay.rows == [] and replay.duplicates == 3
+    assert not other.replayed_batch and len(other.rows) == 3
+
+
+def test_forget_accepts_the_retry_of_a_failed_write():
+    dedup = IngestionDeduplicator()
+    failed = dedup.filter(rows("s1", 0, 4), batch_seq=1)
+
+    dedup.forget(failed)
+    retry = dedup.filter(rows("s1", 0, 4), batch_seq=1)
+
+    assert len(retry.rows) == 4 and not retry.replayed_batch
+    assert dedup.stats()["frames"] == 4
+
+
+def test_retry_during_the_original_write_is_not_acknowledged():
+    dedup = IngestionDeduplicator()
+    original = dedup.filter(rows("s1", 0, 4), batch_seq=3)
+
+    # the device retries while the original is still being spooled
+    with pytest.raises(BatchInFlight):
+        dedup.filter(rows("s1", 20, 4))
+    with pytest.raises(BatchInFlight):
+        dedup.filter(rows("s1", 1000, 2), batch_seq=3)
+    assert dedup.stats()["in_flight_conflicts"] == 2
+    assert dedup.stats()["frames"] == 4
+
+    # the original write fails: the next retry stores every frame
+    dedup.forget(original)
+    retry = written(dedup, rows("s1", 0, 4), batch_seq=3)
+    assert len(retry.rows) == 4
+
+    # once written, a repeat is an ordinary duplicate
+    again = dedup.filter(rows("s1", 0, 4))
+    assert again.rows == [] and again.duplicates == 4
+
+
+def test_index_is_bounded_per_session_and_in_total():
+    dedup = IngestionDeduplicator(window_frames=10, max_frames=25)
+
+    dedup.filter(rows("s1", 0, 15))
+    assert dedup.stats()["frames"] == 10
+    # the oldest frames fell out of the window
+    assert len(dedup.filter(rows("s1", 0, 1)).rows) == 1
+
+    dedup.filter(rows("s2", 0, 10))
+    dedup.filter(rows("s3", 0, 10))
+    stats = dedup.stats()
+    assert stats["frames"] <= 25
+    assert stats["sessions"] == 2
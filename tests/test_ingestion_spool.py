@@ -0,0 +1,190 @@
+"""
+Test the write-ahead ingestion spool and its replayer
+"""
+
+import pytest
+
+from elbow_rehab.service.ingestion.dead_letter import DeadLetterLog
+from elbow_rehab.service.ingestion.spool import SegmentSpool, SpoolReplayer
+from elbow_rehab.service.ingestion.writer import IngestionQueueFull
+
+
+def rows(n, start=0):
+    return [{"esp32_ms_A": start + i} for i in range(n)]
+
+
+class Sink:
+    def __init__(self, fail=False):
+        self.rows = []
+        self.fail = fail
+
+    def __call__(self, batch):
+        if self.fail:
+            return ["warehouse unavailable"]
+        self.rows.extend(batch)
+        return []
+
+
+def test_replay_drains_all_segments_in_order(tmp_path):
+    spool = SegmentSpool(tmp_path, max_segment_bytes=64)
+    for i in range(5):
+        spool.append(rows(3, start=3 * i))
+    assert len(spool.segments()) > 1
+
+    sink = Sink()
+    replayer = SpoolReplayer(spool, sink, max_batch_rows=4)
+    assert replayer.replay_once() == 15
+
+    assert [r["esp32_ms_A"] for r in sink.rows] == list(range(15))
+    assert spool.segments() == [spool.active_segment]
+    assert replayer.replay_once() == 0
+
+
+def test_replay_resumes_from_checkpoint_after_restart(tmp_path):
+    spool = SegmentSpool(tmp_path)
+    spool.append(rows(4))
+    SpoolReplayer(spool, Sink()).replay_once()
+    spool.append(rows(2, start=4))
+    spool.close()
+
+    restarted = SegmentSpool(tmp_path)
+    restarted.append(rows(1, start=6))
+    sink = Sink()
+    SpoolReplayer(restarted, sink).replay_once()
+
+    assert [r["esp32_ms_A"] for r in sink.rows] == [4, 5, 6]
+
+
+def test_failed_insert_keeps_checkpoint(tmp_path):
+    spool = SegmentSpool(tmp_path)
+    spool.append(rows(3))
+
+    assert SpoolReplayer(spool, Sink(fail=True)).replay_once() == 0
+
+    sink = Sink()
+    SpoolReplayer(spool, sink).replay_once()
+    assert len(sink.rows) == 3
+
+
+class RejectingSink(Sink):
+    """Rejects every batch containing a row marked bad, as BigQuery rejects
+    a whole insertAll request with one invalid row."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def __call__(self, batch):
+        self.calls += 1
+        if any(r.get("bad") for r in batch):
+            return [{"index": 0, "errors": [{"reason": "invalid"}]}]
+        return super().__call__(batch)
+
+
+def test_rejected_record_is_dead_lettered_after_max_attempts(tmp_path):
+    spool = SegmentSpool(tmp_path)
+    spool.append(rows(2))
+    spool.append([{"esp32_ms_A": 2, "bad": True}])
+    spool.append(rows(2, start=3))
+
+    sink = RejectingSink()
+    dead_letter = DeadLetterLog(tmp_path / "dead.jsonl")
+    replayer = SpoolReplayer(spool, sink, max_attempts=3, dead_letter=dead_letter.append)
+
+    # the records before the bad one go through on the first attempt
+    assert replayer.replay_once() == 2
+    assert replayer.replay_once() == 0
+    assert dead_letter.read() == []
+
+    assert replayer.replay_once() == 2
+    assert [r["esp32_ms_A"] for r in sink.rows] == [0, 1, 3, 4]
+    assert [r["rows"] for r in dead_letter.read()] == [[{"esp32_ms_A": 2, "bad": True}]]
+    assert replayer.stats()["rows_dead_lettered"] == 1
+
+    spool.append(rows(1, start=5))
+    calls = sink.calls
+    assert replayer.replay_once() == 1
+    assert sink.calls == calls + 1
+
+
+def test_transient_errors_are_retried_without_dead_lettering(tmp_path):
+    spool = SegmentSpool(tmp_path)
+    spool.append(rows(3))
+
+    def unavailable(batch):
+        raise ConnectionError("warehouse unavailable")
+
+    replayer = SpoolReplayer(spool, unavailable, max_attempts=2)
+    for _ in range(5):
+        assert replayer.replay_once() == 0
+    assert replayer.transient_failures == 5
+    assert replayer.rows_dead_lettered == 0
+
+    sink = Sink()
+    SpoolReplayer(spool, sink).replay_once()
+    assert len(sink.rows) == 3
+
+
+def test_client_error_exceptions_count_as_rejections(tmp_path):
+    class BadRequest(Exception):
+        code = 400
+
+    def reject(batch):
+        raise BadRequest("no such field: bad")
+
+    spool = SegmentSpool(tmp_path)
+    spool.append(rows(1))
+    replayer = SpoolReplayer(spool, reject, max_attempts=2)
+    replayer.replay_once()
+    replayer.replay_once()
+
+    assert replayer.rows_dead_lettered == 1
+    assert DeadLetterLog(tmp_path / "dead_letter.jsonl").read()[0]["rows"] == rows(1)
+
+
+def test_torn_and_corrupt_records_are_skipped(tmp_path):
+    spool = SegmentSpool(tmp_path)
+    spool.append(rows(2))
+    spool.close()
+    segment = tmp_path / spool.active_segment
+    with open(segment, "ab") as f:
+        f.write(b"deadbeef [{\"esp32_ms_A\": 99}]\n")
+        f.write(b"0000")  # torn tail from a crash mid-write
+
+    restarted = SegmentSpool(tmp_path)
+    sink = Sink()
+    replayer = SpoolReplayer(restarted, sink)
+    replayer.replay_once()
+
+    assert [r["esp32_ms_A"] for r in sink.rows] == [0, 1]
+    assert replayer.corrupt_records == 1
+    quarantined = (tmp_path / "corrupt.records").read_bytes()
+    assert quarantined.endswith(b" deadbeef [{\"esp32_ms_A\": 99}]\n")
+    assert quarantined.startswith(spool.active_segment.encode() + b"@")
+
+
+def test_corrupt_record_is_not_passed_until_quarantined(tmp_path):
+    spool = SegmentSpool(tmp_path)
+    spool.append(rows(2))
+    spool.close()
+    with open(tmp_path / spool.active_segment, "ab") as f:
+        f.write(b"deadbeef not json\n")
+    (tmp_path / "corrupt.records").mkdir()  # copying the record out fails
+
+    sink = Sink()
+    replayer = SpoolReplayer(SegmentSpool(tmp_path), sink)
+    replayer.replay_once()
+    assert [r["esp32_ms_A"] for r in sink.rows] == [0, 1]
+    assert spool.active_segment in spool.segments()
+
+    (tmp_path / "corrupt.records").rmdir()
+    replayer.replay_once()
+    assert replayer.corrupt_records == 1
+    assert spool.active_segment not in SegmentSpool(tmp_path).segments()
+
+
+def test_spool_size_bound_applies_backpressure(tmp_path):
+    spool = SegmentSpool(tmp_path, max_bytes=100)
+    spool.append(rows(1))
+    with pytest.raises(IngestionQueueFull):
+        spool.append(rows(20))
@@ -0,0 +1,140 @@
+"""
+Test the asynchronous micro-batching ingestion writer
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from elbow_rehab.service.ingestion.dead_letter import DeadLetterLog
+from elbow_rehab.service.ingestion.writer import BatchWriter, IngestionQueueFull
+
+
+def rows(n, start=0):
+    return [{"esp32_ms_A": start + i} for i in range(n)]
+
+
+class RecordingSink:
+    def __init__(self, delay=0.0, fail_times=0):
+        self.batches = []
+        self.delay = delay
+        self.fail_times = fail_times
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, batch):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+            if self.fail_times:
+                self.fail_times -= 1
+                return ["transient"]
+            self.batches.append(list(batch))
+        return []
+
+
+def test_rows_from_many_requests_are_coalesced():
+    sink = RecordingSink()
+
+    async def scenario():
+        writer = BatchWriter(sink, max_batch_rows=100, max_batch_age_s=0.05)
+        await writer.start()
+        for i in range(10):
+            writer.submit(rows(5, start=i * 5))
+        await asyncio.sleep(0.2)
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert len(sink.batches) == 1
+    assert [r["esp32_ms_A"] for r in sink.batches[0]] == list(range(50))
+    assert writer.rows_written == 50
+
+
+def test_full_batches_are_flushed_by_size():
+    sink = RecordingSink()
+
+    async def scenario():
+        writer = BatchWriter(sink, max_batch_rows=10, max_batch_age_s=60)
+        await writer.start()
+        writer.submit(rows(25))
+        await writer.stop()
+
+    asyncio.run(scenario())
+    # batches are flushed concurrently, so they may finish in any order
+    assert sorted(len(b) for b in sink.batches) == [5, 10, 10]
+
+
+def test_queue_bound_applies_backpressure():
+    sink = RecordingSink(delay=0.1)
+
+    async def scenario():
+        writer = BatchWriter(sink, max_batch_rows=10, max_queue_rows=20, retry_after_s=2)
+        await writer.start()
+        writer.submit(rows(20))
+        with pytest.raises(IngestionQueueFull) as exc:
+            writer.submit(rows(1))
+        await writer.stop()
+        return exc.value
+
+    error = asyncio.run(scenario())
+    assert error.retry_after_s == 2
+    assert sum(len(b) for b in sink.batches) == 20
+
+
+def test_concurrent_flushes_are_limited_and_failures_retried():
+    sink = RecordingSink(delay=0.05, fail_times=1)
+
+    async def scenario():
+        writer = BatchWriter(
+            sink, max_batch_rows=5, max_concurrent_flushes=2, retry_after_s=0.01
+        )
+        await writer.start()
+        writer.submit(rows(30))
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert sink.max_active <= 2
+    assert writer.rows_written == 30
+    assert writer.rows_failed == 0
+    assert writer.outstanding_rows == 0
+
+
+def test_exhausted_batches_are_dead_lettered(tmp_path):
+    sink = RecordingSink(fail_times=100)
+    dead_letter = DeadLetterLog(tmp_path / "dead.jsonl")
+
+    async def scenario():
+        writer = BatchWriter(
+            sink, max_batch_rows=5, max_retries=2, retry_after_s=0.01,
+            dead_letter=dead_letter.append,
+        )
+        await writer.start()
+        writer.submit(rows(10))
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert writer.stats()["rows_dead_lettered"] == 10
+    assert writer.rows_dropped == 0
+    parked = dead_letter.read()
+    assert sorted(r["esp32_ms_A"] for record in parked for r in record["rows"]) == list(range(10))
+    assert "transient" in parked[0]["reason"]
+
+
+def test_rows_are_counted_as_dropped_without_dead_letter():
+    async def scenario():
+        writer = BatchWriter(RecordingSink(fail_times=100), max_retries=1)
+        await writer.start()
+        writer.submit(rows(3))
+        await writer.stop()
+        return writer
+
+    assert asyncio.run(scenario()).stats()["rows_dropped"] == 3
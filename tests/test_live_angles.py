@@ -0,0 +1,178 @@
+"""
+Test live angle tracking and the WebSocket session
+"""
+
+import asyncio
+import json
+
+import numpy as np
+import pytest
+from fastapi import FastAPI, HTTPException, WebSocket
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from elbow_rehab.service.angle_calculation.elbow_tracker import ElbowTracker
+from elbow_rehab.service.angle_calculation.imu import IMUSensor
+from elbow_rehab.service.live_angles import (
+    LatestValue,
+    LiveAngleSession,
+    authenticate_websocket,
+    parse_packets,
+    serve_live_angles,
+)
+
+GRAVITY = [0.3, -0.2, 9.8]
+
+
+def packet(sensor, t, gyr=(0.0, 0.0, 0.0)):
+    return {"sensor": sensor, "t": t, "acc": GRAVITY, "gyr": list(gyr)}
+
+
+def still_packets(n, start=0, gyr=(0.0, 0.0, 0.0)):
+    return [packet(s, start + 10 * i, gyr) for i in range(n) for s in ("A", "B")]
+
+
+def tracker(calibration_frames=20):
+    return ElbowTracker(IMUSensor("A", 100.0), IMUSensor("B", 100.0), 100.0, calibration_frames=calibration_frames)
+
+
+def test_tracker_holds_samples_until_calibrated():
+    t = tracker(calibration_frames=20)
+    outputs = [t.add_sample("A", 10 * i, GRAVITY, (0.02, 0.0, -0.01)) for i in range(20)]
+    outputs += [t.add_sample("B", 10 * i, GRAVITY, (0.0, 0.03, 0.0)) for i in range(19)]
+    assert all(o is None for o in outputs) and t.calibrating
+    assert t.calibration_progress == pytest.approx(19 / 20)
+
+    # the 20th B sample completes calibration and replays the held pairs
+    angles = t.add_sample("B", 190, GRAVITY, (0.0, 0.03, 0.0))
+    assert not t.calibrating and angles is not None
+    assert angles.timestamp_ms == 190
+    np.testing.assert_allclose(t.imuA.gyro_bias, [0.02, 0.0, -0.01])
+    np.testing.assert_allclose(t.imuB.gyro_bias, [0.0, 0.03, 0.0])
+
+
+def test_tracker_keeps_only_the_latest_samples_of_a_lone_sensor():
+    t = tracker(calibration_frames=20)
+    for i in range(10_000):
+        assert t.add_sample("A", 10 * i, GRAVITY, (0.0, 0.0, 0.0)) is None
+
+    assert t.calibrating and t.calibration_progress == 0.0
+    assert sum(len(held) for held in t._held.values()) == 20
+
+    for i in range(20):
+        angles = t.add_sample("B", 10 * i, GRAVITY, (0.0, 0.0, 0.0))
+    assert not t.calibrating and angles is not None
+    assert t.pairs == 20
+
+
+def test_tracker_emits_once_per_pair():
+    t = tracker(calibration_frames=5)
+    for sensor, ts, acc, gyr in parse_packets(json.dumps(still_packets(5))):
+        t.add_sample(sensor, ts, acc, gyr)
+
+    assert t.add_sample("A", 100, GRAVITY, (0, 0, 0)) is None
+    assert t.add_sample("A", 110, GRAVITY, (0, 0, 0)) is None
+    angles = t.add_sample("B", 100, GRAVITY, (0, 0, 0))
+    assert angles.timestamp_ms == 110
+    assert abs(angles.flexion_deg) < 1.0 and abs(angles.pronation_deg) < 1.0
+
+
+def test_imu_process_packet():
+    sensor = IMUSensor("A", 100.0)
+    assert not sensor.is_ready
+    sensor.process_packet(b"1234,0.3,-0.2,9.8,0.1,0.0,0.0\n")
+
+    assert sensor.is_ready
+    assert sensor.latest_snapshot.timestamp_ms == 1234
+    with pytest.raises(ValueError):
+        sensor.process_packet(b"1234,0.0,0.0")
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "not json",
+        json.dumps({"sensor": "C", "t": 0, "acc": GRAVITY, "gyr": [0, 0, 0]}),
+        json.dumps({"sensor": "A", "t": 1.5, "acc": GRAVITY, "gyr": [0, 0, 0]}),
+        json.dumps({"sensor": "A", "t": 0, "acc": [0, 0], "gyr": [0, 0, 0]}),
+        json.dumps({"sensor": "A", "t": 0, "acc": GRAVITY, "gyr": [float("inf"), 0, 0]}),
+        json.dumps({"sensor": "B", "t": 0, "acc": [float("nan"), 0, 9.8], "gyr": [0, 0, 0]}),
+        json.dumps([packet("A", 0)] * 10_000),
+    ],
+)
+def test_parse_packets_rejects_malformed_messages(message):
+    with pytest.raises(ValueError):
+        parse_packets(message)
+
+
+def test_latest_value_coalesces_unsent_results():
+    async def run():
+        box = LatestValue()
+        box.put("first")
+        box.put("second", produced=3)
+        assert await box.get() == ("second", 3)
+        box.put("third")
+        return await box.get()
+
+    assert asyncio.run(run()) == ("third", 0)
+
+
+def test_session_replies_with_latest_angles():
+    session = LiveAngleSession(calibration_frames=10)
+
+    reply, produced = session.handle_message(json.dumps(still_packets(5)))
+    assert reply == {"status": "calibrating", "progress": 0.5} and produced == 0
+
+    reply, produced = session.handle_message(json.dumps(still_packets(10, start=50)))
+    # 10 held pairs replayed after calibration plus 5 live ones
+    assert produced == 15
+    assert reply["t"] == 50 + 10 * 9
+
+
+async def fake_authenticate(token):
+    if token != "good-token":
+        raise HTTPException(status_code=401)
+    return {"uid": "u1"}
+
+
+def live_app(auth_timeout_s=5.0):
+    app = FastAPI()
+
+    @app.websocket("/live")
+    async def live(websocket: WebSocket):
+        await websocket.accept()
+        if await authenticate_websocket(websocket, fake_authenticate, auth_timeout_s) is None:
+            return
+        await serve_live_angles(websocket, LiveAngleSession(calibration_frames=5), max_send_hz=1000)
+
+    return TestClient(app)
+
+
+def test_websocket_streams_angles():
+    with live_app().websocket_connect("/live") as ws:
+        ws.send_json({"token": "good-token"})
+        assert ws.receive_json() == {"status": "ready"}
+
+        ws.send_text("{")
+        assert "error" in ws.receive_json()
+
+        ws.send_text(json.dumps(still_packets(8)))
+        reply = ws.receive_json()
+        assert reply["t"] == 70
+        assert reply["coalesced"] == 7
+
+
+@pytest.mark.parametrize("first_message", [{"token": "bad-token"}, {"sensor": "A"}, {"token": 1}])
+def test_websocket_rejects_missing_or_invalid_token(first_message):
+    with live_app().websocket_connect("/live") as ws:
+        ws.send_json(first_message)
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+
+def test_websocket_closes_when_no_token_arrives():
+    with live_app(auth_timeout_s=0.05).websocket_connect("/live") as ws:
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 1008
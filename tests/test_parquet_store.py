@@ -0,0 +1,120 @@
+"""
+Test the local Parquet reading store
+"""
+
+import numpy as np
+import pytest
+
+from elbow_rehab.service.domain.imu_reading import rows_from_columns
+import pandas as pd
+
+from elbow_rehab.service.storage.base import (
+    SESSION_READING_COLUMNS,
+    ReadingStore,
+    split_by_session,
+)
+from elbow_rehab.service.storage.parquet import ParquetReadingStore
+
+
+def session_rows(user_id, session_time_iso, start_ms, n):
+    rng = np.random.default_rng(start_ms)
+    columns = {"esp32_ms_A": list(range(start_ms, start_ms + 10 * n, 10))}
+    columns["esp32_ms_B"] = [ms + 3 for ms in columns["esp32_ms_A"]]
+    for name in ("ax", "ay", "az", "gx", "gy", "gz"):
+        for sensor in ("A", "B"):
+            columns[f"{name}_{sensor}"] = rng.normal(size=n).tolist()
+    return rows_from_columns(user_id, session_time_iso, columns)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ParquetReadingStore(tmp_path / "readings")
+    store.ensure_exists()
+    return store
+
+
+def test_fetch_returns_sorted_session_readings(store):
+    later = session_rows("u1", "2026-01-21T17:28:23Z", 500, 30)
+    earlier = session_rows("u1", "2026-01-21T17:28:23Z", 0, 50)
+    store.append_readings(later)
+    store.append_readings(earlier)
+    store.append_readings(session_rows("u2", "2026-01-22T10:00:00Z", 0, 5))
+
+    df = store.fetch_session("u1_2026-01-21T17:28:23Z")
+
+    assert list(df.columns) == list(SESSION_READING_COLUMNS)
+    assert len(df) == 80
+    assert df["esp32_ms_A"].is_monotonic_increasing
+    assert df["ax_A"].dtype == np.float64
+    assert df["session_time_iso"].iloc[0].year == 2026
+
+
+def test_fetch_after_ms_and_fingerprint(store):
+    store.append_readings(session_rows("u1", "2026-01-21T17:28:23Z", 0, 50))
+    store.append_readings(session_rows("u1", "2026-01-21T17:28:23Z", 500, 20))
+    session_id = "u1_2026-01-21T17:28:23Z"
+
+    newer = store.fetch_session(session_id, after_ms=490)
+    fingerprint = store.session_fingerprint(session_id)
+
+    assert newer["esp32_ms_A"].min() == 500 and len(newer) == 20
+    assert (fingerprint.row_count, fingerprint.max_esp32_ms_A) == (70, 690)
+
+
+def test_unknown_session_is_empty(store):
+    assert store.fetch_session("missing").empty
+    assert store.session_fingerprint("missing").row_count == 0
+
+
+def test_list_sessions_per_user(store):
+    store.append_readings(session_rows("u1", "2026-01-21T17:28:23Z", 0, 10))
+    store.append_readings(session_rows("u1", "2026-01-22T09:00:00Z", 0, 4))
+    store.append_readings(session_rows("u2", "2026-01-23T09:00:00Z", 0, 4))
+
+    sessions = store.list_sessions("u1")
+
+    assert [s["session_id"] for s in sessions] == [
+        "u1_2026-01-22T09:00:00Z",
+        "u1_2026-01-21T17:28:23Z",
+    ]
+    assert sessions[1]["row_count"] == 10
+    assert len(store.list_sessions()) == 3
+
+
+def test_fetch_sessions_skips_sessions_without_readings(store):
+    store.append_readings(session_rows("u1", "2026-01-21T17:28:23Z", 500, 30))
+    store.append_readings(session_rows("u1", "2026-01-21T17:28:23Z", 0, 50))
+    store.append_readings(session_rows("u2", "2026-01-22T10:00:00Z", 0, 5))
+
+    frames = store.fetch_sessions(
+        ["u2_2026-01-22T10:00:00Z", "missing", "u1_2026-01-21T17:28:23Z"]
+    )
+
+    assert list(frames) == ["u2_2026-01-22T10:00:00Z", "u1_2026-01-21T17:28:23Z"]
+    assert len(frames["u1_2026-01-21T17:28:23Z"]) == 80
+    assert frames["u1_2026-01-21T17:28:23Z"]["esp32_ms_A"].is_monotonic_increasing
+
+
+def test_split_by_session():
+    df = pd.DataFrame(
+        {"session_id": ["a", "a", "b", "c", "c"], "esp32_ms_A": [1, 2, 1, 5, 6]}
+    )
+
+    frames = split_by_session(df, ("esp32_ms_A",))
+
+    assert {k: v["esp32_ms_A"].tolist() for k, v in frames.items()} == {
+        "a": [1, 2],
+        "b": [1],
+        "c": [5, 6],
+    }
+    assert list(frames["c"].index) == [0, 1]
+    assert split_by_session(df.iloc[:0], ("esp32_ms_A",)) == {}
+
+
+def test_incomplete_backend_fails_at_construction():
+    class WriteOnlyStore(ReadingStore):
+        def append_readings(self, rows):
+            return []
+
+    with pytest.raises(TypeError, match="fetch_session"):
+        WriteOnlyStore()
@@ -0,0 +1,81 @@
+"""
+Test on-demand figure rendering and its cache
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from elbow_rehab.service.analytics.plot_service import (
+    PlotCache,
+    PlotService,
+    prepare_plot_frame,
+    render_plot,
+)
+
+
+def angles_frame(n=50_000):
+    t = np.arange(n)
+    return pd.DataFrame(
+        {
+            "esp32_ms_A": t * 10,
+            "flexion_deg": 60 * np.sin(t / 500.0),
+            "pronation_deg": 20 * np.cos(t / 300.0),
+        }
+    )
+
+
+def test_prepare_plot_frame_decimates_and_keeps_peaks():
+    df = angles_frame()
+
+    small = prepare_plot_frame(df, "angles", max_points=1000)
+
+    assert len(small) <= 1000
+    assert list(small.columns) == ["flexion_deg", "pronation_deg"]
+    assert small["flexion_deg"].max() == df["flexion_deg"].max()
+
+
+@pytest.mark.parametrize("fmt, magic", [("png", b"\x89PNG"), ("svg", b"<?xml")])
+def test_render_plot_encodes_image(fmt, magic):
+    image = render_plot(prepare_plot_frame(angles_frame(2000), "angles", 500), "angles", fmt)
+
+    assert image.startswith(magic)
+
+
+def test_plot_cache_is_bounded_by_bytes():
+    cache = PlotCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.get("a")
+    cache.put("c", b"12345")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"12345" and cache.get("c") == b"12345"
+
+
+def test_concurrent_requests_render_once_then_hit_cache():
+    loads = []
+
+    def load_frame():
+        loads.append(1)
+        return angles_frame(2000)
+
+    service = PlotService(executor_factory=lambda: ThreadPoolExecutor(max_workers=1))
+
+    async def scenario():
+        first = await asyncio.gather(
+            *(service.get_plot("key", load_frame, "angles", "png", 500) for _ in range(3))
+        )
+        second = await service.get_plot("key", load_frame, "angles", "png", 500)
+        return first, second
+
+    try:
+        first, second = asyncio.run(scenario())
+    finally:
+        service.shutdown()
+
+    assert len(loads) == 1
+    assert first[0] == first[1] == first[2] == second
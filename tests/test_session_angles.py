@@ -0,0 +1,260 @@
+# tests/test_session_angles.py
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from elbow_rehab.service import session_angles
+
+from elbow_rehab.service.angle_calculation.calculations import (
+    calculate_angles_columnar,
+    calculate_angles_rowwise,
+    calculate_sessions_angles_bank,
+)
+from elbow_rehab.service.angle_calculation.calibration import (
+    apply_gyro_biases,
+    get_gyro_biases,
+)
+from elbow_rehab.service.angle_calculation.estimator import SimpleElbowEstimator
+from elbow_rehab.service.angle_calculation.filters.base_filter import (
+    quaternions_to_rotation_matrices,
+    relative_rotation_matrices,
+)
+from elbow_rehab.service.angle_calculation.filters import filter_bank
+from elbow_rehab.service.angle_calculation.filters.filter_bank import MadgwickFilterBank
+from elbow_rehab.service.angle_calculation.filters.madgwick import MadgwickFilter
+from elbow_rehab.service.angle_calculation.incremental import (
+    AngleCheckpoint,
+    process_session_angles_incremental,
+)
+from elbow_rehab.service.angle_cache import AngleResultCache
+from elbow_rehab.service.angle_checkpoints import AngleCheckpointStore
+
+G = 9.81
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+def synthetic_session(n: int = 400, seed: int = 0) -> pd.DataFrame:
+    """Two gravity-aligned IMUs with a slow flexion-like wobble plus noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / 100.0
+    data = {}
+    for sensor, phase in (("A", 0.0), ("B", 0.7)):
+        data[f"ax_{sensor}"] = 0.5 * np.sin(t + phase) + rng.normal(0, 0.05, n)
+        data[f"ay_{sensor}"] = 0.3 * np.cos(t + phase) + rng.normal(0, 0.05, n)
+        data[f"az_{sensor}"] = G + rng.normal(0, 0.05, n)
+        data[f"gx_{sensor}"] = 0.4 * np.cos(2 * t + phase) + rng.normal(0, 0.01, n)
+        data[f"gy_{sensor}"] = 0.2 * np.sin(t) + rng.normal(0, 0.01, n)
+        data[f"gz_{sensor}"] = rng.normal(0, 0.01, n)
+    return pd.DataFrame(data)
+
+
+# ============================================================
+# Tests
+# ============================================================
+
+def test_madgwick_run_matches_update_loop():
+    df = synthetic_session()
+    acc = df[["ax_A", "ay_A", "az_A"]].to_numpy()
+    gyro = df[["gx_A", "gy_A", "gz_A"]].to_numpy()
+
+    looped = MadgwickFilter(frequency=100)
+    expected = np.array([looped.update(a, g).copy() for a, g in zip(acc, gyro)])
+
+    batched = MadgwickFilter(frequency=100)
+    history = batched.run(acc, gyro)
+
+    np.testing.assert_allclose(history, expected, atol=1e-12)
+    np.testing.assert_allclose(batched.quaternion, looped.quaternion, atol=1e-12)
+
+
+def test_madgwick_run_reproduces_nan_behavior():
+    """Rotation about gravity drives the ahrs gradient to 0/0 → NaN."""
+    acc = np.tile([0.0, 0.0, G], (300, 1))
+    gyro = np.tile([0.0, 0.0, 1.0], (300, 1))
+
+    looped = MadgwickFilter(frequency=100)
+    expected = np.array([looped.update(a, g).copy() for a, g in zip(acc, gyro)])
+    history = MadgwickFilter(frequency=100).run(acc, gyro)
+
+    np.testing.assert_array_equal(np.isnan(history), np.isnan(expected))
+    assert np.isnan(history).any()
+
+
+def test_batch_rotation_matrices_match_per_sample():
+    f = MadgwickFilter(frequency=100)
+    df = synthetic_session(n=50)
+    quats, mats = [], []
+    for a, g in zip(df[["ax_B", "ay_B", "az_B"]].to_numpy(), df[["gx_B", "gy_B", "gz_B"]].to_numpy()):
+        quats.append(f.update(a, g).copy())
+        mats.append(f.rotation_matrix())
+
+    np.testing.assert_allclose(
+        quaternions_to_rotation_matrices(np.array(quats)), np.array(mats), atol=1e-12
+    )
+
+
+@pytest.mark.parametrize("estimator_type", ["simple", "alignment_free"])
+def test_columnar_angles_match_rowwise(estimator_type):
+    df = synthetic_session(n=200)
+
+    flex_row, pron_row = calculate_angles_rowwise(df, estimator_type, 100.0)
+    flex_col, pron_col = calculate_angles_columnar(df, estimator_type, 100.0)
+
+    np.testing.assert_allclose(flex_col, flex_row, atol=1e-8)
+    np.testing.assert_allclose(pron_col, pron_row, atol=1e-8)
+
+
+def test_relative_kernels_match_matrix_products():
+    df = synthetic_session(n=100)
+    quats_a = MadgwickFilter(frequency=100).run(
+        df[["ax_A", "ay_A", "az_A"]].to_numpy(), df[["gx_A", "gy_A", "gz_A"]].to_numpy()
+    )
+    quats_b = MadgwickFilter(frequency=100).run(
+        df[["ax_B", "ay_B", "az_B"]].to_numpy(), df[["gx_B", "gy_B", "gz_B"]].to_numpy()
+    )
+    R_A = quaternions_to_rotation_matrices(quats_a)
+    R_B = quaternions_to_rotation_matrices(quats_b)
+
+    np.testing.assert_allclose(
+        relative_rotation_matrices(quats_a, quats_b),
+        np.matmul(np.swapaxes(R_A, 1, 2), R_B),
+        atol=1e-12,
+    )
+
+    estimator = SimpleElbowEstimator()
+    expected = np.array([estimator.update_angles(a, None, b, None) for a, b in zip(R_A, R_B)])
+    flexion, pronation = estimator.angles_from_quaternions(quats_a, quats_b)
+    np.testing.assert_allclose(flexion, expected[:, 0], atol=1e-9)
+    np.testing.assert_allclose(pronation, expected[:, 1], atol=1e-9)
+
+
+def test_filter_bank_matches_individual_filters():
+    sessions = [synthetic_session(n=n, seed=n) for n in (120, 200, 80)]
+    acc = [df[["ax_A", "ay_A", "az_A"]].to_numpy() for df in sessions]
+    gyro = [df[["gx_A", "gy_A", "gz_A"]].to_numpy() for df in sessions]
+
+    histories = MadgwickFilterBank(100, streams=3).run(acc, gyro)
+
+    for history, a, g in zip(histories, acc, gyro):
+        assert history.shape == (len(a), 4)
+        np.testing.assert_allclose(history, MadgwickFilter(100).run(a, g), atol=1e-12)
+
+
+def test_filter_bank_run_is_the_same_across_chunk_boundaries(monkeypatch):
+    sessions = [synthetic_session(n=n, seed=n) for n in (120, 37, 80)]
+    acc = [df[["ax_A", "ay_A", "az_A"]].to_numpy() for df in sessions]
+    gyro = [df[["gx_A", "gy_A", "gz_A"]].to_numpy() for df in sessions]
+    whole = MadgwickFilterBank(100, streams=3).run(acc, gyro)
+
+    monkeypatch.setattr(filter_bank, "RUN_CHUNK_STEPS", 16)
+    chunked = MadgwickFilterBank(100, streams=3).run(acc, gyro)
+
+    for expected, history in zip(whole, chunked):
+        np.testing.assert_array_equal(history, expected)
+
+
+def test_filter_bank_masks_inactive_streams():
+    bank = MadgwickFilterBank(100, streams=2)
+    acc = np.array([[0.5, 0.0, G], [0.5, 0.0, G]])
+    gyro = np.array([[0.2, 0.1, 0.0], [0.2, 0.1, 0.0]])
+
+    q = bank.update(acc, gyro, active=[True, False])
+
+    np.testing.assert_allclose(q[1], [1.0, 0.0, 0.0, 0.0])
+    assert not np.allclose(q[0], [1.0, 0.0, 0.0, 0.0])
+    assert bank.rotation_matrix().shape == (2, 3, 3)
+
+
+def test_bank_session_angles_match_columnar():
+    sessions = [synthetic_session(n=150, seed=3), synthetic_session(n=90, seed=4)]
+
+    results = calculate_sessions_angles_bank(sessions, "simple", 100.0)
+
+    for df, (flexion, pronation) in zip(sessions, results):
+        expected_flexion, expected_pronation = calculate_angles_columnar(df, "simple", 100.0)
+        np.testing.assert_allclose(flexion, expected_flexion, atol=1e-8)
+        np.testing.assert_allclose(pronation, expected_pronation, atol=1e-8)
+
+
+@pytest.mark.parametrize(
+    "estimator_type, filter_type",
+    [("simple", "madgwick"), ("alignment_free", "madgwick"), ("simple", "ekf")],
+)
+def test_incremental_chunks_match_full_session(estimator_type, filter_type):
+    # the first chunk covers the calibration search span (1000 samples)
+    df = synthetic_session(n=1500).assign(esp32_ms_A=lambda d: np.arange(len(d)) * 10)
+    calibrated = apply_gyro_biases(df, get_gyro_biases(df))
+    expected_flex, expected_pron = calculate_angles_columnar(
+        calibrated, estimator_type, 100.0, filter_type
+    )
+
+    chunks = []
+    checkpoint = None
+    for start, stop in ((0, 1050), (1050, 1051), (1051, 1300), (1300, 1500)):
+        processed, checkpoint = process_session_angles_incremental(
+            "s1",
+            df.iloc[start:stop],
+            checkpoint,
+            estimator_type=estimator_type,
+            sample_rate=100.0,
+            filter_type=filter_type,
+        )
+        # Resume from a JSON round trip, as the checkpoint store does.
+        checkpoint = AngleCheckpoint.from_dict(json.loads(json.dumps(checkpoint.to_dict())))
+        chunks.append(processed)
+
+    combined = pd.concat(chunks)
+    assert checkpoint.row_count == 1500
+    assert checkpoint.last_esp32_ms_A == 14990
+    np.testing.assert_allclose(combined["flexion_deg"], expected_flex, atol=1e-9)
+    np.testing.assert_allclose(combined["pronation_deg"], expected_pron, atol=1e-9)
+
+
+def test_no_checkpoint_before_calibration_window_is_complete():
+    df = synthetic_session(n=100).assign(esp32_ms_A=lambda d: np.arange(len(d)) * 10)
+
+    processed, checkpoint = process_session_angles_incremental("s1", df)
+
+    assert checkpoint is None
+    assert len(processed) == 100
+
+
+class SessionsStore:
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self.fetches = 0
+
+    def fetch_sessions(self, session_ids):
+        self.fetches += 1
+        return {sid: self.sessions[sid] for sid in session_ids if sid in self.sessions}
+
+
+def test_batch_sessions_match_single_session_processing(monkeypatch):
+    sessions = {
+        f"s{k}": synthetic_session(n=500, seed=k).assign(esp32_ms_A=lambda d: np.arange(len(d)) * 10)
+        for k in range(3)
+    }
+    store = SessionsStore(sessions)
+    monkeypatch.setattr(session_angles, "get_reading_store", lambda: store)
+    monkeypatch.setattr(session_angles, "angle_cache", AngleResultCache(disk_dir=None))
+    monkeypatch.setattr(session_angles, "checkpoint_store", AngleCheckpointStore(directory=None))
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = session_angles.get_sessions_angles(["s2", "missing", "s0", "s1"], executor=executor)
+
+    assert list(results) == ["s2", "missing", "s0", "s1"]
+    assert results["missing"] is None
+    for sid, df in sessions.items():
+        expected, _ = process_session_angles_incremental(sid, df)
+        np.testing.assert_allclose(results[sid]["flexion_deg"], expected["flexion_deg"])
+
+    # served from the angle cache with the same single read
+    again = session_angles.get_sessions_angles(["s0"])
+    assert again["s0"] is results["s0"]
+    assert store.fetches == 2
@@ -0,0 +1,45 @@
+"""
+Test the sliding-window median smoothers against the reference loop
+"""
+
+import numpy as np
+import pytest
+
+from elbow_rehab.service.angle_calculation import smoothing
+from elbow_rehab.service.angle_calculation.smoothing import StreamingMedian, rolling_median
+
+
+def reference_median(series, window):
+    return np.array(
+        [np.median(series[max(0, i - window + 1) : i + 1]) for i in range(len(series))]
+    )
+
+
+@pytest.mark.parametrize("window", [1, 2, 10, 33])
+def test_rolling_median_matches_reference(window):
+    series = np.random.default_rng(window).normal(size=200)
+    series[50] = np.nan
+
+    np.testing.assert_array_equal(rolling_median(series, window), reference_median(series, window))
+
+
+def test_short_series_and_chunked_view(monkeypatch):
+    series = np.random.default_rng(0).normal(size=500)
+    np.testing.assert_array_equal(rolling_median(series[:4], 10), reference_median(series[:4], 10))
+
+    monkeypatch.setattr(smoothing, "_CHUNK_VALUES", 64)
+    np.testing.assert_array_equal(rolling_median(series, 9), reference_median(series, 9))
+
+
+def test_streaming_median_matches_batch():
+    series = np.random.default_rng(1).normal(size=300)
+    smoother = StreamingMedian(window=10)
+
+    parts = []
+    for start, stop in ((0, 3), (3, 4), (4, 4), (4, 150), (150, 300)):
+        parts.append(smoother.update(series[start:stop]))
+        state = smoother.get_state()
+        smoother = StreamingMedian(window=10)
+        smoother.set_state(state)
+
+    np.testing.assert_array_equal(np.concatenate(parts), rolling_median(series, 10))
@@ -0,0 +1,103 @@
+"""
+Test local verification of Firebase ID tokens against the signing certificates
+"""
+
+import datetime
+import time
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt
+
+from elbow_rehab.service.auth import FIREBASE_ISSUER_PREFIX, verify_firebase_token
+
+PROJECT_ID = "elbow-rehab-test"
+KEY_ID = "key-1"
+
+
+def signing_key():
+    """A fresh RSA key and the PEM certificate Google would publish for it."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    return key_pem, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+KEY_PEM, CERT_PEM = signing_key()
+CERTS = {KEY_ID: CERT_PEM}
+
+
+def claims(**overrides):
+    now = int(time.time())
+    return {
+        "iss": FIREBASE_ISSUER_PREFIX + PROJECT_ID,
+        "aud": PROJECT_ID,
+        "sub": "user-1",
+        "iat": now - 10,
+        "exp": now + 3600,
+        **overrides,
+    }
+
+
+def token(payload, key_pem=KEY_PEM, key_id=KEY_ID, header=None):
+    signer = crypt.RSASigner.from_string(key_pem, key_id=key_id)
+    return jwt.encode(signer, payload, header=header).decode()
+
+
+def test_valid_token_returns_claims_with_uid():
+    decoded = verify_firebase_token(token(claims()), CERTS, PROJECT_ID)
+    assert decoded["uid"] == decoded["sub"] == "user-1"
+    assert decoded["aud"] == PROJECT_ID
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        claims(aud="another-project"),
+        claims(iss=FIREBASE_ISSUER_PREFIX + "another-project"),
+        claims(iss="https://accounts.google.com"),
+        claims(iat=int(time.time()) - 7200, exp=int(time.time()) - 3600),
+        claims(sub=""),
+        claims(sub="u" * 129),
+        claims(sub=42),
+    ],
+    ids=["aud", "iss-project", "iss-issuer", "expired", "empty-sub", "long-sub", "int-sub"],
+)
+def test_invalid_claims_are_rejected(payload):
+    with pytest.raises(ValueError):
+        verify_firebase_token(token(payload), CERTS, PROJECT_ID)
+
+
+def test_unknown_key_id_is_rejected():
+    with pytest.raises(ValueError, match="unknown key"):
+        verify_firebase_token(token(claims(), key_id="key-2"), CERTS, PROJECT_ID)
+
+
+def test_non_rs256_algorithm_is_rejected():
+    forged = token(claims(), header={"alg": "HS256"})
+    with pytest.raises(ValueError, match="algorithm"):
+        verify_firebase_token(forged, CERTS, PROJECT_ID)
+
+
+def test_signature_by_another_key_is_rejected():
+    other_key_pem, _ = signing_key()
+    with pytest.raises(ValueError):
+        verify_firebase_token(token(claims(), key_pem=other_key_pem), CERTS, PROJECT_ID)
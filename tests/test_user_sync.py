@@ -0,0 +1,88 @@
+"""
+Test the incremental Firebase user sync bookkeeping
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from elbow_rehab.service.user_sync import (
+    UserSyncResult,
+    UserSyncWorker,
+    select_changed_users,
+)
+
+
+def firebase_user(uid, created_ms, refreshed_ms=None):
+    return SimpleNamespace(
+        uid=uid,
+        email=f"{uid}@example.com",
+        user_metadata=SimpleNamespace(
+            creation_timestamp=created_ms, last_refresh_timestamp=refreshed_ms
+        ),
+    )
+
+
+def test_only_users_changed_after_the_mark_are_selected():
+    users = [
+        firebase_user("old", 100),
+        firebase_user("refreshed", 100, refreshed_ms=900),
+        firebase_user("new", 700),
+    ]
+
+    rows, newest = select_changed_users(users, high_water_mark_ms=500)
+
+    assert [row["uid"] for row in rows] == ["refreshed", "new"]
+    assert rows[0] == {"uid": "refreshed", "email": "refreshed@example.com", "role": "patient"}
+    assert newest == 900
+
+
+def test_mark_never_moves_backwards():
+    rows, newest = select_changed_users([firebase_user("old", 100)], high_water_mark_ms=500)
+
+    assert rows == [] and newest == 500
+
+
+def test_worker_records_results_and_failures():
+    outcomes = [RuntimeError("db down"), UserSyncResult(users_seen=3, users_written=1, high_water_mark_ms=1)]
+
+    def sync():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    worker = UserSyncWorker(sync, interval_s=0.01)
+
+    async def scenario():
+        await worker.run_once()
+        failed = worker.status()
+        await worker.run_once()
+        return failed, worker.status()
+
+    failed, succeeded = asyncio.run(scenario())
+
+    assert failed["failures"] == 1 and failed["last_error"] == "db down"
+    assert failed["seconds_since_last_success"] is None
+    assert succeeded["last_error"] is None
+    assert succeeded["last_result"]["users_written"] == 1
+    assert succeeded["seconds_since_last_success"] >= 0
+
+
+def test_worker_runs_in_background_until_stopped():
+    calls = []
+
+    def sync():
+        calls.append(1)
+        return UserSyncResult()
+
+    worker = UserSyncWorker(sync, interval_s=0.01)
+
+    async def scenario():
+        await worker.start()
+        await asyncio.sleep(0.1)
+        await worker.stop()
+
+    asyncio.run(scenario())
+
+    assert len(calls) >= 2
+    assert worker.status()["runs"] >= 2